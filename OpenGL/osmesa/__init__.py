@@ -1,2 +1,109 @@
 from OpenGL.raw.osmesa._types import *
 from OpenGL.raw.osmesa.mesa import *
+
+import ctypes
+from OpenGL.raw.GL.VERSION.GL_1_1 import GL_UNSIGNED_BYTE, GL_UNSIGNED_SHORT, GL_FLOAT
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# bytes per component and numpy dtype for OSMESA_TYPE
+_TYPE_INFO = {
+    int(GL_UNSIGNED_BYTE): (1, 'u1'),
+    int(GL_UNSIGNED_SHORT): (2, 'u2'),
+    int(GL_FLOAT): (4, 'f4'),
+}
+# components per pixel for OSMESA_FORMAT, in memory order
+_FORMAT_CHANNELS = {
+    int(OSMESA_RGBA): 'RGBA',
+    int(OSMESA_BGRA): 'BGRA',
+    int(OSMESA_ARGB): 'ARGB',
+    int(OSMESA_RGB): 'RGB',
+    int(OSMESA_BGR): 'BGR',
+}
+
+def _contextAddress( context ):
+    return ctypes.cast( context, ctypes.c_void_p ).value
+
+def _binding( context ):
+    """(pointer, width, height, format, type, row_length, y_up) currently bound"""
+    width, height, format, pointer = OSMesaGetColorBuffer( context )
+    if not pointer or not pointer.value:
+        return None
+    return (
+        pointer.value, width, height, format,
+        OSMesaGetIntegerv( OSMESA_TYPE ),
+        OSMesaGetIntegerv( OSMESA_ROW_LENGTH ) or width,
+        bool( OSMesaGetIntegerv( OSMESA_Y_UP ) ),
+    )
+
+class OSMesaColorBuffer( object ):
+    """Live view of the color buffer bound with OSMesaMakeCurrent
+
+    OSMesa renders straight into the caller's memory, so after glFinish()
+    the frame can be read without glReadPixels or a copy. Attributes:
+
+        width, height -- size in pixels
+        format -- OSMESA_FORMAT value, channels -- e.g. 'RGBA'
+        type -- OSMESA_TYPE value (GL_UNSIGNED_BYTE, ...)
+        stride -- bytes from one row to the next (OSMESA_ROW_LENGTH)
+        y_up -- true when the first row in memory is the bottom row
+        pointer -- address of the first row in memory
+        data -- memoryview of unsigned bytes over all rows
+        array -- numpy (height, width, components) view in memory order,
+            or None without numpy
+        image -- array flipped so that row 0 is the top of the image
+
+    The views alias the buffer and change as frames are drawn; copy what
+    has to be kept.  colorBuffer() returns a view that is only rebuilt
+    when the binding changes.
+    """
+    def __init__( self, context=None ):
+        context = context or OSMesaGetCurrentContext()
+        binding = _binding( context )
+        if binding is None:
+            raise ValueError( 'No color buffer bound to the OSMesa context' )
+        self.binding = binding
+        self.pointer, width, height, format, type, row_length, self.y_up = binding
+        self.width, self.height, self.format, self.type = width, height, format, type
+        self.channels = _FORMAT_CHANNELS.get( format )
+        if self.channels is None or type not in _TYPE_INFO:
+            raise ValueError(
+                'Unsupported OSMesa buffer format 0x%x, type 0x%x'%( format, type )
+            )
+        item_size, code = _TYPE_INFO[type]
+        pixel_size = item_size * len(self.channels)
+        self.stride = row_length * pixel_size
+        size = self.stride * (height - 1) + width * pixel_size
+        self.data = memoryview(
+            (ctypes.c_ubyte * size).from_address( self.pointer )
+        ).cast( 'B' )
+        self.array = self.image = None
+        if numpy is not None:
+            self.array = numpy.ndarray(
+                (height, width, len(self.channels)), numpy.dtype( code ),
+                buffer=self.data, strides=(self.stride, pixel_size, item_size),
+            )
+            self.image = self.array[::-1] if self.y_up else self.array
+
+_BUFFERS = {}
+
+def colorBuffer( context=None ):
+    """OSMesaColorBuffer for the context's current binding, reused across frames
+
+    The cached view is rebuilt only when OSMesaMakeCurrent or
+    OSMesaPixelStore changed the buffer, its size, format, row length or
+    orientation, so per-frame capture allocates nothing.
+    """
+    context = context or OSMesaGetCurrentContext()
+    address = _contextAddress( context )
+    cached = _BUFFERS.get( address )
+    if cached is None or cached.binding != _binding( context ):
+        cached = _BUFFERS[address] = OSMesaColorBuffer( context )
+    return cached
+
+def releaseColorBuffer( context=None ):
+    """Drop the cached view for context, e.g. before OSMesaDestroyContext"""
+    context = context or OSMesaGetCurrentContext()
+    _BUFFERS.pop( _contextAddress( context ), None )
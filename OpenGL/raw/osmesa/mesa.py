@@ -60,7 +60,7 @@ def OSMesaMakeCurrent( ctx, buffer, type,width,height ): pass
 
 @_f 
 @_p.types(None, GLint, GLint )
-def OSMesaPixelStore( ctx, buffer, type,width,height ): pass
+def OSMesaPixelStore( pname, value ): pass
 
 def OSMesaGetIntegerv(pname):
     value = GLint()
@@ -1,88 +1,78 @@
+import sys
+if "--headless" in sys.argv:
+    import tug_headless  # picks an offscreen GL platform before OpenGL loads
 from OpenGL.GL import *
 from OpenGL.GLUT import *
 from OpenGL.GLU import *
 import math
 import time
-import random
+import os
+from tug_sim import TugSimulation, TugConfig, FIXED_DT
+from tug_replay import ReplayRing, InputReplay, ReplayPlayer
+from tug_scores import HighScoreStore, ScoreWriter
+from tug_leaderboard import LeaderboardWorker
+from tug_render import quadrics, build_arena, player_model, referee_model
+from tug_clock import FrameScheduler, GameClock
+from tug_hud import hud, HudLayer
+from tug_profile import FrameProfiler
+from tug_export import open_exporter
 # -------------------
 # Camera / scene
 # -------------------
 camera_pos = (0, 500, 500)
 fovY = 120
 GRID_LENGTH = 600
+arena = build_arena(GRID_LENGTH)  # static geometry, uploaded on first draw
+hud_layer = HudLayer(hud)  # HUD text cached in a texture, redrawn per region
+profiler = FrameProfiler()  # 't' shows frame timings, 'k' streams them to JSONL
+exporter = None  # 'v' records the session as numbered PNGs
 
 # -------------------
-# Game state variables
+# Game state (rules and timing live in tug_sim.TugSimulation)
 # -------------------
-tug_var = 0           # variable changed by players: A -> +1, L -> -1
-TUG_LIMIT = 10        # winning threshold (crossing >+TUG_LIMIT or <-TUG_LIMIT)
-winner = None         # 'A' or 'L' or None
-game_paused = False   # stops inputs when round ended
-round_enabled = True
-ROUND_DURATION = 5.0  # seconds per round
-round_time_left = ROUND_DURATION
-round_running = True
-
-# Stamina mechanic
-LEFT_MAX_STAM = 100.0
-RIGHT_MAX_STAM = 100.0
-left_stamina = LEFT_MAX_STAM
-right_stamina = RIGHT_MAX_STAM
-STAM_COST_PER_PRESS = 12.0   # cost per keypress
-STAM_RECOVER_RATE = 18.0     # per second
-
-# Keystroke counters
-left_presses = 0
-right_presses = 0
-animation_start = None
-ANIM_DURATION = 3.0   # seconds of win animation
-platform_fall_progress = 0.0
-
-# Animation variables
-loser_fall_progress = 0.0  # 0 to 1 for loser falling animation
-winner_jump_progress = 0.0  # 0 to 1 for winner jumping animation
-ANIMATION_DURATION = 2.0  # seconds for the full animation
-
-# Player lean feedback variables    
-left_lean_amount = 0.0
-right_lean_amount = 0.0
-LEAN_MAX_ANGLE = 12.0      # Maximum lean angle in degrees
-LEAN_RECOVERY_RATE = 40.0  # How quickly lean resets (degrees per second)
-left_lean_time = 0.0
-right_lean_time = 0.0
-LEAN_DURATION = 0.25
-
-# Referee animation variables
-referee_left_arm_angle = 0.0    # Angle for left arm raise (0-90 degrees)
-referee_right_arm_angle = 0.0   # Angle for right arm raise (0-90 degrees)
-referee_wave_progress = 0.0     # For tie wave animation (0-1)
-referee_animation_type = None   # 'left_win', 'right_win', 'tie', or None
-referee_animation_start = None  # Time when referee animation began
-REFEREE_ANIM_DURATION = 2.0     # Duration of referee celebration animation
-
-# Bot opponent
-bot_enabled = False
-bot_difficulty = 0.6  # 0.0..1.0 aggressiveness (higher means more frequent presses)
-last_bot_action = 0.0
+sim = TugSimulation(TugConfig())
+TUG_LIMIT = sim.config.tug_limit
+pending_keys = []     # 'a'/'l' presses queued for the next simulation step
 
 # Replay buffer: store recent frames (time, tug_var, left_presses, right_presses, left_stam, right_stam)
 REPLAY_SECONDS = 6.0
-REPLAY_FPS = 60.0
-max_replay_frames = int(REPLAY_SECONDS * REPLAY_FPS)
-replay_buffer = []
+max_replay_frames = int(REPLAY_SECONDS / FIXED_DT)  # idle() appends once per 120 Hz tick
+replay_buffer = ReplayRing(max_replay_frames)
 replay_mode = False
-replay_index = 0
-replay_speed = 1.0  # play speed multiplier for replay
+replay_player = None  # ReplayPlayer cursor while replay_mode is on
+replay_speed = 1.0  # play speed multiplier for replay ('[' / ']' change it)
+win_time = None     # sim time the round ended, for the replay's 'J' jump
 
 # Highscore file - store last N wins as JSON lines
 HIGHSCORE_FILE = "tug_highscores.jsonl"
 max_saved_scores = 50
 
-# Time tracking for dt updates
-_last_time_ms = None
+# Every finished round is kept as an input-event replay (seed + presses)
+REPLAY_DIR = "tug_replays"
+
+# Game time: fixed simulation steps from one monotonic clock
+game_clock = GameClock()
 
 # HUD / UI
-show_scores_list = []  # loaded scores to display
+high_scores = HighScoreStore(HIGHSCORE_FILE, keep=5)  # recent wins, tailed from the file
+score_writer = ScoreWriter(HIGHSCORE_FILE)  # appends scores off the render thread
+_scores_written = 0   # score_writer.generation last seen by idle()
+leaderboard = None           # LeaderboardWorker, started by main(); builds the all-time line
+leaderboard_line = ""        # last summary the worker finished, one HUD line per \n
+show_debug = False           # 'g' toggles the render debug line
+
+
+def leaderboard_summary(board):
+    """The all-time lines, split to fit HUD_SCORES_RECT; runs on the leaderboard worker thread."""
+    rates = board.win_rates()
+    if not rates["rounds"]:
+        return ""
+    best = board.best_margins(1)
+    fastest = board.fastest_wins(1)
+    line = f"A {rates['win_rate_A']:.0%}  L {rates['win_rate_L']:.0%}"
+    if best and fastest:
+        line += f"  best {abs(best[0]['tug_at_end'])}  fastest {fastest[0]['round_duration']:.1f}s"
+    return f"All time: {rates['rounds']} rounds\n{line}"
 
 # Misc
 rand_var = 423
@@ -91,31 +81,7 @@ rand_var = 423
 # Utility / drawing functions
 # -------------------
 def draw_text(x, y, text, font=GLUT_BITMAP_HELVETICA_18):
-    glColor3f(1, 1, 1)
-    glMatrixMode(GL_PROJECTION)
-    glPushMatrix()
-    glLoadIdentity()
-    # Set up orthographic projection that matches window coordinates
-    gluOrtho2D(0, 1000, 0, 800)
-    glMatrixMode(GL_MODELVIEW)
-    glPushMatrix()
-    glLoadIdentity()
-    # Draw text at (x, y) in screen coords
-    glRasterPos2f(x, y)
-    for ch in text:
-        glutBitmapCharacter(font, ord(ch))
-    glPopMatrix()
-    glMatrixMode(GL_PROJECTION)
-    glPopMatrix()
-    glMatrixMode(GL_MODELVIEW)
-
-def draw_platform(x, z, width=220, depth=60, height=10, falling_offset=0.0):
-    """Simple rectangular platform at (x, z). falling_offset moves platform down for animation"""
-    glPushMatrix()
-    glTranslatef(x, -falling_offset, z)
-    glScalef(width, depth, height)
-    glutSolidCube(1)  # scaled cube acts as platform
-    glPopMatrix()
+    hud.text(x, y, text, font)
 
 def draw_player(x, z, color=(1, 0, 0), lean=0.0, falling=0.0, jumping=0.0, facing="right"):
     """
@@ -124,8 +90,8 @@ def draw_player(x, z, color=(1, 0, 0), lean=0.0, falling=0.0, jumping=0.0, facin
     - falling: vertical fall offset for animation
     - jumping: vertical jump offset for animation
     - facing: 'right' or 'left' (ensures players face each other)
+    The body itself is a compiled model; only the root transform changes.
     """
-
     glPushMatrix()
     glTranslatef(x, -falling + jumping, z)
 
@@ -137,56 +103,7 @@ def draw_player(x, z, color=(1, 0, 0), lean=0.0, falling=0.0, jumping=0.0, facin
     glRotatef(lean, 1, 0, 0)  # lean along X-axis
 
     glColor3f(*color)
-
-    # === Legs (Cylinders) ===
-    for leg_x in (-8, 8):
-        glPushMatrix()
-        glTranslatef(leg_x, 0, 15)
-        glRotatef(90, 1, 0, 0)
-        gluCylinder(gluNewQuadric(), 4, 4, 30, 10, 10)
-        glPopMatrix()
-
-    # === Feet (Cuboids) ===
-    for foot_x in (-8, 8):
-        glPushMatrix()
-        glTranslatef(foot_x, 8, 0)
-        glScalef(8, 16, 6)
-        glutSolidCube(1)
-        glPopMatrix()
-
-    # === Torso ===
-    glPushMatrix()
-    glTranslatef(0, 0, 55)
-    glScalef(20, 12, 30)
-    glutSolidCube(1)
-    glPopMatrix()
-
-    # === Arms (Cylinders) ===
-    arm_angle = 20  # slight outward angle
-    for arm_x, side in [(-10, "left"), (10, "right")]:
-        glPushMatrix()
-        glTranslatef(arm_x, 0, 65)
-        if side == "left":
-            glRotatef(arm_angle, 0, 0, 1)
-        else:
-            glRotatef(-arm_angle, 0, 0, 1)
-        glRotatef(90, 0, 1, 0)
-        gluCylinder(gluNewQuadric(), 3, 3, 25, 8, 8)
-        glPopMatrix()
-
-    # === Hands (Spheres) positioned to grip rope ===
-    for hand_x in (-28, 28):
-        glPushMatrix()
-        glTranslatef(hand_x, 0, 65)
-        glutSolidSphere(5, 10, 10)
-        glPopMatrix()
-
-    # === Head ===
-    glPushMatrix()
-    glTranslatef(0, 0, 85)
-    glutSolidSphere(10, 12, 12)
-    glPopMatrix()
-
+    player_model.draw('body')
     glPopMatrix()
 
 
@@ -213,70 +130,26 @@ def draw_referee(x, z, winner=None, wave_progress=0.0):
         left_arm_angle = 0
         right_arm_angle = 0
 
+    # Body is a compiled model; the arms are the only moving joints
     glPushMatrix()
-    try:
-        base_height = 40
-        glTranslatef(x, 0, z + base_height)
-
-        # Legs
-        for lx in (-8, 8):
-            glPushMatrix()
-            glTranslatef(lx, 0, 0)
-            glRotatef(90, 1, 0, 0)
-            gluCylinder(gluNewQuadric(), 4, 4, 40, 12, 12)
-            glPopMatrix()
-
-        # Feet
-        for fx in (-8, 8):
-            glPushMatrix()
-            glTranslatef(fx, 8, -3)
-            glScalef(8, 16, 6)
-            glColor3f(0.2, 0.2, 0.2)
-            glutSolidCube(1)
-            glPopMatrix()
-
-        # Torso
-        glPushMatrix()
-        glTranslatef(0, 0, 40)
-        glScalef(22, 14, 50)
-        glColor3f(1.0, 1.0, 0.0)  # yellow shirt
-        glutSolidCube(1)
-        glPopMatrix()
-
-        # Left arm
-        glPushMatrix()
-        glTranslatef(-14, 0, 60)
-        glRotatef(left_arm_angle + 45, 0, 0, 1)
-        glRotatef(90, 0, 1, 0)
-        glColor3f(1.0, 1.0, 0.0)
-        gluCylinder(gluNewQuadric(), 3, 3, 35, 10, 10)
-        glTranslatef(35, 0, 0)
-        glColor3f(1.0, 1.0, 1.0)
-        glutSolidSphere(5, 12, 12)
-        glPopMatrix()
-
-        # Right arm
-        glPushMatrix()
-        glTranslatef(14, 0, 60)
-        glRotatef(-right_arm_angle - 45, 0, 0, 1)
-        glRotatef(-90, 0, 1, 0)
-        glColor3f(1.0, 1.0, 0.0)
-        gluCylinder(gluNewQuadric(), 3, 3, 35, 10, 10)
-        glTranslatef(35, 0, 0)
-        glColor3f(1.0, 1.0, 1.0)
-        glutSolidSphere(5, 12, 12)
-        glPopMatrix()
+    glTranslatef(x, 0, z + 40)  # base height
+    referee_model.draw('body')
 
-        # Head
-        glPushMatrix()
-        glTranslatef(0, 0, 95)
-        glColor3f(1.0, 1.0, 1.0)
-        glutSolidSphere(10, 16, 16)
-        glPopMatrix()
+    glPushMatrix()
+    glTranslatef(-14, 0, 60)
+    glRotatef(left_arm_angle + 45, 0, 0, 1)
+    glRotatef(90, 0, 1, 0)
+    referee_model.draw('arm')
+    glPopMatrix()
 
-    finally:
-        glPopMatrix()
+    glPushMatrix()
+    glTranslatef(14, 0, 60)
+    glRotatef(-right_arm_angle - 45, 0, 0, 1)
+    glRotatef(-90, 0, 1, 0)
+    referee_model.draw('arm')
+    glPopMatrix()
 
+    glPopMatrix()
 
 
 def draw_scoreboard(x, z, tug_val, left_stam, right_stam, left_presses, right_presses, 
@@ -287,14 +160,7 @@ def draw_scoreboard(x, z, tug_val, left_stam, right_stam, left_presses, right_pr
     glPushMatrix()
     glTranslatef(x, 0, z)
 
-    # === Main scoreboard frame (narrower) ===
-    glColor3f(0.15, 0.15, 0.2)
-    glPushMatrix()
-    glTranslatef(0, 0, 120)
-    glScalef(140, 8, 80)   # reduced width & depth
-    glutSolidCube(1)
-    glPopMatrix()
-    
+    # Frame, post, bar track and indicators are baked into the arena
     # === Scoreboard border (adjusted) ===
     glColor3f(0.8, 0.8, 0.8)
     glPushMatrix()
@@ -303,14 +169,6 @@ def draw_scoreboard(x, z, tug_val, left_stam, right_stam, left_presses, right_pr
     glutWireCube(1)
     glPopMatrix()
     
-    # === Support post ===
-    glColor3f(0.3, 0.3, 0.35)
-    glPushMatrix()
-    glTranslatef(0, 0, 60)
-    glScalef(6, 6, 110)   # thinner post
-    glutSolidCube(1)
-    glPopMatrix()
-    
     # === Winner highlighting ===
     if winner_highlight == 'left':
         glColor3f(1.0, 0.3, 0.3)
@@ -327,7 +185,7 @@ def draw_scoreboard(x, z, tug_val, left_stam, right_stam, left_presses, right_pr
         glutSolidCube(1)
         glPopMatrix()
     elif winner_highlight == 'tie':
-        glow_intensity = 0.5 + 0.3 * math.sin(time.time() * 6)
+        glow_intensity = 0.5 + 0.3 * math.sin(game_clock.now() * 6)
         glColor3f(glow_intensity, glow_intensity, 0.2)
         glPushMatrix()
         glTranslatef(0, 4, 135)
@@ -335,15 +193,7 @@ def draw_scoreboard(x, z, tug_val, left_stam, right_stam, left_presses, right_pr
         glutSolidCube(1)
         glPopMatrix()
     
-    # === Tug-of-war progress bar ===
-    glColor3f(0.2, 0.2, 0.2)
-    glPushMatrix()
-    glTranslatef(0, 3, 95)
-    glScalef(100, 4, 6)   # narrower
-    glutSolidCube(1)
-    glPopMatrix()
-    
-    # Fill bar
+    # === Tug-of-war progress bar fill ===
     clamped_tug = max(-TUG_LIMIT, min(TUG_LIMIT, tug_val))
     bar_fill = (clamped_tug + TUG_LIMIT) / (2.0 * TUG_LIMIT)
     fill_width = 100 * bar_fill
@@ -360,31 +210,6 @@ def draw_scoreboard(x, z, tug_val, left_stam, right_stam, left_presses, right_pr
     glutSolidCube(1)
     glPopMatrix()
     
-    # === Score indicators ===
-    # Left score
-    glColor3f(0.9, 0.2, 0.2)
-    glPushMatrix()
-    glTranslatef(-45, 3, 145)
-    glScalef(6, 4, 6)
-    glutSolidCube(1)
-    glPopMatrix()
-    
-    # Right score
-    glColor3f(0.2, 0.3, 0.9)
-    glPushMatrix()
-    glTranslatef(45, 3, 145)
-    glScalef(6, 4, 6)
-    glutSolidCube(1)
-    glPopMatrix()
-    
-    # Timer
-    glColor3f(0.9, 0.9, 0.2)
-    glPushMatrix()
-    glTranslatef(0, 3, 160)
-    glScalef(20, 4, 6)
-    glutSolidCube(1)
-    glPopMatrix()
-    
     glPopMatrix()
 
 def draw_rope(center_x, z, tug_value):
@@ -413,75 +238,12 @@ def draw_rope(center_x, z, tug_value):
     glutSolidCube(1)
     glPopMatrix()
 
-def update_referee_animation(dt):
-    """Update referee arm position and wave animation based on current winner state.
-       Single arm points to winner or waves for ties."""
-    global referee_left_arm_angle, referee_right_arm_angle, referee_wave_progress
-    global referee_animation_type, referee_animation_start
-    
-    if referee_animation_start is None:
-        return
-        
-    elapsed = time.time() - referee_animation_start
-    progress = min(1.0, elapsed / REFEREE_ANIM_DURATION)
-    
-    if referee_animation_type == 'left_win':
-        # Point arm toward left player (raise left arm)
-        referee_left_arm_angle = 90.0 * progress  # Raise left arm to point
-        referee_right_arm_angle = 0.0
-        
-    elif referee_animation_type == 'right_win':
-        # Point arm toward right player (raise right arm)
-        referee_right_arm_angle = 90.0 * progress  # Raise right arm to point
-        referee_left_arm_angle = 0.0
-        
-    elif referee_animation_type == 'tie':
-        # Wave both arms for tie celebration
-        referee_wave_progress = progress
-        wave_cycle = progress * 8 * 2 * math.pi  # Multiple waves
-        referee_left_arm_angle = 45.0 + 20.0 * math.sin(wave_cycle)
-        referee_right_arm_angle = 45.0 + 20.0 * math.sin(wave_cycle + math.pi)
-    
-    # Reset animation when complete
-    if progress >= 1.0:
-        if referee_animation_type != 'tie':
-            # Keep arm pointed for win poses
-            pass
-        else:
-            # Reset wave animation to neutral
-            referee_left_arm_angle = 0.0
-            referee_right_arm_angle = 0.0
-            referee_wave_progress = 0.0
-
-def start_referee_animation(winner_type):
-    """Initialize referee animation based on game outcome."""
-    global referee_animation_type, referee_animation_start
-    global referee_left_arm_angle, referee_right_arm_angle, referee_wave_progress
-    
-    referee_animation_start = time.time()
-    referee_animation_type = winner_type
-    
-    # Reset animation values
-    referee_left_arm_angle = 0.0
-    referee_right_arm_angle = 0.0
-    referee_wave_progress = 0.0
-
-def reset_referee():
-    """Reset referee to neutral position."""
-    global referee_left_arm_angle, referee_right_arm_angle, referee_wave_progress
-    global referee_animation_type, referee_animation_start
-    
-    referee_left_arm_angle = 0.0
-    referee_right_arm_angle = 0.0
-    referee_wave_progress = 0.0
-    referee_animation_type = None
-    referee_animation_start = None
 def draw_live_scene(tug_val, left_stam, right_stam, left_p_cnt, right_p_cnt, 
                    fake_shadow=True, anim_progress=0.0, 
                    left_lean=0.0, right_lean=0.0):
     """Compose the 3D scene using provided parameters (live or snapshot)."""
-    global winner, animation_start, loser_fall_progress, winner_jump_progress
-    global referee_wave_progress
+    winner = sim.winner
+    game_paused = sim.game_paused
 
     # --- Lean decay ---
     lean_decay = 0.85
@@ -489,32 +251,26 @@ def draw_live_scene(tug_val, left_stam, right_stam, left_p_cnt, right_p_cnt,
     right_lean *= lean_decay
 
     # Platforms falling offset
-    fall_offset = platform_fall_progress * 220.0 if animation_start else 0.0
+    fall_offset = sim.platform_fall_progress * 220.0 if sim.animation_start else 0.0
 
     # Calculate winner jump animation (bouncing)
     jump_offset = 0.0
-    if animation_start is not None and winner is not None:
-        jump_offset = abs(math.sin(winner_jump_progress * 3.0 * 2 * math.pi)) * 25.0
-
-    # Platforms
-    glColor3f(0.7, 0.5, 0.2)
-    draw_platform(-300, 0, falling_offset=fall_offset if winner == 'L' else 0.0)
-    draw_platform(300, 0, falling_offset=fall_offset if winner == 'A' else 0.0)
-
-    # Support legs under platforms
-    for xp in (-300, 300):
-        glPushMatrix()
-        leg_fall = fall_offset if (winner == 'L' and xp < 0) or (winner == 'A' and xp > 0) else 0.0
-        glTranslatef(xp, -35 - leg_fall, 0)
-        glScalef(40, 40, 70)
-        glColor3f(0.4, 0.3, 0.25)
-        glutSolidCube(1)
-        glPopMatrix()
+    if sim.animation_start is not None and winner is not None:
+        jump_offset = abs(math.sin(sim.winner_jump_progress * 3.0 * 2 * math.pi)) * 25.0
+
+    # Floor, platforms, legs, center block, scoreboard frame and lights:
+    # one baked draw call, the losing side's group is offset while it falls
+    arena.draw({
+        'left': (0, -(fall_offset if winner == 'L' else 0.0), 0),
+        'right': (0, -(fall_offset if winner == 'A' else 0.0), 0),
+        'center': (0, -(fall_offset if winner else 0.0), 0),
+    })
+    profiler.lap("scene")
 
     # Calculate player falling/jumping
-    left_fall = loser_fall_progress * 150 if winner == 'A' else 0.0
+    left_fall = sim.loser_fall_progress * 150 if winner == 'A' else 0.0
     left_jump = jump_offset if winner == 'L' else 0.0
-    right_fall = loser_fall_progress * 150 if winner == 'L' else 0.0
+    right_fall = sim.loser_fall_progress * 150 if winner == 'L' else 0.0
     right_jump = jump_offset if winner == 'A' else 0.0
 
     # Draw players
@@ -522,17 +278,11 @@ def draw_live_scene(tug_val, left_stam, right_stam, left_p_cnt, right_p_cnt,
                 falling=left_fall, jumping=left_jump, facing="right")
     draw_player(320, 0, color=(0.1, 0.3, 1.0), lean=right_lean, 
                 falling=right_fall, jumping=right_jump, facing="left")
-
-    # Central platform
-    glPushMatrix()
-    glTranslatef(0, -(fall_offset if winner else 0.0), 0)
-    glColor3f(0.2, 0.2, 0.25)
-    glScalef(80, 80, 12)
-    glutSolidCube(1)
-    glPopMatrix()
+    profiler.lap("players")
 
     # Rope
     draw_rope(0, 0, tug_val)
+    profiler.lap("rope")
 
     # Referee animation
     if game_paused:  # round ended
@@ -544,6 +294,7 @@ def draw_live_scene(tug_val, left_stam, right_stam, left_p_cnt, right_p_cnt,
             draw_referee(0, -80, winner="tie", wave_progress=anim_progress * 5.0)
     else:  
         draw_referee(0, -80, winner=None)
+    profiler.lap("referee")
 
     # Scoreboard
     winner_highlight = None
@@ -555,21 +306,8 @@ def draw_live_scene(tug_val, left_stam, right_stam, left_p_cnt, right_p_cnt,
         winner_highlight = 'tie'
         
     draw_scoreboard(100, -80, tug_val, left_stam, right_stam, 
-                    left_p_cnt, right_p_cnt, round_time_left, winner_highlight)
-
-    # Decorative lights
-    for xp in (-260, 260):
-        glPushMatrix()
-        light_fall = fall_offset if (winner == 'L' and xp < 0) or (winner == 'A' and xp > 0) else 0.0
-        glTranslatef(xp, 60 - light_fall, 20)
-        glRotatef(-90, 1, 0, 0)
-        glPushMatrix()
-        glScalef(3, 3, 100)
-        glutSolidCube(1)
-        glPopMatrix()
-        glTranslatef(0, 0, 55)
-        glutSolidSphere(8, 10, 10)
-        glPopMatrix()
+                    left_p_cnt, right_p_cnt, sim.round_time_left, winner_highlight)
+    profiler.lap("scoreboard")
 
     # Shadows
     if fake_shadow:
@@ -597,16 +335,13 @@ def draw_live_scene(tug_val, left_stam, right_stam, left_p_cnt, right_p_cnt,
         glVertex3f(-15, 10, -80.9)
         glEnd()
         glEnable(GL_LIGHTING)
+    profiler.lap("shadows")
 
 # -------------------
 # Input / keyboard
 # -------------------
 def keyboardListener(key, x, y):
-    global fovY, tug_var, winner, game_paused, left_stamina, right_stamina
-    global left_presses, right_presses, round_time_left, round_running, replay_mode
-    global bot_enabled, animation_start, platform_fall_progress, replay_buffer
-    global loser_fall_progress, winner_jump_progress
-    global left_lean_amount, right_lean_amount, left_lean_time, right_lean_time
+    global fovY, replay_mode, replay_player, replay_speed, win_time, show_debug, exporter
 
     # FOV controls
     if key == b'w':
@@ -616,77 +351,74 @@ def keyboardListener(key, x, y):
 
     # Reset game
     if key == b'r' or key == b'R':
-        tug_var = 0
-        winner = None
-        game_paused = False
-        round_time_left = ROUND_DURATION
-        round_running = True
-        left_stamina = LEFT_MAX_STAM
-        right_stamina = RIGHT_MAX_STAM
-        left_presses = 0
-        right_presses = 0
-        animation_start = None
-        platform_fall_progress = 0.0
-        loser_fall_progress = 0.0
-        winner_jump_progress = 0.0
-        # Reset lean variables
-        left_lean_amount = 0.0
-        right_lean_amount = 0.0
-        left_lean_time = 0.0
-        right_lean_time = 0.0
-        # Reset referee
-        reset_referee()
+        sim.reset()
+        pending_keys.clear()
         replay_buffer.clear()
         replay_mode = False
+        win_time = None
         return
 
     if key == b'b' or key == b'B':
-        bot_enabled = not bot_enabled
+        sim.set_bot(not sim.bot_enabled)
+        return
+
+    if key == b'g' or key == b'G':
+        show_debug = not show_debug
+        return
+
+    if key == b'u' or key == b'U':
+        scheduler.set_unlocked(not scheduler.unlocked)  # benchmark: render as fast as possible
+        return
+
+    if key == b't' or key == b'T':
+        profiler.show = not profiler.show
+        return
+
+    if key == b'k' or key == b'K':
+        if profiler.logging:
+            print("Frame timings saved to", profiler.log_path)
+            profiler.stop_log()
+        else:
+            print("Recording frame timings to", profiler.start_log())
+        return
+
+    if key == b'v' or key == b'V':
+        if exporter is None:
+            exporter = open_exporter(fps=TARGET_FPS)
+            print("Exporting frames to", exporter.path)
+        else:
+            stats = exporter.close()
+            print(f"Exported {stats['frames']} frames to {exporter.path}")
+            exporter = None
         return
 
     if key == b'p' or key == b'P':
-        if game_paused and len(replay_buffer) > 0:
+        if sim.game_paused and len(replay_buffer) > 0:
+            replay_player = ReplayPlayer(replay_buffer, replay_speed)
             replay_mode = True
             return
 
-    if replay_mode or game_paused:
+    # Replay controls: speed, scrubbing and a jump to the winning moment
+    if replay_mode:
+        if key == b'[':
+            replay_speed = max(0.25, replay_speed / 2)
+        elif key == b']':
+            replay_speed = min(4.0, replay_speed * 2)
+        elif key == b',':
+            replay_player.skip(-1.0)
+        elif key == b'.':
+            replay_player.skip(1.0)
+        elif key in (b'j', b'J') and win_time is not None:
+            replay_player.seek(win_time - 1.0)
+        replay_player.speed = replay_speed
+        return
+
+    if sim.game_paused:
         return
 
-    # Left player input with FORWARD lean when pulling
-    if (key == b'a' or key == b'A'):
-        if left_stamina >= STAM_COST_PER_PRESS:
-            tug_var += 1
-            left_stamina -= STAM_COST_PER_PRESS
-            left_presses += 1
-            # Lean FORWARD when pulling (positive angle)
-            left_lean_amount = LEAN_MAX_ANGLE
-            left_lean_time = time.time()
-
-    # Right player input with FORWARD lean when pulling
-    if (key == b'l' or key == b'L'):
-        if right_stamina >= STAM_COST_PER_PRESS:
-            tug_var -= 1
-            right_stamina -= STAM_COST_PER_PRESS
-            right_presses += 1
-            # Lean FORWARD when pulling (positive angle)
-            right_lean_amount = LEAN_MAX_ANGLE
-            right_lean_time = time.time()
-
-    # Clamp tug_var
-    if tug_var > TUG_LIMIT * 3:
-        tug_var = TUG_LIMIT * 3
-    if tug_var < -TUG_LIMIT * 3:
-        tug_var = -TUG_LIMIT * 3
-
-    # Check win condition
-    if tug_var > TUG_LIMIT:
-        winner = 'A'
-        game_paused = True
-        animation_start = time.time()
-    if tug_var < -TUG_LIMIT:
-        winner = 'L'
-        game_paused = True
-        animation_start = time.time()
+    # Player pulls are applied (with stamina, lean and win checks) on the next step
+    if key in (b'a', b'A', b'l', b'L'):
+        pending_keys.append(key.decode().lower())
 
 def specialKeyListener(key, x, y):
     global camera_pos
@@ -720,151 +452,126 @@ def setupCamera():
 # -------------------
 # Idle / update
 # -------------------
-def idle():
-    global _last_time_ms, left_stamina, right_stamina, round_time_left, round_running
-    global bot_enabled, last_bot_action, tug_var, right_presses, winner, game_paused
-    global replay_buffer, replay_mode, animation_start, platform_fall_progress
-    global loser_fall_progress, winner_jump_progress
-    global left_lean_amount, right_lean_amount, left_lean_time, right_lean_time
-
-    # Compute delta time
-    cur_ms = glutGet(GLUT_ELAPSED_TIME)
-    if _last_time_ms is None:
-        _last_time_ms = cur_ms
-    dt = (cur_ms - _last_time_ms) / 1000.0
-    _last_time_ms = cur_ms
-
-    if dt <= 0:
-        glutPostRedisplay()
-        return
-
-    # Recover stamina
-    if not game_paused:
-        left_stamina = min(LEFT_MAX_STAM, left_stamina + STAM_RECOVER_RATE * dt)
-        right_stamina = min(RIGHT_MAX_STAM, right_stamina + STAM_RECOVER_RATE * dt)
+def save_round_replay():
+    """Write the finished round as a few-bytes-per-press input replay."""
+    try:
+        os.makedirs(REPLAY_DIR, exist_ok=True)
+        name = time.strftime("round-%Y%m%d-%H%M%S") + f"-{sim.seed:08x}.tugi"
+        InputReplay.from_sim(sim).save(os.path.join(REPLAY_DIR, name))
+    except Exception as e:
+        print("Error saving replay:", e)
 
-    # Lean recovery logic - both players lean forward when pulling, then return to upright
-    current_time = time.time()
-    
-    # Left player lean recovery
-    if left_lean_amount > 0 and current_time - left_lean_time > LEAN_DURATION:
-        left_lean_amount = max(0, left_lean_amount - LEAN_RECOVERY_RATE * dt)
-    
-    # Right player lean recovery  
-    if right_lean_amount > 0 and current_time - right_lean_time > LEAN_DURATION:
-        right_lean_amount = max(0, right_lean_amount - LEAN_RECOVERY_RATE * dt)
-
-    # Round timer
-    if round_enabled and round_running and not game_paused and not replay_mode:
-        round_time_left -= dt
-        if round_time_left <= 0:
-            round_running = False
-            if tug_var > 0:
-                winner = 'A'
-            elif tug_var < 0:
-                winner = 'L'
-            else:
-                winner = None
-            game_paused = True
-            animation_start = time.time()
-
-    # Bot logic with lean feedback
-    if bot_enabled and not game_paused and not replay_mode:
-        now = time.time()
-        time_since = now - last_bot_action
-        base_interval = 0.18 + (1.0 - bot_difficulty) * 0.8
-        adapt = 1.0 - max(0.0, min(1.0, tug_var / float(TUG_LIMIT)))
-        interval = base_interval * (0.7 + 0.6 * (1.0 - adapt))
-        interval *= (0.75 + 0.5 * random.random())
-        if time_since >= interval:
-            if right_stamina >= STAM_COST_PER_PRESS:
-                tug_var -= 1
-                right_stamina -= STAM_COST_PER_PRESS
-                right_presses += 1
-                # Bot also leans forward when pulling
-                right_lean_amount = LEAN_MAX_ANGLE
-                right_lean_time = time.time()
-            last_bot_action = now
-
-    # Win animation logic (UPDATED to include referee)
-    if animation_start is not None:
-        anim_elapsed = time.time() - animation_start
-        platform_fall_progress = min(1.0, anim_elapsed / ANIM_DURATION)
-        
-        if winner is not None:
-            winner_jump_progress = anim_elapsed
-            
-            # Start referee animation when game ends
-            if referee_animation_start is None:
-                if winner == 'A':
-                    start_referee_animation('left_win')
-                elif winner == 'L':
-                    start_referee_animation('right_win')
-                else:
-                    start_referee_animation('tie')
-        else:
-            # Tie game - start tie animation
-            if referee_animation_start is None:
-                start_referee_animation('tie')
-                
-        loser_fall_progress = min(1.0, anim_elapsed / ANIMATION_DURATION)
-        
-        # Update referee animation
-        update_referee_animation(dt)
-        
-        if anim_elapsed >= ANIM_DURATION:
-            if winner is not None:
-                try:
-                    entry = {
-                        "time": time.time(),
-                        "winner": winner,
-                        "tug_at_end": tug_var,
-                        "left_presses": left_presses,
-                        "right_presses": right_presses,
-                        "round_duration": ROUND_DURATION - max(0.0, round_time_left)
-                    }
-                    with open(HIGHSCORE_FILE, "a+") as f:
-                        f.write(json.dumps(entry) + "\n")
-                except Exception as e:
-                    print("Error saving score:", e)
-            animation_start = None
-            loser_fall_progress = 0.0
-            winner_jump_progress = 0.0
+def idle():
+    global replay_mode, win_time, _scores_written, leaderboard_line
+
+    # Advance the rules by the fixed steps that are due (inputs are ignored while paused)
+    steps = game_clock.update()
+    for kind, payload in sim.run(steps, pending_keys):
+        if kind == 'score':
+            score_writer.submit(payload)
+        elif kind == 'round_over':
+            win_time = sim.t
+        elif kind == 'round_done':
+            save_round_replay()
+    pending_keys.clear()
+
+    # Scores are written in the background; pick them up once they land
+    for err in score_writer.errors():
+        print("Error saving score:", err)
+    if score_writer.generation != _scores_written:
+        _scores_written = score_writer.generation
+        high_scores.refresh(force=True)
+        leaderboard.refresh()  # import + queries run on the worker thread
+    else:
+        high_scores.refresh()  # stats the file at most once per poll_interval
+    for err in leaderboard.errors():
+        print("Leaderboard:", err)
+    leaderboard_line = leaderboard.result or ""
 
     # Replay buffer
     if not replay_mode:
-        replay_buffer.append({
-            "t": time.time(),
-            "tug": tug_var,
-            "left_p": left_presses,
-            "right_p": right_presses,
-            "left_stam": left_stamina,
-            "right_stam": right_stamina,
-            "left_lean": left_lean_amount,
-            "right_lean": right_lean_amount
-        })
-        if len(replay_buffer) > max_replay_frames:
-            replay_buffer.pop(0)
+        replay_buffer.append(sim.t, sim.tug, sim.left_presses, sim.right_presses,
+                             sim.left_stamina, sim.right_stamina,
+                             sim.left_lean, sim.right_lean)
 
     if replay_mode:
-        replay_index_local = globals().get('replay_index', 0)
-        replay_index_local += int(replay_speed * (dt * REPLAY_FPS))
-        if replay_index_local >= len(replay_buffer):
-            replay_index_local = 0
-            globals()['replay_mode'] = False
-        globals()['replay_index'] = replay_index_local
+        if not replay_player.advance(game_clock.elapsed):
+            replay_mode = False
 
-    glutPostRedisplay()
+# Frame pacing: showScreen at TARGET_FPS, idle() at TICK_RATE
+TARGET_FPS = 60
+TICK_RATE = 120
+scheduler = FrameScheduler(profiler.timed('idle', idle), TARGET_FPS, TICK_RATE)
 
 # -------------------
 # Rendering / display
 # -------------------
+# HUD regions (x, y, w, h) in window coordinates; the regions must not overlap
+HUD_STATUS_RECT = (0, 635, 1000, 165)
+HUD_REPLAY_RECT = (0, 610, 690, 25)
+HUD_SCORES_RECT = (690, 450, 310, 170)
+HUD_BANNER_RECT = (0, 350, 1000, 100)
+
+
+def draw_hud_status(tug_var, left_presses, left_stamina, right_presses, right_stamina, bot, time_left, referee):
+    cfg = sim.config
+    draw_text(10, 770, f"TUG Value: {tug_var}")
+    draw_text(10, 745, f"Left (A): presses={left_presses} stamina={left_stamina}/{int(cfg.left_max_stam)}")
+    draw_text(10, 720, f"Right (L): presses={right_presses} stamina={right_stamina}/{int(cfg.right_max_stam)} {'(BOT)' if bot else ''}")
+    draw_text(10, 690, f"Press 'A' to increase (+1), 'L' decrease (-1). Press 'B' to toggle bot. 'R' to reset.")
+    draw_text(10, 665, f"Round time left: {time_left}s. Round duration {int(cfg.round_duration)}s.")
+
+    # NEW: Referee status display
+    if referee:
+        draw_text(10, 640, f"Referee: {referee.replace('_', ' ').title()}")
+    else:
+        draw_text(10, 640, "Referee: Ready")
+
+
+def draw_hud_replay(active, speed):
+    if active:
+        draw_text(10, 615, f"REPLAY x{speed:g}  '[' ']' speed  ',' '.' scrub  'J' winning moment")
+
+
+def draw_hud_banner(show, winner):
+    # Win/tie messages
+    if show:
+        if winner:
+            draw_text(350, 420, f"WINNER: {'LEFT (A)' if winner=='A' else 'RIGHT (L)'}", GLUT_BITMAP_HELVETICA_18)
+            draw_text(360, 390, "Animation playing... Press 'P' to view replay after animation.")
+        else:
+            draw_text(420, 420, "ROUND TIED")
+        draw_text(380, 360, "Press 'R' to play again.")
+
+
+def draw_hud_scores():
+    # Recent scores display (in memory, no file access here)
+    y0 = 600
+    draw_text(780, y0, "Recent Wins:")
+    y0 -= 20
+    for s in reversed(high_scores.recent):
+        tlabel = time.strftime("%H:%M:%S", time.localtime(s.get("time", time.time())))
+        tug_val = s.get("tug_at_end", 0)
+        lp = s.get("left_presses", 0)
+        rp = s.get("right_presses", 0)
+        win = s.get("winner", "?")
+        draw_text(695, y0, f"{tlabel} W:{win} tug:{tug_val} Lp:{lp} Rp:{rp}")
+        y0 -= 20
+    for line in leaderboard_line.splitlines():
+        draw_text(695, y0, line)
+        y0 -= 20
+
+
 def showScreen():
-    global rand_var, tug_var, winner, game_paused, left_stamina, right_stamina
-    global left_presses, right_presses, round_time_left, round_running, bot_enabled
-    global replay_mode, replay_index, replay_buffer, platform_fall_progress, animation_start
-    global show_scores_list, loser_fall_progress, winner_jump_progress
-    global left_lean_amount, right_lean_amount
+    profiler.begin_frame()
+    # Read-only view of the simulation for this frame
+    tug_var, winner, game_paused = sim.tug, sim.winner, sim.game_paused
+    left_stamina, right_stamina = sim.left_stamina, sim.right_stamina
+    left_presses, right_presses = sim.left_presses, sim.right_presses
+    # Smooth motion between simulation steps
+    alpha = game_clock.alpha()
+    left_lean_amount, right_lean_amount = sim.lerp('left_lean', alpha), sim.lerp('right_lean', alpha)
+    quadrics.begin_frame()
 
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
     glLoadIdentity()
@@ -885,48 +592,27 @@ def showScreen():
     glLightfv(GL_LIGHT0, GL_POSITION, position)
     glMaterialfv(GL_FRONT_AND_BACK, GL_SPECULAR, specular)
     glMateriali(GL_FRONT_AND_BACK, GL_SHININESS, 20)
-
-    # Draw floor
-    glBegin(GL_QUADS)
-    glColor3f(0.12, 0.12, 0.12)
-    glVertex3f(-GRID_LENGTH, -GRID_LENGTH, -1)
-    glVertex3f(GRID_LENGTH, -GRID_LENGTH, -1)
-    glVertex3f(GRID_LENGTH, GRID_LENGTH, -1)
-    glVertex3f(-GRID_LENGTH, GRID_LENGTH, -1)
-    glEnd()
+    profiler.lap("camera")
 
     # If in replay mode, draw scene from recorded snapshot
     if replay_mode:
-        idx = min(len(replay_buffer)-1, replay_index) if replay_buffer else 0
-        snapshot = replay_buffer[idx] if replay_buffer else None
+        snapshot = replay_player.frame() if replay_buffer else None
         if snapshot:
-            draw_live_scene(snapshot["tug"], snapshot["left_stam"], snapshot["right_stam"], 
-                           snapshot["left_p"], snapshot["right_p"], fake_shadow=True, 
-                           anim_progress=0.0, left_lean=snapshot.get("left_lean", 0), 
-                           right_lean=snapshot.get("right_lean", 0))
+            draw_live_scene(snapshot.tug, snapshot.left_stam, snapshot.right_stam, 
+                           snapshot.left_p, snapshot.right_p, fake_shadow=True, 
+                           anim_progress=0.0, left_lean=snapshot.left_lean, 
+                           right_lean=snapshot.right_lean)
         else:
             draw_live_scene(tug_var, left_stamina, right_stamina, left_presses, right_presses, 
                            fake_shadow=True, anim_progress=0.0, left_lean=left_lean_amount, 
                            right_lean=right_lean_amount)
     else:
         draw_live_scene(tug_var, left_stamina, right_stamina, left_presses, right_presses, 
-                       fake_shadow=True, anim_progress=platform_fall_progress, 
+                       fake_shadow=True, anim_progress=sim.lerp('platform_fall_progress', alpha), 
                        left_lean=left_lean_amount, right_lean=right_lean_amount)
 
     # HUD overlay (2D) - UPDATED with scoreboard info
     glDisable(GL_LIGHTING)
-    draw_text(10, 770, f"TUG Value: {tug_var}")
-    draw_text(10, 745, f"Left (A): presses={left_presses} stamina={int(left_stamina)}/{int(LEFT_MAX_STAM)}")
-    draw_text(10, 720, f"Right (L): presses={right_presses} stamina={int(right_stamina)}/{int(RIGHT_MAX_STAM)} {'(BOT)' if bot_enabled else ''}")
-    draw_text(10, 690, f"Press 'A' to increase (+1), 'L' decrease (-1). Press 'B' to toggle bot. 'R' to reset.")
-    draw_text(10, 665, f"Round time left: {int(round_time_left)}s. Round duration {int(ROUND_DURATION)}s.")
-    
-    # NEW: Referee status display
-    if referee_animation_type:
-        draw_text(10, 640, f"Referee: {referee_animation_type.replace('_', ' ').title()}")
-    else:
-        draw_text(10, 640, "Referee: Ready")
-
     # Progress bar for tug
     if winner is None and not replay_mode:
         bar_center_x = 500
@@ -951,46 +637,41 @@ def showScreen():
         glVertex2f(filled_x, bar_y + 10)
         glVertex2f(200, bar_y + 10)
         glEnd()
-
-    # Win/tie messages
-    if game_paused and not replay_mode:
-        if winner:
-            draw_text(350, 420, f"WINNER: {'LEFT (A)' if winner=='A' else 'RIGHT (L)'}", GLUT_BITMAP_HELVETICA_18)
-            draw_text(360, 390, "Animation playing... Press 'P' to view replay after animation.")
-        else:
-            draw_text(420, 420, "ROUND TIED")
-        draw_text(380, 360, "Press 'R' to play again.")
-
-    # Recent scores display
-    try:
-        if os.path.exists(HIGHSCORE_FILE):
-            with open(HIGHSCORE_FILE, "r") as f:
-                lines = f.readlines()[-5:]
-                show_scores_list = [json.loads(l) for l in lines if l.strip()]
-    except Exception:
-        show_scores_list = []
-
-    y0 = 600
-    draw_text(780, y0, "Recent Wins:")
-    y0 -= 20
-    for s in reversed(show_scores_list):
-        tlabel = time.strftime("%H:%M:%S", time.localtime(s.get("time", time.time())))
-        tug_val = s.get("tug_at_end", 0)
-        lp = s.get("left_presses", 0)
-        rp = s.get("right_presses", 0)
-        win = s.get("winner", "?")
-        draw_text(760, y0, f"{tlabel} W:{win} tug:{tug_val} Lp:{lp} Rp:{rp}")
-        y0 -= 20
-
-
+    profiler.lap("bar")
+
+    # Text regions are redrawn into the HUD texture only when their key changes
+    status = (tug_var, left_presses, int(left_stamina), right_presses, int(right_stamina),
+              sim.bot_enabled, int(sim.round_time_left), sim.referee_animation_type)
+    hud_layer.region("status", HUD_STATUS_RECT, status, draw_hud_status, *status)
+    replay = (replay_mode, replay_speed)
+    hud_layer.region("replay", HUD_REPLAY_RECT, replay, draw_hud_replay, *replay)
+    banner = (game_paused and not replay_mode, winner)
+    hud_layer.region("banner", HUD_BANNER_RECT, banner, draw_hud_banner, *banner)
+    hud_layer.region("scores", HUD_SCORES_RECT, (high_scores.version, leaderboard_line), draw_hud_scores)
+    hud_layer.draw()
+    profiler.lap("hud")
+    # Export the game frame before the debug text, profiler graph and swap
+    if exporter is not None:
+        exporter.capture(game_clock.now())
+        profiler.lap("export")
+    if show_debug:
+        draw_text(10, 595, f"{quadrics.debug_line()}  arena uploads:{arena.uploads}  hud redraws:{hud_layer.redraws}")
+        draw_text(10, 575, scheduler.debug_line())
+        if exporter is not None:
+            draw_text(10, 555, exporter.status_line())
+    profiler.draw_overlay(budget_ms=1000.0 / TARGET_FPS)
+    profiler.lap("overlay")
 
     glEnable(GL_LIGHTING)
     glutSwapBuffers()
+    profiler.lap("swap")
+    profiler.end_frame()
 
 # -------------------
 # Main
 # -------------------
 def main():
+    global leaderboard
     glutInit()
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
     glutInitWindowSize(1000, 800)
@@ -1003,8 +684,13 @@ def main():
     glutKeyboardFunc(keyboardListener)
     glutSpecialFunc(specialKeyListener)
     glutMouseFunc(mouseListener)
-    glutIdleFunc(idle)
+    scheduler.start()  # paced by glutTimerFunc instead of a busy glutIdleFunc
+    leaderboard = LeaderboardWorker(leaderboard_summary, HIGHSCORE_FILE)
+    leaderboard.refresh()
     glutMainLoop()
     
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if "--headless" in sys.argv:
+        tug_headless.main(sys.argv[1:], game=sys.modules[__name__])
+    else:
+        main()
\ No newline at end of file
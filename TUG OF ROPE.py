@@ -1,61 +1,37 @@
+import sys
+if "--headless" in sys.argv:
+    import tug_headless  # picks an offscreen GL platform before OpenGL loads
 from OpenGL.GL import *
 from OpenGL.GLUT import *
 from OpenGL.GLU import *
-import math
-import random
+from tug_sim import TugSimulation, TugConfig, FIXED_DT
+from tug_replay import ReplayRing, ReplayPlayer
+from tug_render import Crowd
+from tug_clock import FrameScheduler, GameClock
+from tug_hud import hud
 
 camera_pos = (0, 500, 300)
 fovY = 120
 GRID_LENGTH = 600
-tug_var = 0           # A += 1, L -= 1
-TUG_LIMIT = 10 
-winner = None
-game_paused = False 
-round_enabled = True
-ROUND_DURATION = 5.0
-round_time_left = ROUND_DURATION
-round_running = True
-left_max_stam = 100.0
-right_max_stam = 100.0
-left_stamina = left_max_stam
-right_stamina = right_max_stam
-stamina_cost = 12.0 
-recovery_rate = 18.0
-
-left_presses = 0
-right_presses = 0
-
-bot_enabled = False
-bot_difficulty = 0.6 
-last_bot_action = 0.0
-
+# Spectators per side = CROWD_ROWS * CROWD_COLS, drawn as one instanced batch
+CROWD_ROWS, CROWD_COLS = 3, 10
+crowd = Crowd(CROWD_ROWS, CROWD_COLS)
+# Rules live in tug_sim.TugSimulation; the GLUT callbacks feed it and draw it
+sim = TugSimulation(TugConfig())
+TUG_LIMIT = sim.config.tug_limit
+pending_keys = []
+
+REPLAY_SECONDS = 6.0
+max_replay_frames = int(REPLAY_SECONDS / FIXED_DT)  # idle() appends once per 120 Hz tick
+replay_buffer = ReplayRing(max_replay_frames)
 replay_mode = False
-replay_index = 0
+replay_player = None  # ReplayPlayer cursor while replay_mode is on
 replay_speed = 1.0
 
-animation_start = None
-ANIM_DURATION = 3.0  
-platform_fall_progress = 0.0
 timer = 0
-time_ratio = 400
-rand_var = 423
-tug_val = tug_var
+game_clock = GameClock()  # fixed simulation steps from one monotonic clock
 def draw_text(x, y, text, font=GLUT_BITMAP_HELVETICA_18):
-    glColor3f(1, 1, 1)
-    glMatrixMode(GL_PROJECTION)
-    glPushMatrix()
-    glLoadIdentity()
-    gluOrtho2D(0, 1000, 0, 800)
-    glMatrixMode(GL_MODELVIEW)
-    glPushMatrix()
-    glLoadIdentity()
-    glRasterPos2f(x, y)
-    for ch in text:
-        glutBitmapCharacter(font, ord(ch))
-    glPopMatrix()
-    glMatrixMode(GL_PROJECTION)
-    glPopMatrix()
-    glMatrixMode(GL_MODELVIEW)
+    hud.text(x, y, text, font)
 
 def draw_platform(x, z, width=220, depth=60, height=10, floor=0):
     glPushMatrix()
@@ -81,51 +57,12 @@ def draw_player(x, z, color=(1, 0, 0), lean=0.0, falling=0.0):
     glPopMatrix()
     glPopMatrix()
 def cheering(tug_val):
-    rows, cols = 3, 10
-    left_center_x, right_center_x = -320.0, 320.0 
-    up_y = -100
-    base_z = 120 
-    row_height_step = 22
-    base_side_x = 24
-    spacing_in = 8
-    body = (10, 10, 16)
-    head = 12
+    """Spectators on both sides; the side that is winning jumps."""
     up_down = 5
-    colors = [
-        (0.9, 0.2, 0.65),
-        (0.1, 0.6, 1),
-        (0.1, 0.9, 0.5),
-        (1, 0.85, 0.1),
-        (0.7, 0.5, 0.95),
-    ]
-    def draw_person(color):
-        glColor3f(*color)
-        # body
-        glPushMatrix()
-        glScalef(body[0], body[1], body[2])
-        glutSolidCube(1)
-        glPopMatrix()
-        glPushMatrix()
-        glTranslatef(0.0, 0.0, 12)
-        gluSphere(gluNewQuadric(), head, 10, 10)
-        glPopMatrix()
     left_jump = 20 if tug_val< -1 else 0
     right_jump = 20 if tug_val > 1 else 0
-    for side in (-1, +1):
-        center_x = left_center_x if side < 0 else right_center_x
-        jump = left_jump if side < 0 else right_jump
-        for r in range(rows):
-            side_x = base_side_x +r *spacing_in
-            z_row = base_z+ r*row_height_step
-            start_x =center_x- ((cols-1)*side_x)/2
-            for c in range(cols):
-                phase = 0.28 * r + 0.20 * c
-                dz = jump *math.sin(up_down *timer/ 423 + phase)
-                x, y, z = start_x+c*side_x, up_y, (z_row + dz)
-                glPushMatrix()
-                glTranslatef(x, y, z)
-                draw_person(colors[(r*cols + c)%5])
-                glPopMatrix()
+    crowd.draw(up_down * timer / 423, left_jump, right_jump)
+
 def draw_rope(z, tug_value):
     rope_line = 12
     rope_half = 260
@@ -147,9 +84,7 @@ def draw_rope(z, tug_value):
     glPopMatrix()
 
 def keyboardListener(key, x, y):
-    global fovY, tug_var, winner, game_paused, left_stamina, right_stamina
-    global left_presses, right_presses, round_time_left, round_running, replay_mode
-    global bot_enabled, animation_start, platform_fall_progress, replay_buffer
+    global fovY, replay_mode, replay_player
 
     if key == b'w':
         fovY += 1
@@ -157,67 +92,32 @@ def keyboardListener(key, x, y):
         fovY -= 1
 
     if key == b'r':
-        tug_var = 0
-        winner = None
-        game_paused = False
-        round_time_left = ROUND_DURATION
-        round_running = True
-        left_stamina = left_max_stam
-        right_stamina = right_max_stam
-        left_presses = 0
-        right_presses = 0
-        animation_start = None
-        bot_enabled = False
-        platform_fall_progress = 0.0
+        sim.reset()
+        sim.set_bot(False)
+        pending_keys.clear()
+        replay_buffer.clear()
         replay_mode = False
         return
 
     if key == b'b':
-        bot_enabled = not bot_enabled
+        sim.set_bot(not sim.bot_enabled)
         return
 
+    # Playback replay upon ending a round
     if key == b'p':
-        if game_paused and len(replay_buffer) > 0:
+        if sim.game_paused and len(replay_buffer) > 0:
+            replay_player = ReplayPlayer(replay_buffer, replay_speed)
             replay_mode = True
             return
     if replay_mode:
         return
     
-    if game_paused:
+    if sim.game_paused:
         return
 
-    if key == b'a':
-        if left_stamina >= stamina_cost:
-            tug_var += 1
-            left_stamina -= stamina_cost
-            left_presses += 1
-        else:
-            '''thinking of adding penalty of 1, for more clicks. I think 
-            a future vaersion, I'll implement a game hardness option then add this'''
-            pass
-
-    if key == b'l':
-        if right_stamina >= stamina_cost:
-            tug_var -= 1
-            right_stamina -= stamina_cost
-            right_presses += 1
-        else:
-            pass
-    if tug_var > TUG_LIMIT * 3:
-        tug_var = TUG_LIMIT * 3
-    if tug_var < -TUG_LIMIT * 3:
-        tug_var = -TUG_LIMIT * 3
-
-
-    if tug_var > TUG_LIMIT:
-        winner = 'A'
-        game_paused = True
-        animation_start = timer
-
-    if tug_var < -TUG_LIMIT:
-        winner = 'L'
-        game_paused = True
-        animation_start = timer
+    # stamina cost, clamping and the win check are applied by sim.step()
+    if key == b'a' or key == b'l':
+        pending_keys.append(key.decode())
 
 def specialKeyListener(key, x, y):
     global camera_pos
@@ -254,62 +154,33 @@ def setupCamera():
               0, 0, 1)
 
 def idle():
-    global timer, left_stamina, right_stamina, round_time_left, round_running
-    global bot_enabled, last_bot_action, tug_var, right_presses, winner, game_paused
-    global replay_buffer, replay_mode, animation_start, platform_fall_progress, tug_var, timer, rand_var
-    rand_var += 2.5
-    if rand_var%time_ratio== 0:
-        timer +=1
-        # print(timer)
-    # print(tug_var)
-    dt = (rand_var - timer) / 1000
-    timer = rand_var
-
-    if dt <= 0:
-        glutPostRedisplay()
-        return
+    global timer, replay_mode
+    steps = game_clock.update()
+    timer = game_clock.now() * 1000.0  # ms of game time, drives the crowd
+
+    # Stamina, round timer and bot are all advanced by the sim
+    sim.run(steps, pending_keys)
+    pending_keys.clear()
+
+    # Record the last REPLAY_SECONDS while playing, step the cursor while replaying
+    if not replay_mode:
+        replay_buffer.append(sim.t, sim.tug, sim.left_presses, sim.right_presses,
+                             sim.left_stamina, sim.right_stamina,
+                             sim.left_lean, sim.right_lean)
+    elif not replay_player.advance(game_clock.elapsed):
+        replay_mode = False
 
-    if not game_paused:
-        left_stamina = min(left_max_stam, left_stamina + recovery_rate * dt)
-        right_stamina = min(right_max_stam, right_stamina + recovery_rate * dt)
-
-    if round_enabled and round_running and not game_paused and not replay_mode:
-        round_time_left -= dt
-        if round_time_left <= 0:
-            round_running = False
-            if tug_var > 0:
-                winner = 'A'
-            elif tug_var < 0:
-                winner = 'L'
-            else:
-                winner = None 
-            game_paused = True
-            animation_start = timer
-
-    if bot_enabled and not game_paused and not replay_mode:
-        x = timer
-        time_since = x-last_bot_action
-        base_interval = 0.18 + (1 -bot_difficulty)*0.8 
-        adapt =1 + max(0, min(1.0, tug_var / float(TUG_LIMIT)))
-        interval = base_interval * (0.7 + 0.6 * (1.0 - adapt))
-        interval *= (0.75 + 0.5 * random.random())
-        if time_since >= interval:
-            if right_stamina >= stamina_cost:
-                tug_var -= 1
-                right_stamina -= stamina_cost
-                right_presses += 1
-            if tug_var < -TUG_LIMIT:
-                 winner = 'L'
-                 game_paused = True
-            last_bot_action = x
-
-    glutPostRedisplay()
+# Frame pacing: showScreen at TARGET_FPS, idle() at TICK_RATE
+TARGET_FPS = 60
+TICK_RATE = 120
+scheduler = FrameScheduler(idle, TARGET_FPS, TICK_RATE)
 
 def showScreen():
-    global rand_var, tug_var, winner, game_paused, left_stamina, right_stamina
-    global left_presses, right_presses, round_time_left, round_running, bot_enabled
-    global replay_mode, replay_index, replay_buffer, platform_fall_progress, animation_start
-    global show_scores_list
+    # Read-only view of the simulation for this frame
+    cfg = sim.config
+    tug_var, winner, game_paused = sim.tug, sim.winner, sim.game_paused
+    left_stamina, right_stamina = sim.left_stamina, sim.right_stamina
+    left_presses, right_presses = sim.left_presses, sim.right_presses
 
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
     glLoadIdentity()
@@ -324,7 +195,8 @@ def showScreen():
     glVertex3f(GRID_LENGTH, GRID_LENGTH, -1)
     glVertex3f(-GRID_LENGTH, GRID_LENGTH, -1)
     glEnd()
-    display(tug_var, 0)
+    # In replay mode the scene is drawn from the recorded snapshot
+    display(replay_player.frame().tug if replay_mode else tug_var, 0)
     glMatrixMode(GL_PROJECTION)
     glPushMatrix()
     glLoadIdentity()
@@ -361,10 +233,10 @@ def showScreen():
     glPopMatrix()
     glMatrixMode(GL_MODELVIEW)
     draw_text(10, 770, f"TUG Value: {tug_var}")
-    draw_text(10, 745, f"Left (A): presses={left_presses} stamina={int(left_stamina)}/{int(left_max_stam)}")
-    draw_text(10, 720, f"Right (L): presses={right_presses} stamina={int(right_stamina)}/{int(right_max_stam)} {'(BOT)' if bot_enabled else ''}")
+    draw_text(10, 745, f"Left (A): presses={left_presses} stamina={int(left_stamina)}/{int(cfg.left_max_stam)}")
+    draw_text(10, 720, f"Right (L): presses={right_presses} stamina={int(right_stamina)}/{int(cfg.right_max_stam)} {'(BOT)' if sim.bot_enabled else ''}")
     draw_text(10, 690, "Press 'A' to increase (+1), 'L' decrease (-1). Press 'B' to toggle bot. 'R' to reset.")
-    draw_text(10, 665, f"Round time left: {int(round_time_left)}s. Round duration {int(ROUND_DURATION)}s.")
+    draw_text(10, 665, f"Round time left: {int(sim.round_time_left)}s. Round duration {int(cfg.round_duration)}s.")
 
     if game_paused and not replay_mode:
         if winner:
@@ -377,7 +249,7 @@ def showScreen():
     glutSwapBuffers()
 
 def display(tug_val, seen):
-    global tug_var
+    winner = sim.winner
     glColor3f(0.7, 0.5, 0.2)
     draw_platform(-300, 0, floor=(seen * 20) if winner=='L' else 0.0)
     draw_platform(300, 0, floor=(seen * 20) if winner=='A' else 0.0)
@@ -388,8 +260,8 @@ def display(tug_val, seen):
         glColor3f(0.4, 0.3, 0.25)
         glutSolidCube(1)
         glPopMatrix()
-    left_lean = min(25, tug_var * 2)
-    right_lean = min(25, -tug_var * 2)
+    left_lean = min(25, tug_val * 2)
+    right_lean = min(25, -tug_val * 2)
     left_fall = (seen * 20) if winner == 'L' else 0.0
     right_fall = (seen * 20) if winner == 'A' else 0.0
 
@@ -422,9 +294,12 @@ def main():
     glutKeyboardFunc(keyboardListener)
     glutSpecialFunc(specialKeyListener)
     glutMouseFunc(mouseListener)
-    glutIdleFunc(idle)
+    scheduler.start()  # paced by glutTimerFunc instead of a busy glutIdleFunc
 
     glutMainLoop()
 
 if __name__ == "__main__":
-    main()
+    if "--headless" in sys.argv:
+        tug_headless.main(sys.argv[1:], game=sys.modules[__name__])
+    else:
+        main()
@@ -1,76 +1,43 @@
+import sys
+if "--headless" in sys.argv:
+    import tug_headless  # picks an offscreen GL platform before OpenGL loads
 from OpenGL.GL import *
 from OpenGL.GLUT import *
 from OpenGL.GLU import *
 import math
-import time
-import random
+from tug_sim import TugSimulation, TugConfig, FIXED_DT
+from tug_replay import ReplayRing, ReplayPlayer
+from tug_clock import FrameScheduler, GameClock
+from tug_hud import hud
 
 camera_pos = (0, 500, 500)
 fovY = 120
 GRID_LENGTH = 600
-tug_var = 0           # A += 1, L -= 1
-TUG_LIMIT = 10 
-winner = None
-game_paused = False 
-round_enabled = True
-ROUND_DURATION = 5.0
-round_time_left = ROUND_DURATION
-round_running = True
-
-# Stamina
-left_max_stam = 100.0
-right_max_stam = 100.0
-left_stamina = left_max_stam
-right_stamina = right_max_stam
-stamina_cost = 12.0 
-recovery_rate = 18.0
-
-left_presses = 0
-right_presses = 0
-
-bot_enabled = False
-bot_difficulty = 0.6 
-last_bot_action = 0.0
+# Rules and timing live in tug_sim.TugSimulation; this script only draws it
+sim = TugSimulation(TugConfig())
+TUG_LIMIT = sim.config.tug_limit
+pending_keys = []
 
 
 REPLAY_SECONDS = 6.0
-REPLAY_FPS = 60.0
-max_replay_frames = int(REPLAY_SECONDS * REPLAY_FPS)
-replay_buffer = []
+max_replay_frames = int(REPLAY_SECONDS / FIXED_DT)  # idle() appends once per 120 Hz tick
+replay_buffer = ReplayRing(max_replay_frames)
 replay_mode = False
-replay_index = 0
+replay_player = None  # ReplayPlayer cursor while replay_mode is on
 replay_speed = 1.0
 
-animation_start = None
-ANIM_DURATION = 3.0  
-platform_fall_progress = 0.0
-
 HIGHSCORE_FILE = "tug_highscores.jsonl"
 max_saved_scores = 50
 
-# Time tracking for dt updates
-last_time = None
+# Game time: fixed simulation steps from one monotonic clock
+game_clock = GameClock()
 
 # HUD / UI
 show_scores_list = []  # loaded scores to display
 rand_var = 423
 
 def draw_text(x, y, text, font=GLUT_BITMAP_HELVETICA_18):
-    glColor3f(1, 1, 1)
-    glMatrixMode(GL_PROJECTION)
-    glPushMatrix()
-    glLoadIdentity()
-    gluOrtho2D(0, 1000, 0, 800)
-    glMatrixMode(GL_MODELVIEW)
-    glPushMatrix()
-    glLoadIdentity()
-    glRasterPos2f(x, y)
-    for ch in text:
-        glutBitmapCharacter(font, ord(ch))
-    glPopMatrix()
-    glMatrixMode(GL_PROJECTION)
-    glPopMatrix()
-    glMatrixMode(GL_MODELVIEW)
+    hud.text(x, y, text, font)
 
 def draw_platform(x, z, width=220, depth=60, height=10, falling_offset=0.0):
     glPushMatrix()
@@ -120,9 +87,7 @@ def draw_rope(center_x, z, tug_value):
     glPopMatrix()
 
 def keyboardListener(key, x, y):
-    global fovY, tug_var, winner, game_paused, left_stamina, right_stamina
-    global left_presses, right_presses, round_time_left, round_running, replay_mode
-    global bot_enabled, animation_start, platform_fall_progress, replay_buffer
+    global fovY, replay_mode, replay_player
 
     if key == b'w':
         fovY += 1
@@ -131,71 +96,32 @@ def keyboardListener(key, x, y):
 
     # reset
     if key == b'r':
-        tug_var = 0
-        winner = None
-        game_paused = False
-        round_time_left = ROUND_DURATION
-        round_running = True
-        left_stamina = left_max_stam
-        right_stamina = right_max_stam
-        left_presses = 0
-        right_presses = 0
-        animation_start = None
-        bot_enabled = not bot_enabled
-        platform_fall_progress = 0.0
+        sim.reset()
+        sim.set_bot(not sim.bot_enabled)
+        pending_keys.clear()
         replay_buffer.clear()
         replay_mode = False
         return
 
     if key == b'b' or key == b'B':
-        bot_enabled = not bot_enabled
+        sim.set_bot(not sim.bot_enabled)
         return
 
     # Playback replay upon ending a round
     if key == b'p':
-        if game_paused and len(replay_buffer) > 0:
+        if sim.game_paused and len(replay_buffer) > 0:
+            replay_player = ReplayPlayer(replay_buffer, replay_speed)
             replay_mode = True
             return
     if replay_mode:
         return
     
-    if game_paused:
+    if sim.game_paused:
         return
 
-    if key == b'a':
-        if left_stamina >= stamina_cost:
-            tug_var += 1
-            left_stamina -= stamina_cost
-            left_presses += 1
-        else:
-            '''thinking of adding penalty of 1, for more clicks. I think 
-            a future vaersion, I'll implement a game hardness option then add this'''
-            pass
-
-    if key == b'l':
-        if right_stamina >= stamina_cost:
-            tug_var -= 1
-            right_stamina -= stamina_cost
-            right_presses += 1
-        else:
-            pass
-
-
-    if tug_var > TUG_LIMIT * 3:
-        tug_var = TUG_LIMIT * 3
-    if tug_var < -TUG_LIMIT * 3:
-        tug_var = -TUG_LIMIT * 3
-
-
-    if tug_var > TUG_LIMIT:
-        winner = 'A'
-        game_paused = True
-        animation_start = time.time()
-
-    if tug_var < -TUG_LIMIT:
-        winner = 'L'
-        game_paused = True
-        animation_start = time.time()
+    # stamina cost, clamping and the win check happen inside sim.step()
+    if key == b'a' or key == b'l':
+        pending_keys.append(key.decode())
 
 def specialKeyListener(key, x, y):
     global camera_pos
@@ -226,64 +152,12 @@ def setupCamera():
               0, 0, 1)
 
 def idle():
-    global last_time, left_stamina, right_stamina, round_time_left, round_running
-    global bot_enabled, last_bot_action, tug_var, right_presses, winner, game_paused
-    global replay_buffer, replay_mode, animation_start, platform_fall_progress
-
+    global replay_mode
 
-    cur_ms = glutGet(GLUT_ELAPSED_TIME)
-    if last_time is None:
-        last_time = cur_ms
-    dt = (cur_ms - last_time) / 1000.0
-    last_time = cur_ms
+    # Stamina, round timer, bot and win animation are all advanced by the sim
+    sim.run(game_clock.update(), pending_keys)
+    pending_keys.clear()
 
-    if dt <= 0:
-        glutPostRedisplay()
-        return
-
-    if not game_paused:
-        left_stamina = min(left_max_stam, left_stamina + recovery_rate * dt)
-        right_stamina = min(right_max_stam, right_stamina + recovery_rate * dt)
-
-    if round_enabled and round_running and not game_paused and not replay_mode:
-        round_time_left -= dt
-        if round_time_left <= 0:
-            round_running = False
-            if tug_var > 0:
-                winner = 'A'
-            elif tug_var < 0:
-                winner = 'L'
-            else:
-                winner = None  # tie
-            game_paused = True
-            animation_start = time.time()
-
-    if bot_enabled and not game_paused and not replay_mode:
-        now = time.time()
-        time_since = now - last_bot_action
-        # target interval depends on difficulty and current situation
-        base_interval = 0.18 + (1.0 - bot_difficulty) * 0.8  # lower is more frequent
-        # If behind (tug_var > 0), increase aggression
-        adapt = 1.0 - max(0.0, min(1.0, tug_var / float(TUG_LIMIT)))
-        interval = base_interval * (0.7 + 0.6 * (1.0 - adapt))
-        # Random jitter
-        interval *= (0.75 + 0.5 * random.random())
-        if time_since >= interval:
-            # attempt a press if have stamina
-            if right_stamina >= stamina_cost:
-                tug_var -= 1
-                right_stamina -= stamina_cost
-                right_presses += 1
-            if tug_var < -TUG_LIMIT:
-                 winner = 'L'
-                 game_paused = True
-            last_bot_action = now
-            
-
-    # If round ended and animation pending, update animation progress
-    if animation_start is not None:
-        anim_elapsed = time.time() - animation_start
-        platform_fall_progress = min(1.0, anim_elapsed / ANIM_DURATION)
         # After animation finishes: record highscore and freeze game fully (but allow replay)
     #     if anim_elapsed >= ANIM_DURATION:
     #         # finalize highscore saving once
@@ -309,38 +183,28 @@ def idle():
     #         # ensure we don't run this saving repeatedly
     #         animation_start = None
     #         # leave game_paused True so user can press R to restart
-    # # Maintain replay buffer while playing (store only when not replaying)
-    # if not replay_mode:
-    #     # store snapshot
-    #     replay_buffer.append({
-    #         "tug": tug_var,
-    #         "left_p": left_presses,
-    #         "right_p": right_presses,
-    #         "left_stam": left_stamina,
-    #         "right_stam": right_stamina
-    #     })
-    #     # trim buffer
-    #     if len(replay_buffer) > max_replay_frames:
-    #         replay_buffer.pop(0)
-
-    # if replay_mode:
-    #     # step index forward; when reaches end, stop replay
-    #     replay_index_local = globals().get('replay_index', 0)
-    #     replay_index_local += int(replay_speed * (dt * REPLAY_FPS))
-    #     if replay_index_local >= len(replay_buffer):
-    #         # end replay
-    #         replay_index_local = 0
-    #         globals()['replay_mode'] = False
-    #         # After replay, keep the game paused (user can reset)
-    #     globals()['replay_index'] = replay_index_local
-
-    glutPostRedisplay()
+    # Maintain replay buffer while playing (store only when not replaying)
+    if not replay_mode:
+        replay_buffer.append(sim.t, sim.tug, sim.left_presses, sim.right_presses,
+                             sim.left_stamina, sim.right_stamina,
+                             sim.left_lean, sim.right_lean)
+
+    if replay_mode:
+        # After replay, keep the game paused (user can reset)
+        if not replay_player.advance(game_clock.elapsed):
+            replay_mode = False
+
+# Frame pacing: showScreen at TARGET_FPS, idle() at TICK_RATE
+TARGET_FPS = 60
+TICK_RATE = 120
+scheduler = FrameScheduler(idle, TARGET_FPS, TICK_RATE)
 
 def showScreen():
-    global rand_var, tug_var, winner, game_paused, left_stamina, right_stamina
-    global left_presses, right_presses, round_time_left, round_running, bot_enabled
-    global replay_mode, replay_index, replay_buffer, platform_fall_progress, animation_start
-    global show_scores_list
+    # Read-only view of the simulation for this frame
+    cfg = sim.config
+    tug_var, winner, game_paused = sim.tug, sim.winner, sim.game_paused
+    left_stamina, right_stamina = sim.left_stamina, sim.right_stamina
+    left_presses, right_presses = sim.left_presses, sim.right_presses
 
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
     glLoadIdentity()
@@ -374,24 +238,22 @@ def showScreen():
 
     # If in replay mode, draw scene from recorded snapshot instead of live variables
     if replay_mode:
-
-        idx = min(len(replay_buffer)-1, replay_index) if replay_buffer else 0
-        snapshot = replay_buffer[idx] if replay_buffer else None
+        snapshot = replay_player.frame() if replay_buffer else None
         if snapshot:
-            draw_live_scene(snapshot["tug"], snapshot["left_stam"], snapshot["right_stam"], snapshot["left_p"], snapshot["right_p"], fake_shadow=True, anim_progress=0.0)
+            draw_live_scene(snapshot.tug, snapshot.left_stam, snapshot.right_stam, snapshot.left_p, snapshot.right_p, fake_shadow=True, anim_progress=0.0)
         else:
             draw_live_scene(tug_var, left_stamina, right_stamina, left_presses, right_presses, fake_shadow=True, anim_progress=0.0)
     else:
-        draw_live_scene(tug_var, left_stamina, right_stamina, left_presses, right_presses, fake_shadow=True, anim_progress=platform_fall_progress)
+        draw_live_scene(tug_var, left_stamina, right_stamina, left_presses, right_presses, fake_shadow=True, anim_progress=sim.lerp('platform_fall_progress', game_clock.alpha()))
 
     # HUD overlay (2D)
     glDisable(GL_LIGHTING)
     # fold in basic instructions and values
     draw_text(10, 770, f"TUG Value: {tug_var}")
-    draw_text(10, 745, f"Left (A): presses={left_presses} stamina={int(left_stamina)}/{int(left_max_stam)}")
-    draw_text(10, 720, f"Right (L): presses={right_presses} stamina={int(right_stamina)}/{int(right_max_stam)} {'(BOT)' if bot_enabled else ''}")
+    draw_text(10, 745, f"Left (A): presses={left_presses} stamina={int(left_stamina)}/{int(cfg.left_max_stam)}")
+    draw_text(10, 720, f"Right (L): presses={right_presses} stamina={int(right_stamina)}/{int(cfg.right_max_stam)} {'(BOT)' if sim.bot_enabled else ''}")
     draw_text(10, 690, f"Press 'A' to increase (+1), 'L' decrease (-1). Press 'B' to toggle bot. 'R' to reset.")
-    draw_text(10, 665, f"Round time left: {int(round_time_left)}s. Round duration {int(ROUND_DURATION)}s.")
+    draw_text(10, 665, f"Round time left: {int(sim.round_time_left)}s. Round duration {int(cfg.round_duration)}s.")
 
     # show simple progress bar for tug (bottom)
     if winner is None and not replay_mode:
@@ -441,6 +303,7 @@ def showScreen():
 
 def draw_live_scene(tug_val, left_stam, right_stam, left_p_cnt, right_p_cnt, fake_shadow=True, anim_progress=0.0):
     """Compose the 3D scene using provided parameters (live or snapshot)."""
+    winner = sim.winner
     # Visual falling platforms when anim in progress: anim_progress 0..1
     fall_offset = anim_progress * 220.0  # how much platforms sink during animation
 
@@ -498,9 +361,12 @@ def main():
     glutKeyboardFunc(keyboardListener)
     glutSpecialFunc(specialKeyListener)
     glutMouseFunc(mouseListener)
-    glutIdleFunc(idle)
+    scheduler.start()  # paced by glutTimerFunc instead of a busy glutIdleFunc
 
     glutMainLoop()
 
 if __name__ == "__main__":
-    main()
+    if "--headless" in sys.argv:
+        tug_headless.main(sys.argv[1:], game=sys.modules[__name__])
+    else:
+        main()
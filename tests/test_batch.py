@@ -0,0 +1,28 @@
+import random
+
+from tug_batch import BATCH_DT, WIN_A, simulate_batch
+from tug_sim import FIXED_DT, TugConfig, TugSimulation
+
+
+def _scalar_win_rate(rounds, left_press_rate=6.0, seed=5):
+    rng = random.Random(seed)
+    sim = TugSimulation(TugConfig(), seed=seed)
+    sim.set_bot(True)
+    wins = 0
+    for _ in range(rounds):
+        sim.reset()
+        while not sim.game_paused:
+            sim.step(FIXED_DT, ['a'] if rng.random() < left_press_rate * FIXED_DT else ())
+        wins += sim.winner == 'A'
+    return wins / rounds
+
+
+def test_batch_steps_at_the_game_tick():
+    assert BATCH_DT == FIXED_DT
+
+
+def test_batch_matches_scalar_simulation():
+    result = simulate_batch(20000, TugConfig(), seed=1)
+    batch_rate = (result.winner == WIN_A).mean()
+    assert abs(batch_rate - _scalar_win_rate(1500)) < 0.02
+    assert result.duration.max() <= TugConfig().round_duration
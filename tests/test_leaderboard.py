@@ -0,0 +1,67 @@
+import json
+
+from tug_leaderboard import Leaderboard, LeaderboardWorker
+
+
+def _line(i, winner="A"):
+    return json.dumps({"time": 1000.0 + i, "winner": winner, "tug_at_end": 11 if winner == "A" else -11,
+                       "left_presses": i, "right_presses": 3, "round_duration": 5.0}) + "\n"
+
+
+def test_import_skips_corrupt_line_once(tmp_path):
+    path = str(tmp_path / "scores.jsonl")
+    with open(path, "w") as f:
+        f.write(_line(1) + '{"time": 10' + "\n" + _line(2, "L") + _line(3))
+
+    with Leaderboard(":memory:") as board:
+        assert board.import_jsonl(path) == 3
+        assert board.skipped == 1
+        (_, offset, _), = board.skipped_lines
+        assert offset == len(_line(1))
+
+        # The bad line is behind the stored offset: not read or reported again
+        assert board.import_jsonl(path) == 0
+        assert board.skipped == 0
+
+        with open(path, "a") as f:
+            f.write(_line(4, "L"))
+        assert board.import_jsonl(path) == 1
+        assert board.count() == 4
+        assert board.win_rates()["win_rate_L"] == 0.5
+
+
+def test_import_waits_for_unterminated_line(tmp_path):
+    path = str(tmp_path / "scores.jsonl")
+    with open(path, "w") as f:
+        f.write(_line(1) + _line(2)[:20])
+
+    with Leaderboard(":memory:") as board:
+        assert board.import_jsonl(path) == 1
+        with open(path, "a") as f:
+            f.write(_line(2)[20:])
+        assert board.import_jsonl(path) == 1
+        assert board.skipped == 0
+
+
+def test_worker_survives_failing_summary(tmp_path):
+    path = str(tmp_path / "scores.jsonl")
+    with open(path, "w") as f:
+        f.write(_line(1))
+    calls = []
+
+    def summarize(board):
+        calls.append(board.count())
+        if len(calls) == 1:
+            raise KeyError("no such column")
+        return f"{board.count()} rounds"
+
+    worker = LeaderboardWorker(summarize, path, str(tmp_path / "board.db"))
+    worker.refresh()
+    assert worker.wait(5.0)
+    assert worker.result is None
+    assert "KeyError" in worker.errors()[0]
+
+    worker.refresh()
+    assert worker.wait(5.0)
+    assert worker.result == "1 rounds"
+    assert worker.errors() == []
@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from tug_replay import InputReplay, ReplayFile, ReplayPlayer, ReplayRing, write_replay_file
+from tug_sim import TugConfig, TugSimulation
+
+
+def _round(seed=11):
+    """A finished bot round with random left presses and a mid-round bot toggle."""
+    rng = random.Random(seed)
+    sim = TugSimulation(TugConfig(), seed=seed)
+    sim.set_bot(True)
+    sim.reset()
+    for tick in range(700):
+        if tick == 200:
+            sim.set_bot(False)
+        if tick == 260:
+            sim.set_bot(True)
+        sim.run(1, ['a'] if rng.random() < 0.05 else ())
+    return sim
+
+
+def test_input_replay_rebuilds_the_round():
+    sim = _round()
+    replay = InputReplay.from_sim(sim)
+    end = replay.final_state()
+    assert (end.t, end.tug, end.winner, end.left_presses, end.right_presses) == \
+        (sim.t, sim.tug, sim.winner, sim.left_presses, sim.right_presses)
+    assert end.input_log == sim.input_log
+
+
+def test_input_replay_bytes_round_trip(tmp_path):
+    replay = InputReplay.from_sim(_round())
+    path = str(tmp_path / "round.tugi")
+    replay.save(path)
+    loaded = InputReplay.load(path)
+    assert (loaded.seed, loaded.config, loaded.events, loaded.end_tick, loaded.bot_enabled, loaded.dt) == \
+        (replay.seed, replay.config, replay.events, replay.end_tick, replay.bot_enabled, replay.dt)
+    assert list(loaded.replay_frames()) == list(replay.replay_frames())
+
+
+def test_drive_plays_the_round_through_run():
+    sim = _round()
+    replay = InputReplay.from_sim(sim)
+    live = TugSimulation(TugConfig(), seed=0)
+    replay.drive(live)
+    live.run(replay.end_tick, ['l', 'l'])     # live inputs are ignored
+    assert (live.tug, live.winner, live.left_presses, live.right_presses) == \
+        (sim.tug, sim.winner, sim.left_presses, sim.right_presses)
+
+
+def _assert_frame(got, want):
+    assert (got.tug, got.left_p, got.right_p) == (want.tug, want.left_p, want.right_p)
+    assert got.t == pytest.approx(want.t, abs=1e-4)
+    for field in ("left_stam", "right_stam", "left_lean", "right_lean"):
+        assert getattr(got, field) == pytest.approx(getattr(want, field), rel=1e-6, abs=1e-4)
+
+
+def test_replay_file_round_trip(tmp_path):
+    frames = list(InputReplay.from_sim(_round()).replay_frames())
+    # A counter going backwards cannot be a delta and forces a keyframe
+    frames.append(frames[-1]._replace(t=frames[-1].t + 0.01, left_p=0, right_p=0))
+    path = str(tmp_path / "round.tugk")
+    write_replay_file(path, frames, keyframe_interval=30)
+
+    with ReplayFile(path) as replay:
+        assert len(replay) == len(frames)
+        for got, want in zip(replay, frames):
+            _assert_frame(got, want)
+        for i in (0, 29, 30, 31, len(frames) // 2, -1):
+            _assert_frame(replay[i], frames[i])
+
+        t = frames[100].t + 0.5 * (frames[101].t - frames[100].t)
+        a, b, alpha = replay.locate(t)
+        _assert_frame(a, frames[100])
+        _assert_frame(b, frames[101])
+        assert alpha == pytest.approx(0.5, abs=1e-3)
+
+        player = ReplayPlayer(replay)
+        player.seek(frames[300].t)
+        _assert_frame(player.frame(), frames[300])
+        assert not player.advance(frames[-1].t)
+
+
+def test_ring_keeps_the_newest_frames():
+    ring = ReplayRing(4)
+    for i in range(6):
+        ring.append(i * 0.5, i, i, 0, 100.0, 100.0, 0.0, 0.0)
+    assert len(ring) == 4
+    assert [f.tug for f in ring] == [2, 3, 4, 5]
+    assert ring[0].t == 1.0 and ring[-1].t == 2.5
@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+
+from conftest import ROOT
+import tug_scores
+from tug_scores import HIGHSCORE_FILE, HighScoreStore, ScoreColumns, compact, decode_line
+
+SHIPPED = os.path.join(ROOT, HIGHSCORE_FILE)
+
+
+def _entry(i, winner="A"):
+    return {"time": 1000.0 + i, "winner": winner, "tug_at_end": 11, "left_presses": i,
+            "right_presses": 3, "round_duration": 5.0}
+
+
+def test_decode_line_splits_literal_separator():
+    line = json.dumps(_entry(1)) + "\\n" + json.dumps(_entry(2)) + "\\n"
+    assert [e["left_presses"] for e in decode_line(line)] == [1, 2]
+    assert decode_line(b"  \n") == []
+    with pytest.raises(ValueError):
+        decode_line(json.dumps(_entry(1)) + "\\n{broken")
+
+
+def test_store_loads_shipped_file(tmp_path):
+    # The shipped history is one line of objects joined by a literal "\\n"
+    with open(SHIPPED, "rb") as f:
+        expected = [e for line in f for e in decode_line(line)]
+    assert len(expected) == 7
+
+    no_columns = str(tmp_path / "none.col")
+    assert list(HighScoreStore(SHIPPED, keep=5, columns=no_columns).recent) == expected[-5:]
+    assert list(HighScoreStore(SHIPPED, keep=50, columns=no_columns).recent) == expected
+
+
+def test_store_follows_appends_after_old_format(tmp_path):
+    path = str(tmp_path / HIGHSCORE_FILE)
+    with open(path, "w") as f:
+        f.write(json.dumps(_entry(1)) + "\\n" + json.dumps(_entry(2)) + "\n")
+    store = HighScoreStore(path, keep=5)
+    assert [e["left_presses"] for e in store.recent] == [1, 2]
+
+    with open(path, "a") as f:
+        f.write(json.dumps(_entry(3, "L")) + "\n" + "{torn\n")
+    assert store.refresh(force=True)
+    assert [e["left_presses"] for e in store.recent] == [1, 2, 3]
+
+
+def test_compact_resumes_without_duplicates(tmp_path, monkeypatch):
+    path = str(tmp_path / HIGHSCORE_FILE)
+    columns = str(tmp_path / "scores.col")
+    with open(path, "w") as f:
+        f.writelines(json.dumps(_entry(i)) + "\n" for i in range(3))
+    assert compact(path, columns) == (3, 0)
+
+    with open(path, "w") as f:
+        f.write(json.dumps(_entry(3)) + "\n{broken\n" + json.dumps(_entry(4, "L")) + "\n")
+    pending = path + ".compacting"
+    real_remove = os.remove
+
+    def crash(p):
+        if p == pending:
+            raise OSError("simulated crash")
+        real_remove(p)
+
+    monkeypatch.setattr(tug_scores.os, "remove", crash)
+    with pytest.raises(OSError):
+        compact(path, columns)
+    monkeypatch.undo()
+    assert os.path.exists(pending) and os.path.exists(pending + ".rows")
+
+    # the game started a fresh file before the rerun
+    with open(path, "w") as f:
+        f.write(json.dumps(_entry(5)) + "\n")
+    assert compact(path, columns) == (2, 1)
+    assert compact(path, columns) == (1, 0)
+    assert not os.path.exists(pending) and not os.path.exists(pending + ".rows")
+
+    with ScoreColumns(columns) as cols:
+        assert [e["left_presses"] for e in cols] == [0, 1, 2, 3, 4, 5]
+    with open(path + ".rejected", "rb") as f:
+        assert f.read() == b"{broken\n"
@@ -0,0 +1,54 @@
+import random
+
+from tug_sim import FIXED_DT, INTERPOLATED, TugConfig, TugSimulation, run_round
+
+
+def _play(seed, press_seed=3, steps=900):
+    """A bot round with the left side pressing at random; returns the sim and its events."""
+    rng = random.Random(press_seed)
+    sim = TugSimulation(TugConfig(), seed=seed)
+    sim.set_bot(True)
+    sim.reset()
+    events = []
+    for _ in range(steps):
+        events += sim.run(1, ['a'] if rng.random() < 0.05 else ())
+    return sim, events
+
+
+def _state(sim):
+    return (sim.seed, sim.tick, sim.t, sim.tug, sim.winner, sim.left_presses, sim.right_presses,
+            list(sim.input_log)) + tuple(getattr(sim, name) for name in INTERPOLATED)
+
+
+def test_same_seed_and_inputs_give_the_same_round():
+    a, events_a = _play(seed=42)
+    b, events_b = _play(seed=42)
+    assert _state(a) == _state(b)
+    assert [kind for kind, _ in events_a] == [kind for kind, _ in events_b]
+    assert a.game_paused and a.winner in ('A', 'L', None)
+
+
+def test_seed_changes_the_bot():
+    a, _ = _play(seed=1)
+    b, _ = _play(seed=2)
+    assert [e for e in a.input_log if e[1] == 'bot'] != [e for e in b.input_log if e[1] == 'bot']
+
+
+def test_run_matches_single_steps():
+    a = TugSimulation(TugConfig(), seed=7)
+    b = TugSimulation(TugConfig(), seed=7)
+    for sim in (a, b):
+        sim.set_bot(True)
+        sim.reset(seed=99)
+    a.run(240, ['a'])
+    b.step(FIXED_DT, ['a'])
+    for _ in range(239):
+        b.step(FIXED_DT)
+    assert _state(a) == _state(b)
+
+
+def test_run_round_reports_the_winner():
+    sim = TugSimulation(TugConfig(), seed=5)
+    entry = run_round(sim, policy=lambda s: ['a'])
+    assert entry is not None
+    assert entry["winner"] == 'A' and entry["tug_at_end"] > sim.config.tug_limit
@@ -0,0 +1,348 @@
+"""Streaming analytics over the high-score log.
+
+Reads tug_highscores.jsonl plus its rotated / compressed siblings
+(tug_highscores.jsonl.1, .gz, .1.gz, ...) line by line: plain files are
+memory-mapped, compressed ones are decompressed as a stream, and entries
+are parsed lazily. Everything is folded into ScoreStats, whose size does
+not depend on the number of rounds (per-day counters plus fixed-bin
+histograms), so arbitrarily large logs fit in memory. Large plain files can
+be split across processes with --jobs. A compacted column file
+(tug_highscores.col, see tug_scores.compact) is read zero-copy and folded
+in with NumPy when it is installed.
+
+    python tug_analytics.py tug_highscores.jsonl --jobs 4
+"""
+import argparse
+import bz2
+import glob
+import gzip
+import json
+import lzma
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from tug_scores import HIGHSCORE_FILE, ScoreColumns, column_path, decode_line, score_row
+from tug_sim import TugConfig
+
+# rows folded per NumPy step when reading a column file
+COLUMN_CHUNK = 1 << 20
+
+# press-rate histogram: presses per second in RATE_BIN wide bins, the last
+# bin collects everything at or above RATE_MAX
+RATE_BIN = 0.25
+RATE_MAX = 30.0
+
+_OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+# -------------------
+# Sources
+# -------------------
+def find_sources(path):
+    """path and its rotated / compressed siblings, oldest first."""
+    found = set(glob.glob(glob.escape(path) + ".*"))
+    if os.path.exists(path):
+        found.add(path)
+    return sorted(found, key=lambda p: (os.path.getmtime(p), p))
+
+
+def iter_lines(path, start=0, end=None):
+    """Raw lines of a score file; start/end are byte offsets (plain files only)."""
+    opener = _OPENERS.get(os.path.splitext(path)[1])
+    if opener is not None:
+        with opener(path, "rb") as f:
+            yield from f
+        return
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = len(mm) if end is None else end
+            mm.seek(start)
+            readline = mm.readline
+            while mm.tell() < end:
+                yield readline()
+
+
+def iter_entries(lines):
+    """Decode JSON lines lazily, skipping blank ones.
+
+    A line may hold several entries (see tug_scores.decode_line); a line
+    that does not decode yields None, which ScoreStats counts as skipped.
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield from decode_line(line)
+        except ValueError:
+            yield None
+
+
+def split_ranges(path, parts):
+    """Byte ranges of a plain file cut at line boundaries."""
+    size = os.path.getsize(path)
+    if parts <= 1 or size == 0:
+        return [(0, size)]
+    cuts = [0]
+    with open(path, "rb") as f:
+        for i in range(1, parts):
+            f.seek(size * i // parts)
+            f.readline()
+            cuts.append(min(f.tell(), size))
+    cuts.append(size)
+    return [(a, b) for a, b in zip(cuts, cuts[1:]) if b > a]
+
+
+# -------------------
+# Aggregation
+# -------------------
+class ScoreStats:
+    """Constant-size running totals for win ratios, press rates and KOs."""
+
+    def __init__(self, tug_limit=TugConfig.tug_limit, tz_offset=0.0):
+        self.tug_limit = tug_limit
+        self.tz_offset = tz_offset
+        self.rounds = 0
+        self.wins = {"A": 0, "L": 0, None: 0}
+        self.knockouts = 0
+        self.timeouts = 0
+        self.days = {}               # day number -> [A wins, L wins, ties]
+        nbins = int(RATE_MAX / RATE_BIN) + 1
+        self.left_rate = [0] * nbins
+        self.right_rate = [0] * nbins
+        self.rate_sum = [0.0, 0.0]
+        self.rated = 0               # rounds with a positive duration
+        self.skipped = 0             # unreadable lines and invalid entries
+
+    def add(self, entry):
+        self.consume((entry,))
+
+    def consume(self, entries):
+        """Fold an iterable of entries in; the loop is inlined for speed.
+
+        Entries that are not valid score entries (tug_scores.score_row)
+        are counted in skipped instead.
+        """
+        wins, days = self.wins, self.days
+        left_rate, right_rate = self.left_rate, self.right_rate
+        last = len(left_rate) - 1
+        limit, tz_offset = self.tug_limit, self.tz_offset
+        rounds = knockouts = rated = skipped = 0
+        lsum = rsum = 0.0
+        for entry in entries:
+            try:
+                t, winner, tug, left_presses, right_presses, duration = score_row(entry)
+            except ValueError:
+                skipped += 1
+                continue
+            rounds += 1
+            wins[winner] += 1
+            if abs(tug) > limit:
+                knockouts += 1
+
+            day = int((t + tz_offset) // 86400)
+            counts = days.get(day)
+            if counts is None:
+                counts = days[day] = [0, 0, 0]
+            counts[0 if winner == "A" else 1 if winner == "L" else 2] += 1
+
+            if duration > 0:
+                lr = left_presses / duration
+                rr = right_presses / duration
+                left_rate[min(last, int(lr / RATE_BIN))] += 1
+                right_rate[min(last, int(rr / RATE_BIN))] += 1
+                lsum += lr
+                rsum += rr
+                rated += 1
+        self.rounds += rounds
+        self.knockouts += knockouts
+        self.timeouts += rounds - knockouts
+        self.rate_sum[0] += lsum
+        self.rate_sum[1] += rsum
+        self.rated += rated
+        self.skipped += skipped
+        return self
+
+    def consume_columns(self, cols, chunk=COLUMN_CHUNK):
+        """Fold in a ScoreColumns file, chunk rows at a time."""
+        try:
+            import numpy as np
+        except ImportError:
+            return self.consume(cols)
+        last = len(self.left_rate) - 1
+        for start in range(0, cols.rows, chunk):
+            stop = start + chunk
+            winner = cols.numpy("winner", start, stop)
+            tug = cols.numpy("tug_at_end", start, stop)
+            n = winner.size
+            a = int(np.count_nonzero(winner == 1))
+            l = int(np.count_nonzero(winner == -1))
+            self.rounds += n
+            self.wins["A"] += a
+            self.wins["L"] += l
+            self.wins[None] += n - a - l
+            ko = int(np.count_nonzero(np.abs(tug) > self.tug_limit))
+            self.knockouts += ko
+            self.timeouts += n - ko
+
+            day = ((cols.numpy("time", start, stop) + self.tz_offset) // 86400).astype(np.int64)
+            for slot, code in ((0, 1), (1, -1), (2, 0)):
+                days, counts = np.unique(day[winner == code], return_counts=True)
+                for d, c in zip(days.tolist(), counts.tolist()):
+                    self.days.setdefault(d, [0, 0, 0])[slot] += c
+
+            duration = cols.numpy("round_duration", start, stop).astype(np.float64)
+            rated = duration > 0
+            duration = duration[rated]
+            self.rated += int(duration.size)
+            for side, name, hist in ((0, "left_presses", self.left_rate),
+                                     (1, "right_presses", self.right_rate)):
+                rate = cols.numpy(name, start, stop)[rated] / duration
+                self.rate_sum[side] += float(rate.sum())
+                bins = np.minimum(last, (rate / RATE_BIN).astype(np.int64))
+                for i, c in enumerate(np.bincount(bins, minlength=last + 1).tolist()):
+                    hist[i] += c
+        return self
+
+    def merge(self, other):
+        self.rounds += other.rounds
+        for k, v in other.wins.items():
+            self.wins[k] += v
+        self.knockouts += other.knockouts
+        self.timeouts += other.timeouts
+        for day, counts in other.days.items():
+            mine = self.days.setdefault(day, [0, 0, 0])
+            for i, c in enumerate(counts):
+                mine[i] += c
+        for i, c in enumerate(other.left_rate):
+            self.left_rate[i] += c
+        for i, c in enumerate(other.right_rate):
+            self.right_rate[i] += c
+        self.rate_sum[0] += other.rate_sum[0]
+        self.rate_sum[1] += other.rate_sum[1]
+        self.rated += other.rated
+        self.skipped += other.skipped
+        return self
+
+    def report(self):
+        n = self.rounds
+        per_day = []
+        for day in sorted(self.days):
+            a, l, ties = self.days[day]
+            decided = a + l
+            per_day.append({
+                "date": time.strftime("%Y-%m-%d", time.gmtime(day * 86400)),
+                "rounds": a + l + ties,
+                "A": a,
+                "L": l,
+                "A_ratio": a / decided if decided else None,
+            })
+        return {
+            "rounds": n,
+            "skipped": self.skipped,
+            "win_rate_A": self.wins["A"] / n if n else 0.0,
+            "win_rate_L": self.wins["L"] / n if n else 0.0,
+            "knockout_ratio": self.knockouts / n if n else 0.0,
+            "timeout_ratio": self.timeouts / n if n else 0.0,
+            "left_rate": _rate_summary(self.left_rate, self.rate_sum[0], self.rated),
+            "right_rate": _rate_summary(self.right_rate, self.rate_sum[1], self.rated),
+            "per_day": per_day,
+        }
+
+
+def _hist_percentile(hist, total, q):
+    if not total:
+        return 0.0
+    target = q * total
+    seen = 0
+    for i, c in enumerate(hist):
+        seen += c
+        if seen >= target:
+            return (i + 1) * RATE_BIN
+    return len(hist) * RATE_BIN
+
+
+def _rate_summary(hist, total_rate, n):
+    return {
+        "mean": total_rate / n if n else 0.0,
+        "p50": _hist_percentile(hist, n, 0.50),
+        "p90": _hist_percentile(hist, n, 0.90),
+        "p99": _hist_percentile(hist, n, 0.99),
+        "hist": {round(i * RATE_BIN, 2): c for i, c in enumerate(hist) if c},
+    }
+
+
+def _scan(path, start, end, tug_limit, tz_offset):
+    stats = ScoreStats(tug_limit, tz_offset)
+    if path.endswith(".col"):
+        with ScoreColumns(path) as cols:
+            return stats.consume_columns(cols)
+    return stats.consume(iter_entries(iter_lines(path, start, end)))
+
+
+def analyze(paths, jobs=1, tug_limit=TugConfig.tug_limit, tz_offset=0.0):
+    """Fold every entry of paths into one ScoreStats."""
+    tasks = []
+    for path in paths:
+        if os.path.splitext(path)[1] in _OPENERS or path.endswith(".col") or jobs <= 1:
+            tasks.append((path, 0, None))
+        else:
+            tasks.extend((path, a, b) for a, b in split_ranges(path, jobs))
+    total = ScoreStats(tug_limit, tz_offset)
+    if jobs <= 1 or len(tasks) == 1:
+        for path, a, b in tasks:
+            total.merge(_scan(path, a, b, tug_limit, tz_offset))
+        return total
+    with ProcessPoolExecutor(jobs) as pool:
+        futures = [pool.submit(_scan, path, a, b, tug_limit, tz_offset) for path, a, b in tasks]
+        for fut in futures:
+            total.merge(fut.result())
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=[HIGHSCORE_FILE],
+                        help="score logs; rotated / compressed siblings and the column file are included")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes for plain files")
+    parser.add_argument("--tug-limit", type=int, default=TugConfig.tug_limit)
+    parser.add_argument("--utc", action="store_true", help="group days in UTC instead of local time")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    sources = []
+    for p in args.paths:
+        found = find_sources(p)
+        if os.path.exists(column_path(p)):
+            found.insert(0, column_path(p))
+        sources.extend(s for s in found if s not in sources)
+    if not sources:
+        parser.error("no score files found")
+    tz_offset = 0.0 if args.utc else float(time.localtime().tm_gmtoff)
+
+    start = time.perf_counter()
+    report = analyze(sources, args.jobs, args.tug_limit, tz_offset).report()
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['rounds']} rounds from {len(sources)} file(s) in {elapsed:.2f}s")
+    if report["skipped"]:
+        print(f"warning: {report['skipped']} unreadable lines or invalid entries skipped")
+    print(f"A {report['win_rate_A']:.3f}  L {report['win_rate_L']:.3f}  "
+          f"knockout {report['knockout_ratio']:.3f}  timeout {report['timeout_ratio']:.3f}")
+    for side in ("left_rate", "right_rate"):
+        r = report[side]
+        print(f"{side:>10}: mean {r['mean']:.2f}/s  p50 {r['p50']:.2f}  p90 {r['p90']:.2f}  p99 {r['p99']:.2f}")
+    print(f"{'date':>10} {'rounds':>7} {'A':>6} {'L':>6} {'A ratio':>7}")
+    for d in report["per_day"]:
+        ratio = "-" if d["A_ratio"] is None else f"{d['A_ratio']:.3f}"
+        print(f"{d['date']:>10} {d['rounds']:7d} {d['A']:6d} {d['L']:6d} {ratio:>7}")
+
+
+if __name__ == "__main__":
+    main()
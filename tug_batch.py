@@ -0,0 +1,190 @@
+"""Vectorized Monte-Carlo match simulator for balance tuning.
+
+Runs N independent rounds in lockstep as NumPy arrays using the same rules
+as tug_sim.TugSimulation: the left side is a player model pressing at a
+fixed average rate, the right side is the bot. Rounds stop at the win check
+or the round timer; the win animation is not simulated.
+
+    python tug_batch.py --rounds 1000000 --difficulty 0.4 0.6 0.8 --stam-cost 10 12 14
+"""
+import argparse
+import dataclasses
+import itertools
+import json
+import time
+
+import numpy as np
+
+from tug_sim import FIXED_DT, TugConfig
+
+# The game's own tick: at a coarser dt the press and bot timing, and with
+# them the win rates, no longer match TugSimulation
+BATCH_DT = FIXED_DT
+
+# winner codes in BatchResult.winner
+WIN_A = 1
+WIN_L = -1
+TIE = 0
+
+
+@dataclasses.dataclass
+class BatchResult:
+    """Per-round outcome arrays, all of length n."""
+    winner: np.ndarray          # int8: WIN_A, WIN_L or TIE
+    duration: np.ndarray        # seconds until the round ended
+    final_tug: np.ndarray
+    left_presses: np.ndarray
+    right_presses: np.ndarray
+
+
+def simulate_batch(n, config=None, left_press_rate=6.0, dt=BATCH_DT, seed=None):
+    """Simulate n rounds in lockstep and return a BatchResult.
+
+    left_press_rate is the left player's mean presses per second; a press
+    only lands when there is enough stamina, as in TugSimulation.press().
+    """
+    cfg = config if config is not None else TugConfig()
+    rng = np.random.default_rng(seed)
+    limit = cfg.tug_limit
+    cost = np.float32(cfg.stam_cost_per_press)
+    recover = np.float32(cfg.stam_recover_rate * dt)
+    base_interval = 0.18 + (1.0 - cfg.bot_difficulty) * 0.8
+    press_p = min(1.0, left_press_rate * dt)
+
+    winner = np.zeros(n, np.int8)
+    duration = np.full(n, cfg.round_duration, np.float32)
+    final_tug = np.zeros(n, np.int32)
+    final_left = np.zeros(n, np.int32)
+    final_right = np.zeros(n, np.int32)
+
+    # State of the rounds still running. Finished rounds are written to the
+    # result arrays and dropped, so each tick only touches live rounds.
+    live = np.arange(n)
+    tug = np.zeros(n, np.int32)
+    left_stam = np.full(n, cfg.left_max_stam, np.float32)
+    right_stam = np.full(n, cfg.right_max_stam, np.float32)
+    left_presses = np.zeros(n, np.int32)
+    right_presses = np.zeros(n, np.int32)
+    last_bot = np.zeros(n, np.float32)
+
+    # Bot interval before jitter for every reachable tug value (see
+    # TugSimulation.bot_interval); tug is an integer in +-3*limit.
+    table_offset = limit * 3
+    adapt = 1.0 - np.clip(np.arange(-table_offset, table_offset + 1) / float(limit), 0.0, 1.0)
+    interval_table = (base_interval * (0.7 + 0.6 * (1.0 - adapt))).astype(np.float32)
+
+    steps = int(np.ceil(cfg.round_duration / dt))
+    for step in range(1, steps + 1):
+        if live.size == 0:
+            break
+        t = np.float32(step * dt)
+
+        # Left player presses (inputs are applied before the tick)
+        press = (rng.random(live.size, np.float32) < press_p) & (left_stam >= cost)
+        tug += press
+        left_stam -= cost * press
+        left_presses += press
+
+        # Stamina recovery
+        np.minimum(left_stam + recover, cfg.left_max_stam, out=left_stam)
+        np.minimum(right_stam + recover, cfg.right_max_stam, out=right_stam)
+
+        # On the last tick the round timer ends the round before the bot
+        # gets to press, as in TugSimulation.step()
+        if step == steps:
+            done = np.ones(live.size, bool)
+        else:
+            # Bot: interval grows with the tug (table lookup), plus per-tick jitter
+            interval = interval_table[tug + table_offset]
+            interval *= 0.75 + 0.5 * rng.random(live.size, np.float32)
+            due = ((t - last_bot) >= interval) & (tug <= limit)
+            bot_press = due & (right_stam >= cost)
+            tug -= bot_press
+            right_stam -= cost * bot_press
+            right_presses += bot_press
+            last_bot[due] = t
+            np.clip(tug, -limit * 3, limit * 3, out=tug)
+            done = (tug > limit) | (tug < -limit)
+        if done.any():
+            ended = live[done]
+            winner[ended] = np.sign(tug[done])
+            duration[ended] = min(float(t), cfg.round_duration)
+            final_tug[ended] = tug[done]
+            final_left[ended] = left_presses[done]
+            final_right[ended] = right_presses[done]
+            keep = ~done
+            live = live[keep]
+            tug, left_stam, right_stam = tug[keep], left_stam[keep], right_stam[keep]
+            left_presses, right_presses = left_presses[keep], right_presses[keep]
+            last_bot = last_bot[keep]
+
+    return BatchResult(winner, duration, final_tug, final_left, final_right)
+
+
+def summarize(result, config=None):
+    """Win rates plus round-length and final-tug distributions."""
+    cfg = config if config is not None else TugConfig()
+    n = result.winner.size
+    lim = cfg.tug_limit * 3
+    tug_hist = np.bincount(result.final_tug + lim, minlength=2 * lim + 1)
+    return {
+        "rounds": n,
+        "win_rate_A": float(np.count_nonzero(result.winner == WIN_A)) / n,
+        "win_rate_L": float(np.count_nonzero(result.winner == WIN_L)) / n,
+        "tie_rate": float(np.count_nonzero(result.winner == TIE)) / n,
+        "knockout_rate": float(np.count_nonzero(np.abs(result.final_tug) > cfg.tug_limit)) / n,
+        "duration_mean": float(result.duration.mean()),
+        "duration_p50": float(np.percentile(result.duration, 50)),
+        "duration_p95": float(np.percentile(result.duration, 95)),
+        "final_tug_mean": float(result.final_tug.mean()),
+        "final_tug_hist": {int(v - lim): int(c) for v, c in enumerate(tug_hist) if c},
+    }
+
+
+def sweep(rounds, difficulties, stam_costs, recover_rates, left_press_rate=6.0,
+          dt=BATCH_DT, seed=None, base=None):
+    """Summaries for every (difficulty, cost, recover rate) combination."""
+    base = base if base is not None else TugConfig()
+    rows = []
+    for i, (diff, cost, rate) in enumerate(itertools.product(difficulties, stam_costs, recover_rates)):
+        cfg = dataclasses.replace(base, bot_difficulty=diff, stam_cost_per_press=cost,
+                                  stam_recover_rate=rate)
+        result = simulate_batch(rounds, cfg, left_press_rate, dt,
+                                None if seed is None else seed + i)
+        row = {"bot_difficulty": diff, "stam_cost": cost, "stam_recover": rate}
+        row.update(summarize(result, cfg))
+        rows.append(row)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=100000, help="rounds per parameter set")
+    parser.add_argument("--difficulty", type=float, nargs="+", default=[TugConfig.bot_difficulty])
+    parser.add_argument("--stam-cost", type=float, nargs="+", default=[TugConfig.stam_cost_per_press])
+    parser.add_argument("--stam-recover", type=float, nargs="+", default=[TugConfig.stam_recover_rate])
+    parser.add_argument("--left-rate", type=float, default=6.0, help="left player presses per second")
+    parser.add_argument("--dt", type=float, default=BATCH_DT)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="print the rows as JSON")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    rows = sweep(args.rounds, args.difficulty, args.stam_cost, args.stam_recover,
+                 args.left_rate, args.dt, args.seed)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{'diff':>5} {'cost':>5} {'rec':>5} {'A win':>6} {'L win':>6} {'tie':>6} {'KO':>6} {'len':>5} {'p95':>5} {'tug':>6}")
+    for r in rows:
+        print(f"{r['bot_difficulty']:5.2f} {r['stam_cost']:5.1f} {r['stam_recover']:5.1f} "
+              f"{r['win_rate_A']:6.3f} {r['win_rate_L']:6.3f} {r['tie_rate']:6.3f} {r['knockout_rate']:6.3f} "
+              f"{r['duration_mean']:5.2f} {r['duration_p95']:5.2f} {r['final_tug_mean']:6.2f}")
+    total = args.rounds * len(rows)
+    print(f"{total} rounds in {elapsed:.2f}s ({total / elapsed:,.0f} rounds/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Benchmark the game variants against each other, headless.
+
+    python tug_bench.py                         # all five scripts, saved to tug_bench/
+    python tug_bench.py Sarika.py Rafi.py --frames 600
+    python tug_bench.py --compare tug_bench/OLD.json              # fresh run vs a saved one
+    python tug_bench.py --compare tug_bench/OLD.json tug_bench/NEW.json
+
+Every script is run through tug_headless with the same seed, scripted keys
+and simulated clock, so each variant draws the same rounds. Three passes
+per script, so the instruments do not skew each other:
+
+    time    plain run: mean and tail frame time (idle() + showScreen())
+    calls   GL/GLU/GLUT entry points the script and the tug_* modules call
+            per frame (a display list or glDrawArrays counts as one call,
+            which is the point of the cached paths)
+    memory  tracemalloc: peak Python heap allocated within a frame (KiB)
+            and what the frame left allocated (bytes)
+
+The first --warmup frames (display list compiles, buffer uploads) are left
+out of the numbers. Each run is written to tug_bench/ as JSON with the git
+commit and GL renderer, so numbers from two commits on the same machine
+can be compared with --compare.
+"""
+import argparse
+import collections
+import datetime
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+from tug_headless import (  # before anything imports OpenGL: picks the offscreen platform
+    DEFAULT_FPS, DEFAULT_KEYS, DEFAULT_SIZE, HeadlessContext, release_buffers, run,
+)
+from OpenGL.GL import GL_RENDERER, glGetString
+from tug_profile import percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+VARIANTS = ("Sarika.py", "Sec22_22201791-22201794-21201055_Summer2025.py.py", "Rafi.py",
+            "TUG OF ROPE.py", "Tousif.py")
+
+RUN_DIR = "tug_bench"
+DEFAULT_FRAMES = 360
+DEFAULT_WARMUP = 30
+BENCH_SEED = 20250801
+
+# Modules whose GL calls are counted: the game script and the shared
+# helpers. tug_headless is left out, its GLUT stand-ins count as one call
+_COUNTED_MODULE = re.compile(r"tug_(?!headless$|bench$)")
+_GL_NAME = re.compile(r"glu?t?[A-Z]")
+
+# Columns of the table: (key, heading, format, change shown in %)
+COLUMNS = (
+    ("mean_ms", "mean", "{:9.2f}", True),
+    ("p95_ms", "p95", "{:9.2f}", True),
+    ("p99_ms", "p99", "{:9.2f}", True),
+    ("max_ms", "max", "{:9.2f}", True),
+    ("gl_calls", "GL calls", "{:10.1f}", True),
+    ("alloc_kib", "alloc KiB", "{:11.1f}", True),
+    ("retained_b", "kept B", "{:9.0f}", False),   # can be negative: plain difference
+)
+
+# Settings that have to match for two runs to be comparable
+_RUN_SETTINGS = ("frames", "warmup", "fps", "keys", "size", "renderer")
+
+
+class GLCallCounter:
+    """Counts calls to the GL entry points bound in the counted modules.
+
+    install() wraps each gl*/glu*/glut* function the game script and tug_*
+    modules hold, uninstall() puts the originals back; calls are tallied
+    per name in counts.
+    """
+
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.total = 0
+        self._patched = []   # (module, name, original)
+
+    def install(self):
+        wrappers = {}
+        for module in list(sys.modules.values()):
+            module_name = getattr(module, "__name__", "")
+            if module is None or not _COUNTED_MODULE.match(module_name):
+                continue
+            for name, value in list(vars(module).items()):
+                if not _GL_NAME.match(name) or not callable(value) or isinstance(value, type):
+                    continue
+                key = id(value)
+                if key not in wrappers:
+                    wrappers[key] = self._wrap(name, value)
+                setattr(module, name, wrappers[key])
+                self._patched.append((module, name, value))
+
+    def uninstall(self):
+        for module, name, original in self._patched:
+            setattr(module, name, original)
+        self._patched.clear()
+
+    def _wrap(self, name, func):
+        counts = self.counts
+
+        def counted(*args, **kwargs):
+            counts[name] += 1
+            self.total += 1
+            return func(*args, **kwargs)
+        return counted
+
+
+# -------------------
+# Passes
+# -------------------
+def _setup(extra=None):
+    def setup(game):
+        game.sim.reset(seed=BENCH_SEED)
+        if extra is not None:
+            extra(game)
+    return setup
+
+
+def _time_pass(script, frames, fps, keys, size, context, warmup):
+    stats = run(script, frames, fps, keys, size, None, context, setup=_setup())
+    ms = sorted(stats["frame_ms"][warmup:])
+    return {
+        "backend": stats["backend"],
+        "frames": len(ms),
+        "mean_ms": sum(ms) / len(ms) if ms else 0.0,
+        "p50_ms": percentile(ms, 50),
+        "p95_ms": percentile(ms, 95),
+        "p99_ms": percentile(ms, 99),
+        "max_ms": ms[-1] if ms else 0.0,
+    }
+
+
+def _calls_pass(script, frames, fps, keys, size, context, warmup):
+    counter = GLCallCounter()
+    per_frame = []
+    state = {"last": 0, "totals": collections.Counter()}
+
+    def on_frame(frame, ctx):
+        per_frame.append(counter.total - state["last"])
+        state["last"] = counter.total
+        if frame == warmup - 1:
+            state["totals"] = counter.counts.copy()
+        if frame == frames - 1:
+            # before run() puts the real GLUT back, which looks for its stand-ins
+            counter.uninstall()
+        return False
+
+    try:
+        run(script, frames, fps, keys, size, on_frame, context, setup=_setup(lambda game: counter.install()))
+    finally:
+        counter.uninstall()
+    measured = per_frame[warmup:]
+    n = max(1, len(measured))
+    top = (counter.counts - state["totals"]).most_common(8)
+    return {
+        "gl_calls": sum(measured) / n,
+        "gl_calls_max": max(measured, default=0),
+        "top_calls": {name: count / n for name, count in top},
+    }
+
+
+def _memory_pass(script, frames, fps, keys, size, context, warmup):
+    peaks, retained = [], []
+    state = {"base": 0}
+
+    def start(game):
+        tracemalloc.start()
+        state["base"] = tracemalloc.get_traced_memory()[0]
+
+    def on_frame(frame, ctx):
+        current, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - state["base"])
+        retained.append(current - state["base"])
+        tracemalloc.reset_peak()
+        state["base"] = tracemalloc.get_traced_memory()[0]
+        return False
+
+    try:
+        run(script, frames, fps, keys, size, on_frame, context, setup=_setup(start))
+    finally:
+        tracemalloc.stop()
+    peaks, retained = peaks[warmup:], retained[warmup:]
+    n = max(1, len(peaks))
+    return {"alloc_kib": sum(peaks) / n / 1024.0, "retained_b": sum(retained) / n}
+
+
+def bench_script(script, frames=DEFAULT_FRAMES, fps=DEFAULT_FPS, keys=DEFAULT_KEYS, size=DEFAULT_SIZE,
+                 context=None, warmup=DEFAULT_WARMUP):
+    """Time, count and memory results for one script, merged into one dict."""
+    script = os.path.abspath(script)
+    result = {"script": os.path.basename(script)}
+    cwd = os.getcwd()
+    for run_pass in (_time_pass, _calls_pass, _memory_pass):
+        # Scripts read and write scores in the working directory; every pass
+        # starts from an empty one so all variants draw the same scoreboard
+        with tempfile.TemporaryDirectory(prefix="tug_bench-") as scratch:
+            os.chdir(scratch)
+            try:
+                result.update(run_pass(script, frames, fps, keys, size, context, warmup))
+            finally:
+                os.chdir(cwd)
+                release_buffers()
+    return result
+
+
+# -------------------
+# Saved runs
+# -------------------
+def _git(*args):
+    try:
+        out = subprocess.run(("git",) + args, cwd=HERE, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() if out.returncode == 0 else None
+
+
+def run_info(context, frames, fps, keys, size, warmup):
+    commit = _git("rev-parse", "--short", "HEAD")
+    renderer = glGetString(GL_RENDERER)
+    return {
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")) if commit else None,
+        "backend": context.backend,
+        "renderer": renderer.decode() if renderer else None,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "frames": frames, "warmup": warmup, "fps": fps, "keys": keys, "size": list(size),
+    }
+
+
+def save_run(report, directory=RUN_DIR):
+    """Write report to directory as <time>-<commit>.json; returns the path."""
+    os.makedirs(directory, exist_ok=True)
+    info = report["info"]
+    stamp = info["time"].replace(":", "").replace("-", "").split("+")[0]
+    name = f"{stamp}-{info['commit'] or 'nogit'}{'-dirty' if info['dirty'] else ''}.json"
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    return path
+
+
+def load_run(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_table(report, baseline=None):
+    """Print one row per script; with baseline, each value's change in %."""
+    info = report["info"]
+    print(f"{info['commit'] or '-'}{' (dirty)' if info['dirty'] else ''}  {info['renderer']}  "
+          f"{info['frames'] - info['warmup']} frames @ {info['fps']:g} fps, {info['size'][0]}x{info['size'][1]}")
+    if baseline is not None:
+        base_info = baseline["info"]
+        print(f"vs {base_info['commit'] or '-'}{' (dirty)' if base_info['dirty'] else ''}  {base_info['time']}")
+        for key in _RUN_SETTINGS:
+            if base_info.get(key) != info.get(key):
+                print(f"warning: {key} differs ({base_info.get(key)} vs {info.get(key)})")
+    base_rows = {r["script"]: r for r in baseline["scripts"]} if baseline else {}
+    width = max([len(r["script"]) for r in report["scripts"]] + [6]) + 2
+    print(f"{'script':<{width}}" + "".join(f"{head:>{len(fmt.format(0))}}" for _, head, fmt, _ in COLUMNS))
+    for row in report["scripts"]:
+        print(f"{row['script']:<{width}}" + "".join(fmt.format(row[key]) for key, _, fmt, _ in COLUMNS))
+        base = base_rows.get(row["script"])
+        if base is not None:
+            cells = []
+            for key, _, fmt, relative in COLUMNS:
+                cell_width = len(fmt.format(0))
+                if relative:
+                    change = (row[key] - base[key]) / base[key] * 100.0 if base[key] else 0.0
+                    cells.append(f"{change:+{cell_width - 1}.1f}%")
+                else:
+                    cells.append(f"{row[key] - base[key]:+{cell_width}.0f}")
+            print(f"{'':<{width}}" + "".join(cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the game scripts headless.")
+    parser.add_argument("scripts", nargs="*", help="scripts to run (default: all five variants)")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="leading frames left out")
+    parser.add_argument("--fps", type=float, default=DEFAULT_FPS, help="simulated frames per second")
+    parser.add_argument("--keys", default=DEFAULT_KEYS, help=f"scripted input (default {DEFAULT_KEYS!r})")
+    parser.add_argument("--size", default="%dx%d" % DEFAULT_SIZE, help="WIDTHxHEIGHT")
+    parser.add_argument("--out", default=RUN_DIR, help="directory for saved runs")
+    parser.add_argument("--no-save", action="store_true", help="do not save this run")
+    parser.add_argument("--compare", nargs="+", metavar="RUN",
+                        help="baseline run file, and optionally a second run instead of a fresh one")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes a baseline and at most one other run")
+    if args.frames <= args.warmup:
+        parser.error("--frames must be larger than --warmup")
+
+    baseline = load_run(args.compare[0]) if args.compare else None
+    if args.compare and len(args.compare) == 2:
+        report = load_run(args.compare[1])
+    else:
+        size = tuple(int(v) for v in args.size.lower().split("x"))
+        scripts = args.scripts or [os.path.join(HERE, name) for name in VARIANTS]
+        for script in scripts:
+            if not os.path.exists(script):
+                parser.error(f"no such script: {script}")
+        context = HeadlessContext(*size)
+        try:
+            info = run_info(context, args.frames, args.fps, args.keys, size, args.warmup)
+            rows = []
+            for script in scripts:
+                if not args.json:
+                    print("running", os.path.basename(script), file=sys.stderr)
+                rows.append(bench_script(script, args.frames, args.fps, args.keys, size, context, args.warmup))
+        finally:
+            context.close()
+        report = {"info": info, "scripts": rows}
+        if not args.no_save:
+            path = save_run(report, args.out)
+            if not args.json:
+                print("saved", path, file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(report if baseline is None else {"baseline": baseline, "run": report}, indent=2))
+    else:
+        print_table(report, baseline)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Frame pacing for the GLUT game scripts.
+
+glutIdleFunc(idle) runs the update and a redisplay as often as GLUT loops,
+which keeps one core at 100% and renders far more frames than the monitor
+shows. FrameScheduler drives the same two callbacks from glutTimerFunc
+instead: the simulation update at its own tick rate and redisplays at the
+target frame rate, sleeping in between. Deadlines advance by whole periods
+so millisecond rounding in glutTimerFunc does not accumulate into drift.
+
+    scheduler = FrameScheduler(idle, fps=60, tick_rate=120)
+    scheduler.start()          # instead of glutIdleFunc(idle)
+    glutMainLoop()
+
+GameClock is the time source those callbacks read: one perf_counter based
+clock that turns wall time into whole simulation steps and gives renderers
+the fraction of a step that has passed since, so game speed no longer
+depends on how often idle() happens to run.
+"""
+import time
+
+from OpenGL.GLUT import glutIdleFunc, glutPostRedisplay, glutTimerFunc
+
+from tug_sim import FIXED_DT
+
+# Longest wall-time gap fed to the simulation in one update. Anything longer
+# (window drag, breakpoint, suspend) is dropped instead of replayed at once.
+MAX_ELAPSED = 0.25
+
+# After falling this many periods behind (window drag, breakpoint, a slow
+# frame), resynchronize instead of firing the missed callbacks back to back.
+MAX_LAG_PERIODS = 4
+
+
+class FrameScheduler:
+    """Run update() at tick_rate Hz and glutPostRedisplay() at fps Hz.
+
+    tick_rate defaults to fps. With unlocked=True frames are posted from
+    glutIdleFunc as fast as the driver allows (for benchmarking) while the
+    ticks stay on their schedule.
+    """
+
+    def __init__(self, update, fps=60, tick_rate=None, unlocked=False, clock=time.perf_counter):
+        self.update = update
+        self.clock = clock
+        self.unlocked = unlocked
+        self.set_rates(fps, tick_rate)
+        self.running = False
+        self.frames = 0
+        self.ticks = 0
+        self.fps = 0.0           # measured, refreshed about once a second
+        self._next_frame = self._next_tick = None
+        self._fps_start = None
+        self._fps_frames = 0
+        self._chain = 0          # timers from an earlier start() are ignored
+
+    def set_rates(self, fps, tick_rate=None):
+        self.target_fps = float(fps)
+        self.tick_rate = float(tick_rate or fps)
+        self.frame_period = 1.0 / self.target_fps
+        self.tick_period = 1.0 / self.tick_rate
+
+    def start(self):
+        now = self.clock()
+        self._next_frame = self._next_tick = now
+        self._fps_start = now
+        self._fps_frames = 0
+        self.running = True
+        self._chain += 1
+        if self.unlocked:
+            glutIdleFunc(self._on_idle)
+        else:
+            self._schedule(now)
+
+    def stop(self):
+        """Stop after the pending timer (if any) fires."""
+        self.running = False
+        if self.unlocked:
+            glutIdleFunc(None)
+
+    def set_unlocked(self, unlocked):
+        """Switch between paced and benchmark mode while running."""
+        if unlocked == self.unlocked:
+            return
+        was_running = self.running
+        if was_running:
+            self.stop()
+        self.unlocked = unlocked
+        if was_running:
+            self.start()
+
+    def debug_line(self):
+        mode = "unlocked" if self.unlocked else f"target {self.target_fps:g}"
+        return f"fps:{self.fps:.1f} ({mode})  tick:{self.tick_rate:g}Hz"
+
+    # -------------------
+    # Callbacks
+    # -------------------
+    def _on_timer(self, chain):
+        if not self.running or self.unlocked or chain != self._chain:
+            return
+        now = self.clock()
+        self._run_due(now)
+        self._schedule(self.clock())
+
+    def _on_idle(self):
+        now = self.clock()
+        self._tick_due(now)
+        self._post_frame(now)
+
+    def _run_due(self, now):
+        self._tick_due(now)
+        if now >= self._next_frame:
+            self._next_frame = self._advance(self._next_frame, self.frame_period, now)
+            self._post_frame(now)
+
+    def _tick_due(self, now):
+        if now >= self._next_tick:
+            self._next_tick = self._advance(self._next_tick, self.tick_period, now)
+            self.ticks += 1
+            self.update()
+
+    def _post_frame(self, now):
+        glutPostRedisplay()
+        self.frames += 1
+        self._fps_frames += 1
+        if now - self._fps_start >= 1.0:
+            self.fps = self._fps_frames / (now - self._fps_start)
+            self._fps_start = now
+            self._fps_frames = 0
+
+    def _schedule(self, now):
+        if not self.running:
+            return
+        wait = min(self._next_frame, self._next_tick) - now
+        # glutTimerFunc takes whole milliseconds; round up so we never wake
+        # early and spin, the fixed deadlines absorb the extra fraction.
+        glutTimerFunc(max(0, int(wait * 1000.0 + 0.999)), self._on_timer, self._chain)
+
+    @staticmethod
+    def _advance(deadline, period, now):
+        deadline += period
+        if now - deadline > MAX_LAG_PERIODS * period:
+            deadline = now + period
+        return deadline
+
+
+class GameClock:
+    """Monotonic game time with a fixed-step accumulator.
+
+        steps = clock.update()               # in idle()
+        sim.run(steps, keys)
+        sim.lerp("left_lean", clock.alpha())  # in showScreen()
+
+    A slow machine gets several steps per update and renders fewer frames,
+    a fast one gets zero steps on some updates; the match runs at the same
+    speed on both.
+    """
+
+    def __init__(self, step=FIXED_DT, max_elapsed=MAX_ELAPSED, clock=time.perf_counter):
+        self.step = step
+        self.max_elapsed = max_elapsed
+        self.clock = clock
+        self._origin = self._last = clock()
+        self._accum = 0.0
+        self.elapsed = 0.0       # wall seconds covered by the last update()
+        self.dropped = 0.0       # wall seconds skipped after long stalls
+
+    def now(self):
+        """Seconds since the clock was created."""
+        return self.clock() - self._origin
+
+    def update(self):
+        """Return how many whole steps have become due since the last call."""
+        now = self.clock()
+        elapsed = now - self._last
+        self._last = now
+        if elapsed > self.max_elapsed:
+            self.dropped += elapsed - self.max_elapsed
+            elapsed = self.max_elapsed
+        self.elapsed = elapsed
+        self._accum += elapsed
+        steps = int(self._accum / self.step)
+        self._accum -= steps * self.step
+        return steps
+
+    def alpha(self):
+        """Fraction of a step between the last simulated step and now, 0..1."""
+        pending = self._accum + self.clock() - self._last
+        return min(1.0, max(0.0, pending / self.step))
@@ -0,0 +1,358 @@
+"""Export replays and live sessions as image sequences or video.
+
+    python tug_export.py Sarika.py tug_replays/round.tugi --out round_frames
+    python tug_export.py Sarika.py round.tugi --pipe "ffmpeg -y -f rawvideo -pix_fmt rgb24 -s {width}x{height} -r {fps} -i - round.mp4"
+    python tug_export.py Rafi.py --frames 600 --keys "0:b,1-/3:a" --format raw
+
+A saved .tugi replay (or a scripted session) is rendered headless through
+the game script at a fixed frame rate; in a window, 'v' in Sarika.py and
+Sec22 starts and stops the same export of the live session.
+
+Readback goes through ARB_pixel_buffer_object: each frame's glReadPixels
+targets one buffer of a 2-3 deep ring and returns at once, and a buffer
+is only mapped depth-1 frames later, when the GPU has long finished with
+it, so frame N is copied out while frame N+1 renders. Encoding (PNG,
+whose zlib releases the GIL) runs on a thread pool behind a bounded
+queue; an encoder pipe gets the frames in order from one thread.
+"""
+import argparse
+import ctypes
+import os
+import shlex
+import subprocess
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from tug_headless import (  # before anything imports OpenGL: picks the offscreen platform
+    DEFAULT_KEYS, HeadlessContext, release_buffers, run, scratch_cwd, settle, write_png,
+)
+from OpenGL.GL import (
+    GL_CLIENT_PIXEL_STORE_BIT, GL_PACK_ALIGNMENT, GL_READ_ONLY, GL_RGB, GL_STREAM_READ,
+    GL_UNSIGNED_BYTE, glBindBuffer, glBufferData, glDeleteBuffers, glGenBuffers, glMapBuffer,
+    glPixelStorei, glPopClientAttrib, glPushClientAttrib, glReadPixels, glUnmapBuffer,
+)
+from OpenGL.GL.ARB.pixel_buffer_object import GL_PIXEL_PACK_BUFFER_ARB, glInitPixelBufferObjectARB
+
+# Buffers in the readback ring: 2 is enough when the frame rate is steady,
+# 3 absorbs a slow frame without the map having to wait
+DEFAULT_DEPTH = 2
+
+# Frames waiting for the encoder before capture() blocks
+MAX_PENDING_PER_THREAD = 4
+
+# Seconds between progress lines on the command line
+REPORT_INTERVAL = 1.0
+
+
+class PboRing:
+    """Asynchronous glReadPixels through a ring of pixel pack buffers.
+
+    push(tag) starts reading the current framebuffer and returns the
+    (pixels, tag) of the frame pushed depth-1 calls earlier, or None while
+    the ring fills; drain() returns the rest. pixels are bottom-up RGB
+    (height, width, 3) arrays owned by the caller. Without pixel buffer
+    objects the read is synchronous and push() returns the current frame.
+    """
+
+    def __init__(self, width, height, depth=DEFAULT_DEPTH):
+        self.width = width
+        self.height = height
+        self.depth = max(1, depth)
+        self.size = width * height * 3
+        self.supported = None    # known after the first push()
+        self._pbos = []
+        self._tags = deque()     # tags of frames in flight, oldest first
+        self._next = 0           # ring index of the next read
+
+    def push(self, tag=None):
+        if self.supported is None:
+            self.supported = self._create()
+        glPushClientAttrib(GL_CLIENT_PIXEL_STORE_BIT)
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        try:
+            if not self.supported:
+                data = glReadPixels(0, 0, self.width, self.height, GL_RGB, GL_UNSIGNED_BYTE)
+                return np.frombuffer(data, np.uint8).reshape(self.height, self.width, 3).copy(), tag
+            glBindBuffer(GL_PIXEL_PACK_BUFFER_ARB, self._pbos[self._next])
+            glReadPixels(0, 0, self.width, self.height, GL_RGB, GL_UNSIGNED_BYTE, 0)
+            glBindBuffer(GL_PIXEL_PACK_BUFFER_ARB, 0)
+        finally:
+            glPopClientAttrib()
+        self._tags.append(tag)
+        self._next = (self._next + 1) % self.depth
+        if len(self._tags) < self.depth:
+            return None
+        return self._map_oldest()
+
+    def drain(self):
+        out = []
+        while self._tags:
+            out.append(self._map_oldest())
+        return out
+
+    def delete(self):
+        if self._pbos:
+            glDeleteBuffers(len(self._pbos), self._pbos)
+        self._pbos = []
+        self._tags.clear()
+        self.supported = None
+
+    def _create(self):
+        if not (glInitPixelBufferObjectARB() and bool(glMapBuffer)):
+            return False
+        self._pbos = [int(b) for b in np.atleast_1d(glGenBuffers(self.depth))]
+        for pbo in self._pbos:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER_ARB, pbo)
+            glBufferData(GL_PIXEL_PACK_BUFFER_ARB, self.size, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER_ARB, 0)
+        return True
+
+    def _map_oldest(self):
+        # the oldest frame in flight sits len(tags) slots behind the next read
+        index = (self._next - len(self._tags)) % self.depth
+        tag = self._tags.popleft()
+        pixels = np.empty((self.height, self.width, 3), np.uint8)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER_ARB, self._pbos[index])
+        address = glMapBuffer(GL_PIXEL_PACK_BUFFER_ARB, GL_READ_ONLY)
+        if address:
+            ctypes.memmove(pixels.ctypes.data, address, self.size)
+            glUnmapBuffer(GL_PIXEL_PACK_BUFFER_ARB)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER_ARB, 0)
+        return pixels, tag
+
+
+# -------------------
+# Sinks
+# -------------------
+class FrameSink:
+    """Runs write(index, pixels) on a thread pool behind a bounded queue.
+
+    submit() blocks only when max_pending frames are already waiting, so
+    a slow disk or encoder throttles capture instead of eating memory.
+    """
+
+    def __init__(self, write, threads=None, max_pending=None, close=None):
+        self.threads = threads or os.cpu_count() or 1
+        self.max_pending = max_pending or MAX_PENDING_PER_THREAD * self.threads
+        self._write = write
+        self._close = close
+        self._pool = ThreadPoolExecutor(self.threads, thread_name_prefix="tug_export")
+        self._pending = deque()
+        self.peak_depth = 0
+
+    @property
+    def depth(self):
+        """Frames submitted but not yet written."""
+        while self._pending and self._pending[0].done():
+            self._pending.popleft().result()
+        return len(self._pending)
+
+    def submit(self, index, pixels):
+        while self.depth >= self.max_pending:
+            self._pending.popleft().result()
+        self._pending.append(self._pool.submit(self._write, index, pixels))
+        self.peak_depth = max(self.peak_depth, len(self._pending))
+
+    def close(self):
+        while self._pending:
+            self._pending.popleft().result()
+        self._pool.shutdown()
+        if self._close is not None:
+            self._close()
+
+
+def png_sink(out_dir, threads=None, level=6):
+    """Numbered frameNNNNNN.png files in out_dir."""
+    out_dir = os.path.abspath(out_dir)  # writes run on pool threads, whatever the cwd is then
+    os.makedirs(out_dir, exist_ok=True)
+
+    def write(index, pixels):
+        write_png(os.path.join(out_dir, f"frame{index:06d}.png"), pixels[::-1], level)
+    return FrameSink(write, threads)
+
+
+def raw_sink(out_dir, threads=None):
+    """Numbered frameNNNNNN.rgb files (top-down rgb24, no header) in out_dir."""
+    out_dir = os.path.abspath(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+    def write(index, pixels):
+        with open(os.path.join(out_dir, f"frame{index:06d}.rgb"), "wb") as f:
+            f.write(np.ascontiguousarray(pixels[::-1]).data)
+    return FrameSink(write, threads)
+
+
+def pipe_sink(command, width, height, fps):
+    """Top-down rgb24 frames in order on the stdin of command.
+
+    {width}, {height} and {fps} in command are filled in, e.g.
+    "ffmpeg -y -f rawvideo -pix_fmt rgb24 -s {width}x{height} -r {fps} -i - out.mp4".
+    """
+    args = shlex.split(command.format(width=width, height=height, fps=f"{fps:g}"))
+    proc = subprocess.Popen(args, stdin=subprocess.PIPE)
+
+    def write(index, pixels):
+        proc.stdin.write(np.ascontiguousarray(pixels[::-1]).data)
+
+    def close():
+        proc.stdin.close()
+        if proc.wait():
+            raise RuntimeError(f"encoder exited with code {proc.returncode}: {args[0]}")
+    # one thread keeps the frames in order
+    return FrameSink(write, threads=1, max_pending=MAX_PENDING_PER_THREAD * 2, close=close)
+
+
+# -------------------
+# Exporter
+# -------------------
+class FrameExporter:
+    """Captures rendered frames into a sink at a fixed frame rate.
+
+    Call capture() once per frame after drawing and before swapping
+    buffers. With t (seconds of game time) frames are repeated or dropped
+    so the output stays at fps whatever the render rate; without it every
+    captured frame is one output frame (headless runs already render at a
+    fixed rate).
+    """
+
+    def __init__(self, sink, width=1000, height=800, fps=60.0, depth=DEFAULT_DEPTH, clock=time.perf_counter):
+        self.sink = sink
+        self.fps = fps
+        self.clock = clock
+        self.ring = PboRing(width, height, depth)
+        self.frames = 0              # output frames written
+        self.captured = 0
+        self.rate = 0.0              # output frames per wall second
+        self._start = self._t0 = None
+        self._rate_at = self._rate_frames = None
+
+    def capture(self, t=None):
+        now = self.clock()
+        if self._start is None:
+            self._start = self._rate_at = now
+            self._rate_frames = 0
+        self.captured += 1
+        done = self.ring.push(t)
+        if done is not None:
+            self._emit(*done)
+        if now - self._rate_at >= 1.0:
+            self.rate = (self.frames - self._rate_frames) / (now - self._rate_at)
+            self._rate_at, self._rate_frames = now, self.frames
+
+    def close(self):
+        """Flush the ring and the sink; returns the stats."""
+        for pixels, t in self.ring.drain():
+            self._emit(pixels, t)
+        self.sink.close()
+        stats = self.stats()
+        self.ring.delete()
+        return stats
+
+    def stats(self):
+        wall = self.clock() - self._start if self._start is not None else 0.0
+        return {"frames": self.frames, "captured": self.captured, "wall_s": wall,
+                "fps": self.frames / wall if wall > 0 else 0.0, "queue": self.sink.depth,
+                "peak_queue": self.sink.peak_depth, "pbo": bool(self.ring.supported)}
+
+    def status_line(self):
+        return f"export: {self.frames} frames  {self.rate:.1f} fps  queue {self.sink.depth}/{self.sink.max_pending}"
+
+    def _emit(self, pixels, t):
+        count = 1
+        if t is not None:
+            # frame slots up to the one nearest to t (the first frame is at 0)
+            if self._t0 is None:
+                self._t0 = t
+            count = max(0, round((t - self._t0) * self.fps) + 1 - self.frames)
+        for _ in range(count):
+            self.sink.submit(self.frames, pixels)
+            self.frames += 1
+
+
+def open_exporter(out=None, fmt="png", pipe=None, width=1000, height=800, fps=60.0,
+                  depth=DEFAULT_DEPTH, threads=None):
+    """FrameExporter writing to out (default: a timestamped directory) or a pipe."""
+    if pipe:
+        sink = pipe_sink(pipe, width, height, fps)
+    else:
+        out = out or time.strftime("tug_export-%Y%m%d-%H%M%S")
+        sink = (raw_sink if fmt == "raw" else png_sink)(out, threads)
+    exporter = FrameExporter(sink, width, height, fps, depth)
+    exporter.path = pipe or out
+    return exporter
+
+
+# -------------------
+# Command line
+# -------------------
+def main(argv=None):
+    from tug_farm import replay_frame_count
+    from tug_replay import InputReplay
+
+    parser = argparse.ArgumentParser(description="Export a replay or scripted session as frames or video.")
+    parser.add_argument("script", help="game script that draws the frames, e.g. Sarika.py")
+    parser.add_argument("replay", nargs="?", help=".tugi input replay (default: a scripted session)")
+    parser.add_argument("--out", help="output directory (default: timestamped)")
+    parser.add_argument("--format", choices=("png", "raw"), default="png")
+    parser.add_argument("--pipe", help="encoder command reading rgb24 on stdin; {width} {height} {fps} are filled in")
+    parser.add_argument("--fps", type=float, default=60.0)
+    parser.add_argument("--size", default="1000x800", help="WIDTHxHEIGHT")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="pixel buffer objects in the readback ring")
+    parser.add_argument("--threads", type=int, default=None, help="encoder threads (default: CPU count)")
+    parser.add_argument("--frames", type=int, default=600, help="length of a scripted session")
+    parser.add_argument("--keys", default=DEFAULT_KEYS, help="input of a scripted session")
+    args = parser.parse_args(argv)
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    frames, keys, setup = args.frames, args.keys, None
+    if args.replay:
+        replay = InputReplay.load(args.replay)
+        frames = replay_frame_count(replay, args.fps)
+        keys, setup = "", (lambda game: replay.drive(game.sim))
+        args.out = args.out or os.path.splitext(os.path.basename(args.replay))[0] + "_frames"
+
+    exporter = open_exporter(args.out, args.format, args.pipe, width, height, args.fps,
+                             args.depth, args.threads)
+    report = [0.0]
+
+    def on_frame(frame, context):
+        exporter.capture()
+        now = time.perf_counter()
+        if now - report[0] >= REPORT_INTERVAL:
+            report[0] = now
+            print(f"frame {frame + 1}/{frames}  {exporter.status_line()}", flush=True)
+
+    # The ring still holds frames after the run; they are mapped while the
+    # context is alive
+    context = HeadlessContext(width, height)
+    loaded = []
+
+    def prepare(game):
+        loaded.append(game)
+        if setup is not None:
+            setup(game)
+
+    script = os.path.abspath(args.script)
+    try:
+        # Replaying a round plays it again: its score and .tugi go to a
+        # scratch directory instead of the real history
+        with scratch_cwd():
+            try:
+                run(script, frames, args.fps, keys, (width, height), on_frame, context, setup=prepare)
+            finally:
+                for game in loaded:
+                    settle(game)
+    finally:
+        stats = exporter.close()
+        release_buffers()
+        context.close()
+    print(f"{stats['frames']} frames to {exporter.path} in {stats['wall_s']:.2f}s "
+          f"({stats['fps']:.1f} fps, peak queue {stats['peak_queue']}, "
+          f"{'pixel buffer objects' if stats['pbo'] else 'synchronous readback'})")
+
+
+if __name__ == "__main__":
+    main()
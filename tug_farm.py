@@ -0,0 +1,290 @@
+"""Render replays and benchmark scenes headless across worker processes.
+
+    python tug_farm.py replay Sarika.py tug_replays/*.tugi --out frames
+    python tug_farm.py bench Sarika.py Rafi.py Tousif.py --frames 600 --repeat 4
+
+Each worker process owns one offscreen context (tug_headless, so OSMesa or
+EGL) and takes jobs from a queue: a segment of an input replay rendered
+through a game script, or a benchmark run of a script with scripted keys.
+Rendered frames are read back straight into a ring of frame slots in
+shared memory; only the slot number goes through the result queue, and
+the slot is handed back once the parent's callback (e.g. the PNG writer)
+has used it. Benchmark frame times are written to a shared float64 block
+the same way. Replays are cut into segments so one long round also
+spreads over all workers; a worker fast-forwards through the frames
+before its segment without drawing them.
+
+Workers are spawned rather than forked: the GL platform is fixed when a
+process first imports OpenGL, and a GL context does not survive a fork.
+"""
+import argparse
+import dataclasses
+import json
+import math
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+import time
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from tug_headless import (  # before anything imports OpenGL: picks the offscreen platform
+    DEFAULT_FPS, DEFAULT_FRAMES, DEFAULT_KEYS, DEFAULT_SIZE, HeadlessContext, release_buffers, run,
+    write_png,
+)
+from tug_profile import percentile
+from tug_replay import InputReplay
+
+# Frames per replay job; shorter segments balance better, longer ones
+# fast-forward less
+DEFAULT_SEGMENT = 120
+
+# Frame slots in shared memory per worker
+SLOTS_PER_WORKER = 2
+
+# How often the parent checks that its workers are still alive (seconds)
+POLL_INTERVAL = 1.0
+
+
+@dataclasses.dataclass
+class FarmJob:
+    """One unit of work: frames [skip, frames) of script."""
+    kind: str                    # "replay" or "bench"
+    script: str
+    frames: int
+    skip: int = 0
+    keys: str = ""
+    replay: bytes = b""          # InputReplay.to_bytes() for replay jobs
+    name: str = ""
+    id: int = 0
+    timing_offset: int = 0       # first slot in the shared timing block
+
+
+def replay_frame_count(replay, fps=DEFAULT_FPS):
+    """Frames needed to show a whole InputReplay at fps."""
+    return max(1, math.ceil(replay.end_tick * replay.dt * fps))
+
+
+class RenderFarm:
+    """Queue of replay and benchmark jobs run by a pool of headless workers.
+
+        farm = RenderFarm(workers=8)
+        farm.add_replay("Sarika.py", "tug_replays/round.tugi")
+        farm.add_bench("Rafi.py", frames=600)
+        results = farm.run(on_frame=lambda job, frame, pixels: ...)
+
+    on_frame receives a top-down (height, width, 3) view of shared memory
+    that is reused as soon as the callback returns; copy it to keep it.
+    """
+
+    def __init__(self, workers=None, size=DEFAULT_SIZE, fps=DEFAULT_FPS, slots=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.size = tuple(size)
+        self.fps = fps
+        self.slots = slots or SLOTS_PER_WORKER * self.workers
+        self.jobs = []
+
+    def add_replay(self, script, replay, segment=DEFAULT_SEGMENT, name=None):
+        """Queue every frame of replay (a .tugi path or InputReplay) as segments."""
+        if not isinstance(replay, InputReplay):
+            name = name or os.path.splitext(os.path.basename(replay))[0]
+            replay = InputReplay.load(replay)
+        data = replay.to_bytes()
+        total = replay_frame_count(replay, self.fps)
+        return [self._add(FarmJob("replay", os.path.abspath(script), min(total, start + segment), start,
+                                  replay=data, name=name or "replay"))
+                for start in range(0, total, segment)]
+
+    def add_bench(self, script, frames=DEFAULT_FRAMES, keys=DEFAULT_KEYS, name=None):
+        return self._add(FarmJob("bench", os.path.abspath(script), frames, keys=keys,
+                                 name=name or os.path.basename(script)))
+
+    def _add(self, job):
+        job.id = len(self.jobs)
+        self.jobs.append(job)
+        return job
+
+    def run(self, on_frame=None):
+        """Run all queued jobs; returns one stats dict per job, in job order.
+
+        Bench results carry their frame times as "frame_ms".
+        """
+        width, height = self.size
+        timing_count = 0
+        for job in self.jobs:
+            if job.kind == "bench":
+                job.timing_offset = timing_count
+                timing_count += job.frames - job.skip
+        ctx = multiprocessing.get_context("spawn")
+        frames_shm = shared_memory.SharedMemory(create=True, size=self.slots * height * width * 3)
+        timings_shm = shared_memory.SharedMemory(create=True, size=max(1, timing_count) * 8)
+        jobs, results, free = ctx.Queue(), ctx.Queue(), ctx.Queue()
+        for slot in range(self.slots):
+            free.put(slot)
+        for job in self.jobs:
+            jobs.put(job)
+        procs = []
+        for _ in range(min(self.workers, len(self.jobs))):
+            jobs.put(None)
+            procs.append(ctx.Process(target=_worker, daemon=True, args=(
+                jobs, results, free, frames_shm.name, timings_shm.name, self.slots, self.size, self.fps)))
+        slots = np.ndarray((self.slots, height, width, 3), np.uint8, buffer=frames_shm.buf)
+        timings = np.ndarray((max(1, timing_count),), np.float64, buffer=timings_shm.buf)
+        out = [None] * len(self.jobs)
+        try:
+            for proc in procs:
+                proc.start()
+            pending = len(self.jobs)
+            while pending:
+                try:
+                    msg = results.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    dead = [p for p in procs if p.exitcode not in (None, 0)]
+                    if dead:
+                        raise RuntimeError(f"render worker exited with code {dead[0].exitcode}")
+                    continue
+                kind, job_id = msg[0], msg[1]
+                job = self.jobs[job_id]
+                if kind == "frame":
+                    frame, slot = msg[2], msg[3]
+                    try:
+                        if on_frame is not None:
+                            on_frame(job, frame, slots[slot][::-1])
+                    finally:
+                        free.put(slot)
+                elif kind == "done":
+                    stats = msg[2]
+                    if job.kind == "bench":
+                        n = job.frames - job.skip
+                        stats["frame_ms"] = timings[job.timing_offset:job.timing_offset + n].tolist()
+                    out[job_id] = stats
+                    pending -= 1
+                else:
+                    raise RuntimeError(f"job {job_id} ({job.name}) failed in a worker:\n{msg[2]}")
+            for proc in procs:
+                proc.join()
+        finally:
+            for proc in procs:
+                if proc.is_alive():
+                    proc.terminate()
+            del slots, timings
+            for shm in (frames_shm, timings_shm):
+                shm.close()
+                shm.unlink()
+        return out
+
+
+def _worker(jobs, results, free, frames_name, timings_name, slot_count, size, fps):
+    width, height = size
+    context = HeadlessContext(width, height)
+    frames_shm = shared_memory.SharedMemory(name=frames_name)
+    timings_shm = shared_memory.SharedMemory(name=timings_name)
+    slots = np.ndarray((slot_count, height, width, 3), np.uint8, buffer=frames_shm.buf)
+    timings = np.ndarray((timings_shm.size // 8,), np.float64, buffer=timings_shm.buf)
+    # Scripts write scores and replays next to themselves; keep that out of
+    # the checkout when they are only being rendered
+    scratch = tempfile.mkdtemp(prefix="tug_farm-")
+    os.chdir(scratch)
+
+    def capture(job):
+        def on_frame(frame, ctx):
+            slot = free.get()
+            ctx.read_pixels(slots[slot])
+            results.put(("frame", job.id, frame, slot))
+        return on_frame
+
+    try:
+        for job in iter(jobs.get, None):
+            try:
+                setup = None
+                if job.kind == "replay":
+                    replay = InputReplay.from_bytes(job.replay)
+                    setup = lambda game, replay=replay: replay.drive(game.sim)  # noqa: E731
+                stats = run(job.script, job.frames, fps, job.keys, size,
+                            capture(job) if job.kind == "replay" else None, context, job.skip, setup)
+                frame_ms = stats.pop("frame_ms")
+                if job.kind == "bench":
+                    timings[job.timing_offset:job.timing_offset + len(frame_ms)] = frame_ms
+                results.put(("done", job.id, stats))
+            except Exception:
+                results.put(("error", job.id, traceback.format_exc()))
+            finally:
+                release_buffers()
+    finally:
+        slots = timings = None   # release the views before closing the mappings
+        frames_shm.close()
+        timings_shm.close()
+        context.close()
+        os.chdir(os.path.dirname(scratch))
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+# -------------------
+# Command line
+# -------------------
+def _summary(frame_ms):
+    ms = sorted(frame_ms)
+    return {"frames": len(ms), "mean_ms": sum(ms) / len(ms) if ms else 0.0,
+            "p50_ms": percentile(ms, 50), "p95_ms": percentile(ms, 95), "p99_ms": percentile(ms, 99)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render replays or benchmark scripts on several processes.")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--size", default="%dx%d" % DEFAULT_SIZE, help="WIDTHxHEIGHT")
+    parser.add_argument("--fps", type=float, default=DEFAULT_FPS)
+    sub = parser.add_subparsers(dest="command", required=True)
+    rep = sub.add_parser("replay", help="render input replays (.tugi) to PNG frames")
+    rep.add_argument("script")
+    rep.add_argument("replays", nargs="+")
+    rep.add_argument("--out", default="tug_frames", help="output directory, one folder per replay")
+    rep.add_argument("--segment", type=int, default=DEFAULT_SEGMENT, help="frames per job")
+    bench = sub.add_parser("bench", help="time scripted runs of one or more scripts")
+    bench.add_argument("scripts", nargs="+")
+    bench.add_argument("--frames", type=int, default=DEFAULT_FRAMES)
+    bench.add_argument("--keys", default=DEFAULT_KEYS)
+    bench.add_argument("--repeat", type=int, default=1, help="runs per script")
+    bench.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    size = tuple(int(v) for v in args.size.lower().split("x"))
+    farm = RenderFarm(args.workers, size, args.fps)
+
+    def save_frame(job, frame, pixels):
+        folder = os.path.join(args.out, job.name)
+        os.makedirs(folder, exist_ok=True)
+        write_png(os.path.join(folder, f"frame{frame:06d}.png"), pixels)
+
+    if args.command == "replay":
+        for path in args.replays:
+            farm.add_replay(args.script, path, args.segment)
+    else:
+        for _ in range(args.repeat):
+            for script in args.scripts:
+                farm.add_bench(script, args.frames, args.keys)
+
+    start = time.perf_counter()
+    results = farm.run(save_frame if args.command == "replay" else None)
+    wall = time.perf_counter() - start
+    frames = sum(r["frames"] for r in results)
+    if args.command == "bench":
+        per_script = {}
+        for job, stats in zip(farm.jobs, results):
+            per_script.setdefault(job.name, []).extend(stats["frame_ms"])
+        summary = {name: _summary(ms) for name, ms in per_script.items()}
+        if args.json:
+            print(json.dumps({"workers": farm.workers, "wall_s": wall, "scripts": summary}, indent=2))
+            return
+        print(f"{'script':<52}{'frames':>8}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+        for name, row in summary.items():
+            print(f"{name:<52}{row['frames']:>8}" +
+                  "".join(f"{row[k]:9.2f}" for k in ("mean_ms", "p50_ms", "p95_ms", "p99_ms")))
+    print(f"{frames} frames in {wall:.2f}s on {farm.workers} workers ({frames / wall:.1f} frames/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""Golden-image checks for the game's rendering.
+
+    python tug_golden.py                    # compare Sarika.py against golden/Sarika
+    python tug_golden.py --update           # re-record after an intended visual change
+    python tug_golden.py --script Rafi.py --scenes start,mid_tug
+    python tug_golden.py --time-tolerance 0.5  # also fail scenes drawn 50% slower
+
+Fixed scenes (start of round, mid tug, winner animation keyframes, replay
+mode, the referee's tie wave) are rendered headless with tug_headless: a
+seeded simulation, scripted keys and a simulated clock make every run draw
+the same frames. Each capture is compared to the stored golden image with
+a tolerant diff; a visual regression makes the command exit non-zero.
+The time to draw each capture is compared to the recorded one as well,
+but a slow scene is only a warning unless --time-tolerance is given:
+render time depends on whatever else the machine is doing. Failed scenes
+leave the actual image and a diff image in the output directory.
+
+The diff ignores differences below --threshold (in luma, 0-255), and
+pixels whose color is found within one pixel in the other image
+(antialiasing and rounding shifts); a scene fails when more than
+--max-diff of its pixels remain. Goldens come from Mesa's llvmpipe; other
+drivers rasterize differently and need their own --golden directory.
+"""
+import argparse
+import dataclasses
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable
+
+import numpy as np
+
+from tug_headless import (  # before anything imports OpenGL: picks the offscreen platform
+    DEFAULT_SIZE, HeadlessContext, read_png, release_buffers, run, write_png,
+)
+from tug_scores import HIGHSCORE_FILE
+
+GOLDEN_DIR = "golden"
+OUT_DIR = "tug_golden-out"
+
+# Scenes are simulated at this frame rate; the simulation itself always
+# steps at 120 Hz, so a lower rate only skips drawing
+SCENE_FPS = 30.0
+SCENE_SEED = 20250801
+
+# Luma difference (0-255) below which pixels count as equal
+DEFAULT_THRESHOLD = 8
+# Fraction of pixels allowed to differ
+DEFAULT_MAX_DIFF = 0.0001
+# Slowdown of a scene's render time against the recorded one that is
+# reported as a warning (or a failure, with an explicit time_tolerance)
+DEFAULT_TIME_TOLERANCE = 0.5
+# The captured frame is drawn again this many times and its render time is
+# the fastest of them, which other load on the machine can only slow down
+TIMING_REPEATS = 15
+
+# Score history every scene starts from, so the scoreboard panel is drawn
+# with fixed content; scores of the scenes' own rounds are not recorded
+FIXTURE_SCORES = (
+    {"time": 1754046000.0, "winner": "A", "tug_at_end": 11, "left_presses": 23, "right_presses": 12,
+     "round_duration": 4.2},
+    {"time": 1754046120.0, "winner": "L", "tug_at_end": -11, "left_presses": 9, "right_presses": 20,
+     "round_duration": 3.6},
+    {"time": 1754046300.0, "winner": "A", "tug_at_end": 2, "left_presses": 17, "right_presses": 15,
+     "round_duration": 5.0},
+)
+
+
+@dataclasses.dataclass
+class Scene:
+    """Input script and the moment to capture.
+
+    steps are (condition, key) pairs: each key is pressed once, in order,
+    on the first frame its condition holds. The capture is the first frame
+    after the last step where capture(game) holds. Conditions receive the
+    loaded script module.
+    """
+    name: str
+    keys: str = ""
+    capture: Callable = lambda game: True
+    steps: tuple = ()
+    max_frames: int = 400
+
+
+def _round_over(game):
+    return game.sim.game_paused and game.sim.animation_start is None
+
+
+SCENES = (
+    Scene("start"),
+    Scene("mid_tug", "0:b,1-/3:a", lambda g: g.sim.t >= 2.0),
+    Scene("left_win_0", "1-/3:a", lambda g: g.sim.winner == 'A'),
+    Scene("left_win_50", "1-/3:a", lambda g: g.sim.winner == 'A' and g.sim.platform_fall_progress >= 0.5),
+    Scene("left_win_100", "1-/3:a", lambda g: g.sim.winner == 'A' and g.sim.platform_fall_progress >= 1.0),
+    Scene("right_win_50", "0:b", lambda g: g.sim.winner == 'L' and g.sim.platform_fall_progress >= 0.5),
+    Scene("replay", "1-/3:a", lambda g: g.replay_mode and g.replay_player.position - g.replay_player.start >= 2.0,
+          steps=((_round_over, "p"),)),
+    Scene("tie_wave", "", lambda g: g.sim.referee_animation_type == 'tie' and g.sim.referee_wave_progress >= 0.3),
+)
+
+
+# -------------------
+# Rendering
+# -------------------
+def render_scene(script, scene, context, size=DEFAULT_SIZE):
+    """(image, stats) for scene drawn by script in context.
+
+    stats["render_ms"] is the best time to draw the captured frame.
+    """
+    state = {"game": None, "step": 0, "image": None, "frame": None, "render_ms": None}
+
+    def setup(game):
+        game.sim.reset(seed=SCENE_SEED)
+        if hasattr(game, "score_writer"):
+            game.score_writer.submit = lambda entry: None
+        state["game"] = game
+
+    def on_frame(frame, ctx):
+        game = state["game"]
+        steps = scene.steps
+        while state["step"] < len(steps) and steps[state["step"]][0](game):
+            game.keyboardListener(steps[state["step"]][1].encode(), 0, 0)
+            state["step"] += 1
+        if state["step"] == len(steps) and scene.capture(game):
+            if _settle(game):
+                game.showScreen()
+            state["image"] = ctx.read_pixels().copy()
+            state["frame"] = frame
+            state["render_ms"] = _redraw_ms(game.showScreen)
+            return True
+        return False
+
+    try:
+        stats = run(script, scene.max_frames, SCENE_FPS, scene.keys, size, on_frame, context, setup=setup)
+    finally:
+        release_buffers()
+    if state["image"] is None:
+        raise RuntimeError(f"scene {scene.name}: capture condition not reached in {scene.max_frames} frames")
+    stats.pop("frame_ms")
+    stats["capture_frame"] = state["frame"]
+    stats["render_ms"] = state["render_ms"]
+    return state["image"], stats
+
+
+def _settle(game):
+    """Wait for the script's background leaderboard line; True if the
+    frame has to be drawn again to show it."""
+    worker = getattr(game, "leaderboard", None)
+    if worker is None or not hasattr(worker, "wait"):
+        return False
+    worker.wait(10.0)
+    line = worker.result or ""
+    if line == game.leaderboard_line:
+        return False
+    game.leaderboard_line = line
+    return True
+
+
+def _redraw_ms(display, repeats=TIMING_REPEATS):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        display()   # ends in glutSwapBuffers, which waits for the frame
+        times.append((time.perf_counter() - start) * 1000.0)
+    return min(times)
+
+
+def _prepare_scratch(path):
+    with open(os.path.join(path, HIGHSCORE_FILE), "w", encoding="utf-8") as f:
+        for entry in FIXTURE_SCORES:
+            f.write(json.dumps(entry) + "\n")
+
+
+# -------------------
+# Comparison
+# -------------------
+def _luma(image):
+    return image[..., :3].astype(np.float32) @ np.array([0.299, 0.587, 0.114], np.float32)
+
+
+def _unmatched(a, b, threshold):
+    """Pixels of a whose luma differs from every pixel of b's 3x3 neighborhood."""
+    la, lb = _luma(a), _luma(b)
+    padded = np.pad(lb, 1, mode="edge")
+    h, w = la.shape
+    best = np.full(la.shape, np.inf, np.float32)
+    for dy in range(3):
+        for dx in range(3):
+            np.minimum(best, np.abs(la - padded[dy:dy + h, dx:dx + w]), out=best)
+    return best > threshold
+
+
+def compare(actual, golden, threshold=DEFAULT_THRESHOLD):
+    """(differing pixel count, mask) of actual against golden.
+
+    A pixel differs when either image has no match for it in the other
+    within one pixel, so a one-pixel shift of an edge is not a failure.
+    """
+    if actual.shape != golden.shape:
+        mask = np.ones(actual.shape[:2], bool)
+        return mask.size, mask
+    mask = _unmatched(actual, golden, threshold) | _unmatched(golden, actual, threshold)
+    return int(mask.sum()), mask
+
+
+def diff_image(actual, golden, mask):
+    """Golden dimmed to gray with the differing pixels in red."""
+    gray = (_luma(golden) * 0.35).astype(np.uint8)
+    out = np.repeat(gray[..., None], 3, axis=2)
+    out[mask] = (255, 0, 0)
+    return out
+
+
+# -------------------
+# Suite
+# -------------------
+def check(script, scenes=SCENES, golden_dir=None, out_dir=OUT_DIR, update=False, size=DEFAULT_SIZE,
+          threshold=DEFAULT_THRESHOLD, max_diff=DEFAULT_MAX_DIFF, time_tolerance=None):
+    """Render scenes and compare (or with update, record) them.
+
+    Returns a list of per-scene result dicts with a "status" of "ok",
+    "updated", "missing", "image" (visual regression) or "slow", and a
+    "slow" flag. Scenes drawn more than time_tolerance (default
+    DEFAULT_TIME_TOLERANCE) slower than recorded are flagged; only an
+    explicit time_tolerance turns that into the "slow" status.
+    """
+    script = os.path.abspath(script)
+    stem = os.path.splitext(os.path.basename(script))[0]
+    golden_dir = os.path.abspath(golden_dir or os.path.join(GOLDEN_DIR, stem))
+    out_dir = os.path.abspath(out_dir)
+    slow_limit = 1.0 + (time_tolerance if time_tolerance is not None else DEFAULT_TIME_TOLERANCE)
+    timings_path = os.path.join(golden_dir, "timings.json")
+    timings = {}
+    if os.path.exists(timings_path):
+        with open(timings_path, encoding="utf-8") as f:
+            timings = json.load(f)
+
+    results = []
+    context = HeadlessContext(*size)
+    cwd = os.getcwd()
+    # Score times are drawn as local clock times
+    tz = os.environ.get("TZ")
+    os.environ["TZ"] = "UTC"
+    time.tzset()
+    try:
+        for scene in scenes:
+            # Scripts load and save scores in the working directory; a
+            # fresh one per scene keeps the scoreboard panel the same
+            with tempfile.TemporaryDirectory(prefix="tug_golden-") as scratch:
+                _prepare_scratch(scratch)
+                os.chdir(scratch)
+                try:
+                    image, stats = render_scene(script, scene, context, size)
+                finally:
+                    os.chdir(cwd)
+            result = {"scene": scene.name, "frame": stats["capture_frame"], "render_ms": stats["render_ms"],
+                      "baseline_ms": timings.get(scene.name), "diff_pixels": 0, "status": "ok", "slow": False}
+            path = os.path.join(golden_dir, scene.name + ".png")
+            if update:
+                os.makedirs(golden_dir, exist_ok=True)
+                write_png(path, image, 9)
+                timings[scene.name] = round(stats["render_ms"], 3)
+                result["status"] = "updated"
+            elif not os.path.exists(path):
+                result["status"] = "missing"
+            else:
+                golden = read_png(path)
+                count, mask = compare(image, golden, threshold)
+                result["diff_pixels"] = count
+                baseline = timings.get(scene.name)
+                result["slow"] = bool(baseline) and stats["render_ms"] > baseline * slow_limit
+                if count > max_diff * mask.size:
+                    result["status"] = "image"
+                    os.makedirs(out_dir, exist_ok=True)
+                    write_png(os.path.join(out_dir, scene.name + "-actual.png"), image)
+                    if golden.shape == image.shape:
+                        write_png(os.path.join(out_dir, scene.name + "-diff.png"), diff_image(image, golden, mask))
+                elif result["slow"] and time_tolerance is not None:
+                    result["status"] = "slow"
+            results.append(result)
+    finally:
+        if tz is None:
+            del os.environ["TZ"]
+        else:
+            os.environ["TZ"] = tz
+        time.tzset()
+        context.close()
+    if update:
+        with open(timings_path, "w", encoding="utf-8") as f:
+            json.dump(timings, f, indent=2, sort_keys=True)
+            f.write("\n")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render fixed scenes and compare them to golden images.")
+    parser.add_argument("--script", default="Sarika.py")
+    parser.add_argument("--scenes", help="comma-separated subset of: " + ", ".join(s.name for s in SCENES))
+    parser.add_argument("--golden", help=f"golden directory (default: {GOLDEN_DIR}/<script>)")
+    parser.add_argument("--out", default=OUT_DIR, help="where failed scenes' images are written")
+    parser.add_argument("--update", action="store_true", help="record new golden images and timings")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--max-diff", type=float, default=DEFAULT_MAX_DIFF, help="fraction of pixels")
+    parser.add_argument("--time-tolerance", type=float, default=None,
+                        help="fail scenes drawn this much slower than recorded, e.g. 0.5 = +50%% "
+                             f"(default: only warn above +{DEFAULT_TIME_TOLERANCE * 100:.0f}%%)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    scenes = SCENES
+    if args.scenes:
+        wanted = args.scenes.split(",")
+        by_name = {s.name: s for s in SCENES}
+        unknown = [n for n in wanted if n not in by_name]
+        if unknown:
+            parser.error("unknown scene(s): " + ", ".join(unknown))
+        scenes = [by_name[n] for n in wanted]
+
+    results = check(args.script, scenes, args.golden, args.out, args.update,
+                    threshold=args.threshold, max_diff=args.max_diff,
+                    time_tolerance=args.time_tolerance)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'scene':<14}{'frame':>6}{'diff px':>9}{'ms':>8}{'baseline':>10}  status")
+        for r in results:
+            baseline = f"{r['baseline_ms']:10.2f}" if r["baseline_ms"] else f"{'-':>10}"
+            slow = " (slow)" if r["slow"] and r["status"] != "slow" else ""
+            print(f"{r['scene']:<14}{r['frame']:>6}{r['diff_pixels']:>9}{r['render_ms']:8.2f}{baseline}  {r['status']}{slow}")
+    failed = [r for r in results if r["status"] not in ("ok", "updated")]
+    slow = [r for r in results if r["slow"] and r["status"] != "slow"]
+    if slow and not args.json:
+        print(f"warning: {len(slow)} scene(s) drawn slower than recorded; timing is not checked "
+              "without --time-tolerance")
+    if failed and not args.json:
+        print(f"{len(failed)} of {len(results)} scenes failed; images in {args.out}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,629 @@
+"""Run the GLUT game scripts without a display.
+
+    python tug_headless.py Sarika.py --frames 600 --keys "0:b,30-/4:a"
+    python Sarika.py --headless --frames 600
+
+An offscreen context is created with OSMesa when libOSMesa is installed,
+otherwise EGL (Mesa's surfaceless platform unless EGL_PLATFORM says
+otherwise). The GLUT entry points the scripts use are replaced by
+stand-ins: window and callback registration just record the callbacks,
+glutMainLoop runs a fixed number of frames against a simulated clock,
+geometry is drawn with plain GL/GLU, and bitmap text uses freeglut's font
+tables through glBitmap exactly as glutBitmapCharacter would. Each frame
+runs the script's own idle() and showScreen(), so the same pipeline is
+rendered, timed and captured as in a window.
+
+The command line runs the script in a temporary working directory seeded
+with a copy of the score file, so scripted rounds never add scores,
+replays or leaderboard rows to the real ones.
+
+The GL platform is chosen when OpenGL is first imported, so this module
+must be imported before anything imports OpenGL (the scripts do this when
+--headless is on the command line).
+"""
+import ctypes
+import ctypes.util
+import os
+import sys
+
+if "OpenGL" not in sys.modules:
+    if "PYOPENGL_PLATFORM" not in os.environ:
+        os.environ["PYOPENGL_PLATFORM"] = "osmesa" if ctypes.util.find_library("OSMesa") else "egl"
+    if os.environ["PYOPENGL_PLATFORM"] == "egl":
+        os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+import argparse  # noqa: E402
+import contextlib  # noqa: E402
+import importlib.util  # noqa: E402
+import json  # noqa: E402
+import re  # noqa: E402
+import shutil  # noqa: E402
+import struct  # noqa: E402
+import tempfile  # noqa: E402
+import time  # noqa: E402
+import zlib  # noqa: E402
+
+import numpy as np  # noqa: E402
+import OpenGL.GLUT as GLUT  # noqa: E402
+from OpenGL.GL import (  # noqa: E402
+    GL_CLIENT_PIXEL_STORE_BIT, GL_FALSE, GL_LINE_LOOP, GL_PACK_ALIGNMENT, GL_QUADS,
+    GL_RGB, GL_UNPACK_ALIGNMENT, GL_UNPACK_LSB_FIRST, GL_UNPACK_ROW_LENGTH, GL_UNPACK_SKIP_PIXELS,
+    GL_UNPACK_SKIP_ROWS, GL_UNPACK_SWAP_BYTES, GL_UNSIGNED_BYTE,
+    glBegin, glBitmap, glEnd, glFinish, glNormal3f, glPixelStorei, glPopClientAttrib,
+    glPushClientAttrib, glReadPixels, glVertex3f,
+)
+
+from tug_clock import GameClock  # noqa: E402
+from tug_profile import percentile  # noqa: E402
+from tug_scores import HIGHSCORE_FILE  # noqa: E402
+
+DEFAULT_SIZE = (1000, 800)
+DEFAULT_FRAMES = 300
+DEFAULT_FPS = 60.0
+
+# Bot on, then the left player pulls every 4th frame
+DEFAULT_KEYS = "0:b,1-/4:a"
+
+_SPECIAL_KEYS = {
+    "up": GLUT.GLUT_KEY_UP, "down": GLUT.GLUT_KEY_DOWN,
+    "left": GLUT.GLUT_KEY_LEFT, "right": GLUT.GLUT_KEY_RIGHT,
+}
+
+# GLUT font handle -> freeglut's exported font table
+_FONT_TABLES = {
+    "GLUT_BITMAP_8_BY_13": "fgFontFixed8x13",
+    "GLUT_BITMAP_9_BY_15": "fgFontFixed9x15",
+    "GLUT_BITMAP_TIMES_ROMAN_10": "fgFontTimesRoman10",
+    "GLUT_BITMAP_TIMES_ROMAN_24": "fgFontTimesRoman24",
+    "GLUT_BITMAP_HELVETICA_10": "fgFontHelvetica10",
+    "GLUT_BITMAP_HELVETICA_12": "fgFontHelvetica12",
+    "GLUT_BITMAP_HELVETICA_18": "fgFontHelvetica18",
+}
+
+
+class _SFGFont(ctypes.Structure):
+    _fields_ = [
+        ("name", ctypes.c_char_p),
+        ("quantity", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("characters", ctypes.POINTER(ctypes.POINTER(ctypes.c_ubyte))),
+        ("xorig", ctypes.c_float),
+        ("yorig", ctypes.c_float),
+    ]
+
+
+# -------------------
+# Offscreen context
+# -------------------
+class HeadlessContext:
+    """An offscreen GL context of width x height made current on creation."""
+
+    def __init__(self, width=DEFAULT_SIZE[0], height=DEFAULT_SIZE[1]):
+        self.width = width
+        self.height = height
+        self.backend = os.environ.get("PYOPENGL_PLATFORM", "")
+        if self.backend == "osmesa":
+            self._create_osmesa()
+        elif self.backend == "egl":
+            self._create_egl()
+        else:
+            raise RuntimeError(
+                f"OpenGL was loaded for platform {self.backend or 'default'!r}; import tug_headless "
+                "before anything imports OpenGL")
+
+    def _create_osmesa(self):
+        from OpenGL import GL, arrays, osmesa
+        self._ctx = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 0, 0, None)
+        if not self._ctx:
+            raise RuntimeError("OSMesaCreateContextExt failed")
+        self.buffer = arrays.GLubyteArray.zeros((self.height, self.width, 4))
+        if not osmesa.OSMesaMakeCurrent(self._ctx, self.buffer, GL.GL_UNSIGNED_BYTE, self.width, self.height):
+            raise RuntimeError("OSMesaMakeCurrent failed")
+
+    def _create_egl(self):
+        from OpenGL import EGL
+        self._display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(self._display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError("eglInitialize failed (is EGL_PLATFORM set to a usable platform?)")
+        attribs = [
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+            EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8, EGL.EGL_ALPHA_SIZE, 8,
+            EGL.EGL_DEPTH_SIZE, 24,
+            EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+            EGL.EGL_NONE,
+        ]
+        config = EGL.EGLConfig()
+        count = EGL.EGLint()
+        if not EGL.eglChooseConfig(self._display, (EGL.EGLint * len(attribs))(*attribs),
+                                   ctypes.pointer(config), 1, ctypes.pointer(count)) or not count.value:
+            raise RuntimeError("no EGL config with an RGBA8 pbuffer and a depth buffer")
+        size = [EGL.EGL_WIDTH, self.width, EGL.EGL_HEIGHT, self.height, EGL.EGL_NONE]
+        self._surface = EGL.eglCreatePbufferSurface(self._display, config, (EGL.EGLint * len(size))(*size))
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        self._ctx = EGL.eglCreateContext(self._display, config, EGL.EGL_NO_CONTEXT, None)
+        if not self._ctx or not EGL.eglMakeCurrent(self._display, self._surface, self._surface, self._ctx):
+            raise RuntimeError("could not make the EGL pbuffer context current")
+        self.buffer = None
+
+    def read_pixels(self, out=None):
+        """The current frame as a top-down (height, width, 3) uint8 array.
+
+        With out, a C-contiguous (height, width, 3) uint8 array (e.g. over
+        shared memory), the pixels are read straight into it bottom row
+        first, as GL stores them, and a flipped view of out is returned.
+        On OSMesa the frame is already in our buffer: without out the
+        result is a view of it, valid until the next frame is drawn.
+        """
+        if self.backend == "osmesa":
+            from OpenGL import osmesa
+            glFinish()
+            view = osmesa.colorBuffer(self._ctx)
+            if out is None:
+                return view.image[..., :3]
+            out[...] = view.image[::-1, :, :3]
+            return out[::-1]
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        if out is None:
+            data = glReadPixels(0, 0, self.width, self.height, GL_RGB, GL_UNSIGNED_BYTE)
+            out = np.frombuffer(data, np.uint8).reshape(self.height, self.width, 3)
+        else:
+            glReadPixels(0, 0, self.width, self.height, GL_RGB, GL_UNSIGNED_BYTE, out)
+        return out[::-1]
+
+    def close(self):
+        if self.backend == "osmesa":
+            from OpenGL import osmesa
+            osmesa.releaseColorBuffer(self._ctx)
+            osmesa.OSMesaDestroyContext(self._ctx)
+        else:
+            from OpenGL import EGL
+            EGL.eglMakeCurrent(self._display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+            EGL.eglDestroySurface(self._display, self._surface)
+            EGL.eglDestroyContext(self._display, self._ctx)
+            EGL.eglTerminate(self._display)
+
+
+# -------------------
+# GLUT stand-ins
+# -------------------
+class VirtualClock:
+    """perf_counter replacement that only moves when the runner says so."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class HeadlessGlut:
+    """Replacements for the GLUT calls the scripts make.
+
+    install() swaps them into OpenGL.GLUT and into every loaded module that
+    imported the originals (the scripts use `from OpenGL.GLUT import *`).
+    glutMainLoop() runs self.frames frames and returns; the first skip of
+    them only run the update, e.g. to fast-forward to a replay segment.
+    """
+
+    NAMES = (
+        "glutInit", "glutInitDisplayMode", "glutInitWindowSize", "glutInitWindowPosition",
+        "glutCreateWindow", "glutDisplayFunc", "glutKeyboardFunc", "glutSpecialFunc",
+        "glutMouseFunc", "glutIdleFunc", "glutTimerFunc", "glutPostRedisplay", "glutMainLoop",
+        "glutSwapBuffers", "glutSolidCube", "glutWireCube", "glutSolidSphere",
+        "glutBitmapCharacter",
+    )
+
+    def __init__(self, context, clock, frames=DEFAULT_FRAMES, fps=DEFAULT_FPS, keys=None, on_frame=None,
+                 skip=0):
+        self.context = context
+        self.clock = clock
+        self.frames = frames
+        self.skip = skip
+        self.fps = fps
+        self.keys = keys if keys is not None else {}
+        self.on_frame = on_frame
+        self.display = self.keyboard = self.special = None
+        self.frame_ms = []
+        self._originals = {}
+        self._fonts = {}
+        self._font_lib = GLUT.platform.PLATFORM.GLUT
+
+    def install(self):
+        for name in self.NAMES:
+            original = getattr(GLUT, name)
+            replacement = getattr(self, name)
+            self._originals[name] = original
+            for module in list(sys.modules.values()):
+                if module is not None and getattr(module, name, None) is original:
+                    setattr(module, name, replacement)
+
+    def uninstall(self):
+        for name, original in self._originals.items():
+            replacement = getattr(self, name)
+            for module in list(sys.modules.values()):
+                if module is not None and getattr(module, name, None) == replacement:
+                    setattr(module, name, original)
+        self._originals.clear()
+
+    # Window and callbacks
+    def glutInit(self, *args):
+        return args
+
+    def glutInitDisplayMode(self, mode):
+        pass
+
+    def glutInitWindowSize(self, width, height):
+        pass
+
+    def glutInitWindowPosition(self, x, y):
+        pass
+
+    def glutCreateWindow(self, title):
+        return 1
+
+    def glutDisplayFunc(self, func):
+        self.display = func
+
+    def glutKeyboardFunc(self, func):
+        self.keyboard = func
+
+    def glutSpecialFunc(self, func):
+        self.special = func
+
+    def glutMouseFunc(self, func):
+        pass
+
+    def glutIdleFunc(self, func):
+        pass
+
+    def glutTimerFunc(self, ms, func, value):
+        pass
+
+    def glutPostRedisplay(self):
+        pass
+
+    def glutSwapBuffers(self):
+        glFinish()
+
+    def glutMainLoop(self):
+        """Run the frames: scripted keys, one frame of game time, idle, display."""
+        game = sys.modules.get(getattr(self.display, "__module__", None))
+        scheduler = getattr(game, "scheduler", None)
+        update = scheduler.update if scheduler is not None else getattr(game, "idle", None)
+        step = 1.0 / self.fps
+        for frame in range(self.frames):
+            for key in self.keys.get(frame, ()):
+                self.press(key)
+            self.clock.now += step
+            if update is not None:
+                update()
+            if frame < self.skip:
+                continue
+            start = time.perf_counter()
+            self.display()
+            self.frame_ms.append((time.perf_counter() - start) * 1000.0)
+            if self.on_frame is not None and self.on_frame(frame):
+                break
+
+    def press(self, key):
+        if key in _SPECIAL_KEYS:
+            if self.special is not None:
+                self.special(_SPECIAL_KEYS[key], 0, 0)
+        elif self.keyboard is not None:
+            self.keyboard(key.encode("latin-1"), 0, 0)
+
+    # Geometry
+    def glutSolidCube(self, size):
+        h = size / 2.0
+        glBegin(GL_QUADS)
+        for normal, corners in _CUBE_FACES:
+            glNormal3f(*normal)
+            for x, y, z in corners:
+                glVertex3f(x * h, y * h, z * h)
+        glEnd()
+
+    def glutWireCube(self, size):
+        h = size / 2.0
+        for _, corners in _CUBE_FACES:
+            glBegin(GL_LINE_LOOP)
+            for x, y, z in corners:
+                glVertex3f(x * h, y * h, z * h)
+            glEnd()
+
+    def glutSolidSphere(self, radius, slices, stacks):
+        from tug_render import quadrics
+        quadrics.sphere(radius, slices, stacks)
+
+    # Text
+    def glutBitmapCharacter(self, font, character):
+        table = self._font(font)
+        if table is None or not 0 <= character < table.quantity:
+            return
+        glyph = table.glyphs.get(character)
+        if glyph is None:
+            face = table.characters[character]
+            width = face[0]
+            data = ctypes.string_at(ctypes.addressof(face.contents) + 1, table.height * ((width + 7) // 8))
+            glyph = table.glyphs[character] = (width, data)
+        width, data = glyph
+        glPushClientAttrib(GL_CLIENT_PIXEL_STORE_BIT)
+        glPixelStorei(GL_UNPACK_SWAP_BYTES, GL_FALSE)
+        glPixelStorei(GL_UNPACK_LSB_FIRST, GL_FALSE)
+        glPixelStorei(GL_UNPACK_ROW_LENGTH, 0)
+        glPixelStorei(GL_UNPACK_SKIP_ROWS, 0)
+        glPixelStorei(GL_UNPACK_SKIP_PIXELS, 0)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glBitmap(width, table.height, table.xorig, table.yorig, float(width), 0.0, data)
+        glPopClientAttrib()
+
+    def _font(self, font):
+        key = id(font)
+        if key not in self._fonts:
+            table = None
+            for const, symbol in _FONT_TABLES.items():
+                if self._font_lib is not None and getattr(GLUT, const) is font:
+                    table = _SFGFont.in_dll(self._font_lib, symbol)
+                    table.glyphs = {}
+                    break
+            self._fonts[key] = table
+        return self._fonts[key]
+
+
+_CUBE_FACES = (
+    ((0, 0, 1), ((-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1))),
+    ((0, 0, -1), ((-1, -1, -1), (-1, 1, -1), (1, 1, -1), (1, -1, -1))),
+    ((1, 0, 0), ((1, -1, -1), (1, 1, -1), (1, 1, 1), (1, -1, 1))),
+    ((-1, 0, 0), ((-1, -1, -1), (-1, -1, 1), (-1, 1, 1), (-1, 1, -1))),
+    ((0, 1, 0), ((-1, 1, -1), (-1, 1, 1), (1, 1, 1), (1, 1, -1))),
+    ((0, -1, 0), ((-1, -1, -1), (1, -1, -1), (1, -1, 1), (-1, -1, 1))),
+)
+
+
+# -------------------
+# Running a script
+# -------------------
+def parse_keys(spec):
+    """'0:b,10:a,20-200/4:a,30-/2:l' -> {frame: [key, ...]}.
+
+    START-END/STEP repeats a key (END empty = until the last frame); keys
+    are single characters or up/down/left/right for the arrow keys.
+    """
+    schedule = {}
+    repeats = []
+    for token in re.split(r"[,\s]+", spec.strip()):
+        if not token:
+            continue
+        frames, _, key = token.partition(":")
+        if not key:
+            raise ValueError(f"bad key event {token!r}, expected FRAME:KEY")
+        m = re.fullmatch(r"(\d+)(?:-(\d*)(?:/(\d+))?)?", frames)
+        if m is None:
+            raise ValueError(f"bad frame spec {frames!r}")
+        start = int(m.group(1))
+        if m.group(2) is None:
+            schedule.setdefault(start, []).append(key)
+        else:
+            end = int(m.group(2)) if m.group(2) else None
+            repeats.append((start, end, int(m.group(3) or 1), key))
+    return _Schedule(schedule, repeats)
+
+
+class _Schedule(dict):
+    """Key schedule with open-ended repeats resolved on lookup."""
+
+    def __init__(self, single, repeats):
+        super().__init__(single)
+        self.repeats = repeats
+
+    def get(self, frame, default=()):
+        keys = list(super().get(frame, ()))
+        for start, end, step, key in self.repeats:
+            if frame >= start and (end is None or frame <= end) and (frame - start) % step == 0:
+                keys.append(key)
+        return keys or default
+
+
+def load_script(path):
+    """Import a game script by path (the file names are not valid module names)."""
+    name = "tug_game_" + re.sub(r"\W", "_", os.path.splitext(os.path.basename(path))[0])
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@contextlib.contextmanager
+def scratch_cwd(prefix="tug_headless-", copy=(HIGHSCORE_FILE,)):
+    """Run the body in a temporary working directory.
+
+    The scripts keep scores, round replays and the leaderboard database in
+    the working directory. The files named in copy are copied in so the
+    HUD shows the same history, and nothing a scripted round writes
+    reaches the originals.
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix=prefix) as scratch:
+        for name in copy:
+            if os.path.exists(name):
+                shutil.copy(name, scratch)
+        os.chdir(scratch)
+        try:
+            yield scratch
+        finally:
+            os.chdir(cwd)
+
+
+def settle(game, timeout=5.0):
+    """Wait for a script's background score and leaderboard threads, so
+    their writes land before the working directory changes back."""
+    writer = getattr(game, "score_writer", None)
+    if writer is not None:
+        writer.flush(timeout)
+    board = getattr(game, "leaderboard", None)
+    if board is not None and hasattr(board, "wait"):
+        board.wait(timeout)
+
+
+def write_png(path, pixels, level=6):
+    """Write a top-down (h, w, 3) or (h, w, 4) uint8 array as PNG.
+
+    level is the zlib level: 1 is several times faster, 9 a little smaller.
+    """
+    height, width, channels = pixels.shape
+    color_type = {3: 2, 4: 6}[channels]
+    raw = np.empty((height, 1 + width * channels), np.uint8)
+    raw[:, 0] = 0
+    raw[:, 1:] = pixels.reshape(height, width * channels)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw.tobytes(), level)))
+        f.write(chunk(b"IEND", b""))
+
+
+def read_png(path):
+    """Read an 8-bit RGB/RGBA PNG as a top-down (h, w, channels) uint8 array.
+
+    Covers what write_png() produces and the None/Sub/Up row filters most
+    encoders use on such images; anything else raises ValueError.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        raise ValueError(f"{path}: not a PNG file")
+    pos, idat, header = 8, [], None
+    while pos < len(data):
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", body)
+        elif kind == b"IDAT":
+            idat.append(body)
+        pos += 12 + length
+    width, height, depth, color_type, _, _, interlace = header
+    if depth != 8 or color_type not in (2, 6) or interlace:
+        raise ValueError(f"{path}: only 8-bit non-interlaced RGB/RGBA PNGs are supported")
+    channels = 3 if color_type == 2 else 4
+    raw = np.frombuffer(zlib.decompress(b"".join(idat)), np.uint8).reshape(height, 1 + width * channels)
+    rows = raw[:, 1:].copy()
+    for y, kind in enumerate(raw[:, 0]):
+        if kind == 1:      # Sub: running sum along the row, per channel
+            row = rows[y].reshape(width, channels)
+            row[:] = np.cumsum(row, axis=0, dtype=np.uint8)
+        elif kind == 2:    # Up
+            if y:
+                rows[y] += rows[y - 1]
+        elif kind != 0:
+            raise ValueError(f"{path}: PNG row filter {kind} is not supported")
+    return rows.reshape(height, width, channels)
+
+
+def run(game, frames=DEFAULT_FRAMES, fps=DEFAULT_FPS, keys=DEFAULT_KEYS, size=DEFAULT_SIZE,
+        on_frame=None, context=None, skip=0, setup=None):
+    """Render frames of game (a script path or an imported script module).
+
+    keys is a parse_keys() spec or schedule. on_frame(frame, context) is
+    called after each drawn frame, e.g. to capture pixels, and ends the
+    run early by returning True; frames before skip are simulated but not
+    drawn. setup(game) runs after the script is loaded and before its
+    main(). Returns a stats dict (plus the raw "frame_ms" list).
+    """
+    own_context = context is None
+    if own_context:
+        context = HeadlessContext(*size)
+    clock = VirtualClock()
+    schedule = parse_keys(keys) if isinstance(keys, str) else keys
+    glut = HeadlessGlut(context, clock, frames, fps, schedule,
+                        on_frame=(lambda frame: on_frame(frame, context)) if on_frame else None, skip=skip)
+    glut.install()
+    try:
+        if isinstance(game, str):
+            game = load_script(game)
+        if hasattr(game, "game_clock"):
+            game.game_clock = GameClock(clock=clock)
+        if setup is not None:
+            setup(game)
+        start = time.perf_counter()
+        game.main()
+        wall = time.perf_counter() - start
+    finally:
+        glut.uninstall()
+        if own_context:
+            release_buffers()
+            context.close()
+    ms = sorted(glut.frame_ms)
+    return {
+        "script": getattr(game, "__file__", str(game)),
+        "backend": context.backend,
+        "frames": len(ms),
+        "wall_s": wall,
+        "mean_ms": sum(ms) / len(ms) if ms else 0.0,
+        "p50_ms": percentile(ms, 50),
+        "p95_ms": percentile(ms, 95),
+        "p99_ms": percentile(ms, 99),
+        "max_ms": ms[-1] if ms else 0.0,
+        "frame_ms": glut.frame_ms,
+    }
+
+
+def release_buffers():
+    """Delete live VBOs while the context is current; left to their
+    finalizers they call into GL during interpreter shutdown."""
+    from OpenGL.arrays import vbo
+    for ref in list(vbo.Implementation._DELETERS_.values()):
+        buffer = ref()
+        if buffer is not None:
+            buffer.delete()
+
+
+def main(argv=None, game=None):
+    parser = argparse.ArgumentParser(description="Render a game script offscreen.")
+    if game is None:
+        parser.add_argument("script", help="game script, e.g. Sarika.py")
+    parser.add_argument("--headless", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES)
+    parser.add_argument("--fps", type=float, default=DEFAULT_FPS, help="simulated frames per second")
+    parser.add_argument("--keys", default=DEFAULT_KEYS, help=f"scripted input (default {DEFAULT_KEYS!r})")
+    parser.add_argument("--size", default="%dx%d" % DEFAULT_SIZE, help="WIDTHxHEIGHT")
+    parser.add_argument("--save", metavar="DIR", help="write frames as PNG into DIR")
+    parser.add_argument("--every", type=int, default=0, help="with --save, every Nth frame (default: last only)")
+    parser.add_argument("--json", action="store_true", help="print the stats as JSON")
+    args = parser.parse_args(argv)
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    save = os.path.abspath(args.save) if args.save else None
+    loaded = []
+
+    def save_frame(frame, context):
+        if frame == args.frames - 1 or (args.every and frame % args.every == 0):
+            write_png(os.path.join(save, f"frame{frame:06d}.png"), context.read_pixels())
+
+    if save:
+        os.makedirs(save, exist_ok=True)
+    script = game if game is not None else os.path.abspath(args.script)
+    # A scripted round must not add to the real score history or replays
+    with scratch_cwd():
+        try:
+            stats = run(script, args.frames, args.fps, args.keys, (width, height),
+                        save_frame if save else None, setup=loaded.append)
+        finally:
+            for module in loaded:
+                settle(module)
+    if args.json:
+        print(json.dumps({k: v for k, v in stats.items() if k != "frame_ms"}, indent=2))
+    else:
+        print(f"{stats['script']}: {stats['frames']} frames on {stats['backend']} in {stats['wall_s']:.2f}s  "
+              f"mean {stats['mean_ms']:.2f} ms  p50 {stats['p50_ms']:.2f}  p95 {stats['p95_ms']:.2f}  "
+              f"p99 {stats['p99_ms']:.2f}")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""HUD text for the GLUT game scripts.
+
+draw_text() used to set up an orthographic projection and call
+glutBitmapCharacter once per character for every line on every frame.
+HudText compiles each font's glyphs into display lists once, and each HUD
+line into its own list (color, raster position, one glCallLists over the
+glyphs) that is only recompiled when the line's text changes. Inside a
+begin()/end() pass the 2D matrices are set up once for all lines.
+
+HudLayer goes one step further for content that changes a few times per
+round: regions are drawn into an offscreen texture, only when their key
+changes, and the whole overlay is composited with one textured quad.
+"""
+from OpenGL.GL import (
+    GL_BLEND, GL_COLOR_BUFFER_BIT, GL_COMPILE, GL_CURRENT_BIT, GL_DEPTH_TEST, GL_ENABLE_BIT,
+    GL_LIGHTING, GL_MODELVIEW, GL_NEAREST, GL_ONE, GL_ONE_MINUS_SRC_ALPHA, GL_PROJECTION, GL_QUADS,
+    GL_RGBA, GL_RGBA8, GL_SCISSOR_BIT, GL_SCISSOR_TEST, GL_TEXTURE_2D, GL_TEXTURE_BIT,
+    GL_TEXTURE_MAG_FILTER, GL_TEXTURE_MIN_FILTER, GL_UNSIGNED_BYTE, GL_VIEWPORT_BIT,
+    glBegin, glBindTexture, glBlendFunc, glCallList, glCallLists, glClear, glClearColor,
+    glColor3f, glColor4f, glDeleteLists, glDeleteTextures, glDisable, glEnable, glEnd, glEndList,
+    glGenLists, glGenTextures, glGetIntegerv, glListBase, glLoadIdentity, glMatrixMode, glNewList,
+    glPopAttrib, glPopMatrix, glPushAttrib, glPushMatrix, glRasterPos2f, glScissor, glTexCoord2f,
+    glTexImage2D, glTexParameteri, glVertex2f, glViewport,
+)
+from OpenGL.GL.framebufferobjects import (
+    GL_COLOR_ATTACHMENT0, GL_FRAMEBUFFER, GL_FRAMEBUFFER_BINDING, GL_FRAMEBUFFER_COMPLETE,
+    glBindFramebuffer, glCheckFramebufferStatus, glDeleteFramebuffers, glFramebufferTexture2D,
+    glGenFramebuffers,
+)
+from OpenGL.GLU import gluOrtho2D
+from OpenGL.GLUT import GLUT_BITMAP_HELVETICA_18, glutBitmapCharacter
+
+WHITE = (1.0, 1.0, 1.0)
+
+
+class HudText:
+    """Cached bitmap-font lines in window coordinates (origin bottom-left).
+
+    Lines are keyed by (x, y, font): a slot whose text and color match the
+    last frame is a single glCallList. GLUT font handles are ctypes
+    pointers, which are unhashable, so fonts are keyed by id() like the
+    quadrics in tug_render.
+    """
+
+    def __init__(self, width=1000, height=800):
+        self.width = width
+        self.height = height
+        self._glyphs = {}        # id(font) -> base of 256 glyph lists
+        self._lines = {}         # (x, y, id(font)) -> [text, color, list]
+        self._in_pass = False
+        self.compiled = 0        # line recompiles since start
+
+    def begin(self):
+        """Set up the 2D projection for the following text() calls."""
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        gluOrtho2D(0, self.width, 0, self.height)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+        self._in_pass = True
+
+    def end(self):
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        self._in_pass = False
+
+    def text(self, x, y, text, font=GLUT_BITMAP_HELVETICA_18, color=WHITE):
+        """Draw one line; outside a pass it sets up its own projection."""
+        own_pass = not self._in_pass
+        if own_pass:
+            self.begin()
+        key = (x, y, id(font))
+        line = self._lines.get(key)
+        if line is None or line[0] != text or line[1] != color:
+            line = self._compile(key, line, text, color, font)
+        glCallList(line[2])
+        if own_pass:
+            self.end()
+
+    def delete(self):
+        for line in self._lines.values():
+            glDeleteLists(line[2], 1)
+        for base in self._glyphs.values():
+            glDeleteLists(base, 256)
+        self._lines.clear()
+        self._glyphs.clear()
+
+    def _glyph_base(self, font):
+        base = self._glyphs.get(id(font))
+        if base is None:
+            base = glGenLists(256)
+            for code in range(256):
+                glNewList(base + code, GL_COMPILE)
+                glutBitmapCharacter(font, code)
+                glEndList()
+            self._glyphs[id(font)] = base
+        return base
+
+    def _compile(self, key, line, text, color, font):
+        x, y = key[0], key[1]
+        base = self._glyph_base(font)  # must exist before glNewList below
+        lst = line[2] if line is not None else glGenLists(1)
+        glNewList(lst, GL_COMPILE)
+        glColor3f(*color)
+        glRasterPos2f(x, y)
+        glListBase(base)
+        glCallLists(text.encode("latin-1", "replace"))
+        glEndList()
+        line = self._lines[key] = [text, color, lst]
+        self.compiled += 1
+        return line
+
+
+# One per process, like tug_render.quadrics
+hud = HudText()
+
+
+class _Region:
+    __slots__ = ("rect", "key", "draw", "args", "dirty")
+
+    def __init__(self, rect):
+        self.rect = rect
+        self.key = self.draw = None
+        self.args = ()
+        self.dirty = True
+
+
+class HudLayer:
+    """HUD overlay cached in a texture and redrawn per region on change.
+
+    Every frame, call region() for each part of the overlay, then draw().
+    A region is redrawn (scissored to its rect, inside a HudText pass) only
+    when its key differs from the previous frame; otherwise draw() is one
+    textured quad. Regions must not overlap, and anything a region draws
+    outside its rect is clipped. Without framebuffer objects every region
+    is drawn directly each frame.
+    """
+
+    def __init__(self, text=hud, width=1000, height=800):
+        self.text = text
+        self.width = width
+        self.height = height
+        self._regions = {}
+        self._fbo = self._tex = self._quad = None
+        self.supported = None    # known after the first draw()
+        self.redraws = 0         # region redraws since start
+
+    def region(self, name, rect, key, draw, *args):
+        """Declare region name at rect (x, y, w, h), drawn by draw(*args).
+
+        The region is marked dirty when key changes; pass something cheap
+        to compare, e.g. the values shown or a store's version counter.
+        """
+        reg = self._regions.get(name)
+        if reg is None:
+            reg = self._regions[name] = _Region(rect)
+        elif reg.key != key or reg.rect != rect:
+            reg.dirty = True
+        reg.rect, reg.key, reg.draw, reg.args = rect, key, draw, args
+
+    def invalidate(self, name=None):
+        """Force one region, or all of them, to be redrawn."""
+        for reg_name, reg in self._regions.items():
+            if name is None or reg_name == name:
+                reg.dirty = True
+
+    def draw(self):
+        if self.supported is None:
+            self.supported = self._create()
+        if not self.supported:
+            self.text.begin()
+            for reg in self._regions.values():
+                reg.draw(*reg.args)
+            self.text.end()
+            return
+        dirty = [reg for reg in self._regions.values() if reg.dirty]
+        if dirty:
+            self._redraw(dirty)
+        glCallList(self._quad)
+
+    def delete(self):
+        if self._quad is not None:
+            glDeleteLists(self._quad, 1)
+        if self._fbo is not None:
+            glDeleteFramebuffers(1, [self._fbo])
+            glDeleteTextures([self._tex])
+        self._fbo = self._tex = self._quad = None
+        self.supported = None
+        self.invalidate()
+
+    def _create(self):
+        if not bool(glGenFramebuffers):
+            return False
+        self._tex = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self._tex)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA8, self.width, self.height, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        previous = glGetIntegerv(GL_FRAMEBUFFER_BINDING)
+        self._fbo = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self._fbo)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self._tex, 0)
+        complete = glCheckFramebufferStatus(GL_FRAMEBUFFER) == GL_FRAMEBUFFER_COMPLETE
+        if complete:
+            glPushAttrib(GL_COLOR_BUFFER_BIT)
+            glClearColor(0.0, 0.0, 0.0, 0.0)
+            glClear(GL_COLOR_BUFFER_BIT)
+            glPopAttrib()
+        glBindFramebuffer(GL_FRAMEBUFFER, previous)
+        if not complete:
+            glDeleteFramebuffers(1, [self._fbo])
+            glDeleteTextures([self._tex])
+            self._fbo = self._tex = None
+            return False
+
+        # The composite pass: premultiplied blend of the texture over the frame
+        self._quad = glGenLists(1)
+        glNewList(self._quad, GL_COMPILE)
+        glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT | GL_TEXTURE_BIT | GL_CURRENT_BIT)
+        glDisable(GL_DEPTH_TEST)
+        glDisable(GL_LIGHTING)
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, self._tex)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_ONE, GL_ONE_MINUS_SRC_ALPHA)
+        glColor4f(1.0, 1.0, 1.0, 1.0)
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+        glBegin(GL_QUADS)
+        glTexCoord2f(0, 0); glVertex2f(-1, -1)
+        glTexCoord2f(1, 0); glVertex2f(1, -1)
+        glTexCoord2f(1, 1); glVertex2f(1, 1)
+        glTexCoord2f(0, 1); glVertex2f(-1, 1)
+        glEnd()
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPopAttrib()
+        glEndList()
+        return True
+
+    def _redraw(self, dirty):
+        previous = glGetIntegerv(GL_FRAMEBUFFER_BINDING)
+        glBindFramebuffer(GL_FRAMEBUFFER, self._fbo)
+        glPushAttrib(GL_VIEWPORT_BIT | GL_SCISSOR_BIT | GL_COLOR_BUFFER_BIT | GL_ENABLE_BIT | GL_CURRENT_BIT)
+        glViewport(0, 0, self.width, self.height)
+        glDisable(GL_DEPTH_TEST)
+        glDisable(GL_LIGHTING)
+        glDisable(GL_BLEND)
+        glEnable(GL_SCISSOR_TEST)
+        glClearColor(0.0, 0.0, 0.0, 0.0)
+        self.text.begin()
+        for reg in dirty:
+            glScissor(*reg.rect)
+            glClear(GL_COLOR_BUFFER_BIT)
+            reg.draw(*reg.args)
+            reg.dirty = False
+        self.text.end()
+        glPopAttrib()
+        glBindFramebuffer(GL_FRAMEBUFFER, previous)
+        self.redraws += len(dirty)
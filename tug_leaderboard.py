@@ -0,0 +1,380 @@
+"""SQLite leaderboard built from tug_highscores.jsonl.
+
+The JSONL file stays the place the game appends to. Leaderboard imports
+it incrementally (it remembers how far each file was read) into an indexed
+table, and keeps one summary row per play session. Totals are sums over
+the session rows and best margins / fastest wins are index lookups, so
+queries stay in the millisecond range with millions of rounds.
+
+LeaderboardWorker runs the import and a summary query on a background
+thread, so a game loop only reads the finished result.
+
+    python tug_leaderboard.py --import tug_highscores.jsonl
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from tug_scores import HIGHSCORE_FILE, decode_line, score_row
+
+LEADERBOARD_DB = "tug_leaderboard.db"
+
+# A gap longer than this between two rounds starts a new session
+SESSION_GAP = 30 * 60.0
+
+# bytes parsed per import step
+_IMPORT_CHUNK = 1 << 20
+
+# skipped lines whose position and error are kept per import
+_SKIPPED_KEPT = 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rounds (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    winner TEXT,
+    tug_at_end INTEGER NOT NULL,
+    left_presses INTEGER NOT NULL,
+    right_presses INTEGER NOT NULL,
+    round_duration REAL NOT NULL,
+    session INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rounds_time ON rounds (time);
+CREATE INDEX IF NOT EXISTS rounds_winner_tug ON rounds (winner, tug_at_end);
+CREATE INDEX IF NOT EXISTS rounds_winner_duration ON rounds (winner, round_duration);
+CREATE INDEX IF NOT EXISTS rounds_session ON rounds (session);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    rounds INTEGER NOT NULL,
+    a_wins INTEGER NOT NULL,
+    l_wins INTEGER NOT NULL,
+    ties INTEGER NOT NULL,
+    left_presses INTEGER NOT NULL,
+    right_presses INTEGER NOT NULL,
+    play_time REAL NOT NULL,
+    best_margin INTEGER NOT NULL,
+    fastest_win REAL
+);
+
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    inode INTEGER NOT NULL,
+    offset INTEGER NOT NULL
+);
+"""
+
+_ROUND_COLUMNS = "time, winner, tug_at_end, left_presses, right_presses, round_duration, session"
+_SESSION_COLUMNS = ("id", "start", "end", "rounds", "a_wins", "l_wins", "ties", "left_presses",
+                    "right_presses", "play_time", "best_margin", "fastest_win")
+
+
+class Leaderboard:
+    """Indexed score history with aggregate queries."""
+
+    def __init__(self, path=LEADERBOARD_DB, session_gap=SESSION_GAP):
+        self.path = path
+        self.session_gap = session_gap
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self._session = self._last_session()
+        self.skipped = 0             # unreadable lines passed over by the last import
+        self.skipped_lines = deque(maxlen=_SKIPPED_KEPT)  # their (path, offset, error), newest kept
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------------------
+    # Import
+    # -------------------
+    def import_jsonl(self, path=HIGHSCORE_FILE):
+        """Add the rounds appended to path since the last import.
+
+        Returns the number of rounds added. A file that was replaced or
+        truncated is read again from the start. Lines may hold several
+        entries (see tug_scores.decode_line). A line that is not a valid
+        score entry, e.g. a torn append, is skipped and counted in skipped
+        and skipped_lines; the import carries on after it, and the next
+        import does not read it again.
+        """
+        self.skipped = 0
+        self.skipped_lines.clear()
+        try:
+            st = os.stat(path)
+        except OSError:
+            return 0
+        key = os.path.abspath(path)
+        row = self.conn.execute("SELECT inode, offset FROM sources WHERE path = ?", (key,)).fetchone()
+        offset = 0
+        if row is not None and row["inode"] == st.st_ino and row["offset"] <= st.st_size:
+            offset = row["offset"]
+        if offset == st.st_size and row is not None:
+            return 0
+
+        added = 0
+        with self.conn, open(path, "rb") as f:
+            f.seek(offset)
+            rest = b""
+            while True:
+                chunk = f.read(_IMPORT_CHUNK)
+                if not chunk:
+                    break
+                data = rest + chunk
+                end = data.rfind(b"\n")
+                if end < 0:
+                    rest = data
+                    continue
+                rest = data[end + 1:]
+                rows = []
+                pos = 0
+                for line in data[:end].split(b"\n"):
+                    if line.strip():
+                        try:
+                            rows += [score_row(e) for e in decode_line(line)]
+                        except ValueError as e:
+                            self.skipped += 1
+                            self.skipped_lines.append((path, offset + pos, str(e)))
+                    pos += len(line) + 1
+                added += self._insert(rows)
+                offset += pos
+            self.conn.execute("INSERT OR REPLACE INTO sources (path, inode, offset) VALUES (?, ?, ?)",
+                              (key, st.st_ino, offset))
+        return added
+
+    def add(self, entry):
+        """Record a single round entry; ValueError if it is not one."""
+        with self.conn:
+            self._insert([score_row(entry)])
+
+    def _insert(self, rows):
+        out = []
+        session = self._session
+        for r in rows:
+            t, winner, tug, lp, rp, dur = r
+            if session is None or t - session["end"] > self.session_gap:
+                if session is not None:
+                    self._save_session(session)
+                next_id = 1 if session is None else session["id"] + 1
+                session = dict(id=next_id, start=t, end=t, rounds=0, a_wins=0, l_wins=0, ties=0,
+                               left_presses=0, right_presses=0, play_time=0.0,
+                               best_margin=0, fastest_win=None)
+            session["end"] = max(session["end"], t)
+            session["rounds"] += 1
+            if winner == "A":
+                session["a_wins"] += 1
+            elif winner == "L":
+                session["l_wins"] += 1
+            else:
+                session["ties"] += 1
+            session["left_presses"] += lp
+            session["right_presses"] += rp
+            session["play_time"] += dur
+            if winner is not None:
+                session["best_margin"] = max(session["best_margin"], abs(tug))
+                if session["fastest_win"] is None or dur < session["fastest_win"]:
+                    session["fastest_win"] = dur
+            out.append(r + (session["id"],))
+        if not out:
+            return 0
+        self.conn.executemany(f"INSERT INTO rounds ({_ROUND_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", out)
+        self._save_session(session)
+        self._session = session
+        return len(out)
+
+    def _save_session(self, session):
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO sessions ({', '.join(_SESSION_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(_SESSION_COLUMNS))})",
+            tuple(session[c] for c in _SESSION_COLUMNS))
+
+    def _last_session(self):
+        row = self.conn.execute("SELECT * FROM sessions ORDER BY id DESC LIMIT 1").fetchone()
+        return dict(row) if row is not None else None
+
+    # -------------------
+    # Queries
+    # -------------------
+    def win_rates(self, since=None, until=None):
+        """Round count and A/L/tie rates, optionally for a time range."""
+        if since is None and until is None:
+            row = self.conn.execute(
+                "SELECT COALESCE(SUM(rounds), 0) AS n, COALESCE(SUM(a_wins), 0) AS a, "
+                "COALESCE(SUM(l_wins), 0) AS l, COALESCE(SUM(ties), 0) AS ties FROM sessions").fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT COUNT(*) AS n, COALESCE(SUM(winner = 'A'), 0) AS a, "
+                "COALESCE(SUM(winner = 'L'), 0) AS l, COALESCE(SUM(winner IS NULL), 0) AS ties "
+                "FROM rounds WHERE time >= ? AND time < ?",
+                (since if since is not None else float("-inf"),
+                 until if until is not None else float("inf"))).fetchone()
+        n = row["n"]
+        return {
+            "rounds": n,
+            "win_rate_A": row["a"] / n if n else 0.0,
+            "win_rate_L": row["l"] / n if n else 0.0,
+            "tie_rate": row["ties"] / n if n else 0.0,
+        }
+
+    def best_margins(self, limit=10):
+        """Wins with the largest |tug_at_end|, biggest first."""
+        rows = self.conn.execute(
+            "SELECT * FROM (SELECT * FROM rounds WHERE winner = 'A' ORDER BY tug_at_end DESC LIMIT ?) "
+            "UNION ALL "
+            "SELECT * FROM (SELECT * FROM rounds WHERE winner = 'L' ORDER BY tug_at_end ASC LIMIT ?)",
+            (limit, limit)).fetchall()
+        rows = sorted((dict(r) for r in rows), key=lambda r: (-abs(r["tug_at_end"]), r["time"]))
+        return rows[:limit]
+
+    def fastest_wins(self, limit=10, winner=None):
+        """Wins with the shortest round_duration, for one side or both."""
+        sides = (winner,) if winner is not None else ("A", "L")
+        rows = []
+        for side in sides:
+            rows += self.conn.execute(
+                "SELECT * FROM rounds WHERE winner = ? ORDER BY round_duration LIMIT ?",
+                (side, limit)).fetchall()
+        rows = sorted((dict(r) for r in rows), key=lambda r: (r["round_duration"], r["time"]))
+        return rows[:limit]
+
+    def recent(self, limit=5):
+        """Newest rounds first."""
+        return [dict(r) for r in self.conn.execute(
+            "SELECT * FROM rounds ORDER BY time DESC LIMIT ?", (limit,))]
+
+    def sessions(self, limit=None):
+        """Per-session aggregates, newest first."""
+        sql = "SELECT * FROM sessions ORDER BY id DESC"
+        args = ()
+        if limit is not None:
+            sql += " LIMIT ?"
+            args = (limit,)
+        return [dict(r) for r in self.conn.execute(sql, args)]
+
+    def session_rounds(self, session_id):
+        return [dict(r) for r in self.conn.execute(
+            "SELECT * FROM rounds WHERE session = ? ORDER BY time", (session_id,))]
+
+    def count(self):
+        return self.conn.execute("SELECT COALESCE(SUM(rounds), 0) FROM sessions").fetchone()[0]
+
+
+class LeaderboardWorker:
+    """Keeps summarize(board) of a Leaderboard up to date off the caller's thread.
+
+    Nothing is opened until the first refresh(): the thread then creates
+    the database, imports jsonl and stores summarize(board) in result.
+    Later refresh() calls only queue another import + summary, so a frame
+    never waits on SQLite. wait() blocks until the queued work is done.
+    """
+
+    def __init__(self, summarize, jsonl=HIGHSCORE_FILE, db=LEADERBOARD_DB):
+        self.summarize = summarize
+        self.jsonl = jsonl
+        self.db = db
+        self.result = None
+        self._errors = deque(maxlen=100)
+        self._cond = threading.Condition()
+        self._requested = self._done = 0
+        self._thread = None
+
+    def refresh(self):
+        """Queue an import and a new summary; returns at once."""
+        with self._cond:
+            self._requested += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="leaderboard", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def wait(self, timeout=None):
+        """Block until every refresh() so far has finished; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._done >= self._requested, timeout)
+
+    def errors(self):
+        """Return and clear the errors collected so far."""
+        errs = []
+        while self._errors:
+            errs.append(self._errors.popleft())
+        return errs
+
+    def _run(self):
+        board = None
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._requested > self._done)
+                target = self._requested
+            try:
+                if board is None:
+                    board = Leaderboard(self.db)
+                board.import_jsonl(self.jsonl)
+                for path, offset, error in board.skipped_lines:
+                    self._errors.append(f"{path}: skipped unreadable line at byte {offset}: {error}")
+                self.result = self.summarize(board)
+            except Exception as e:
+                # summarize() is the caller's code; whatever it raises must
+                # not end the thread and leave wait() blocked
+                self._errors.append(f"leaderboard not updated: {e!r}")
+            finally:
+                with self._cond:
+                    self._done = target
+                    self._cond.notify_all()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=LEADERBOARD_DB)
+    parser.add_argument("--import", dest="sources", nargs="*", default=[HIGHSCORE_FILE],
+                        help="JSONL score files to import first")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with Leaderboard(args.db) as board:
+        start = time.perf_counter()
+        added = 0
+        for path in args.sources:
+            added += board.import_jsonl(path)
+            if board.skipped:
+                print(f"{path}: skipped {board.skipped} unreadable line(s)")
+                for _, offset, error in board.skipped_lines:
+                    print(f"  byte {offset}: {error}")
+        print(f"imported {added} rounds in {time.perf_counter() - start:.2f}s, {board.count()} total")
+
+        start = time.perf_counter()
+        rates = board.win_rates()
+        margins = board.best_margins(args.top)
+        fastest = board.fastest_wins(args.top)
+        sessions = board.sessions(args.top)
+        elapsed = (time.perf_counter() - start) * 1000.0
+
+    print(f"A {rates['win_rate_A']:.3f}  L {rates['win_rate_L']:.3f}  tie {rates['tie_rate']:.3f}")
+    print("Best margins:")
+    for r in margins:
+        print(f"  {time.strftime('%Y-%m-%d %H:%M', time.localtime(r['time']))}  W:{r['winner']} tug:{r['tug_at_end']}")
+    print("Fastest wins:")
+    for r in fastest:
+        print(f"  {time.strftime('%Y-%m-%d %H:%M', time.localtime(r['time']))}  W:{r['winner']} {r['round_duration']:.2f}s")
+    print("Sessions:")
+    for s in sessions:
+        print(f"  #{s['id']} {time.strftime('%Y-%m-%d %H:%M', time.localtime(s['start']))}  "
+              f"{s['rounds']} rounds  A:{s['a_wins']} L:{s['l_wins']}  best margin {s['best_margin']}")
+    print(f"queries took {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
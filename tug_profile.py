@@ -0,0 +1,263 @@
+"""Per-frame timing for the GLUT game scripts.
+
+FrameProfiler splits each frame into named sections with perf_counter laps
+(camera, scene, players, rope, hud, swap, ...), keeps a short history for
+an on-screen graph with p50/p95/p99, and can stream every frame's section
+timings to a JSONL file. Two such files are compared offline with
+
+    python tug_profile.py before.jsonl after.jsonl
+
+Timings are CPU time spent issuing each section; GL runs asynchronously,
+so pass sync=True to glFinish() at every lap when the GPU side matters.
+"""
+import argparse
+import atexit
+import json
+import math
+import time
+from collections import deque
+
+from OpenGL.GL import (
+    GL_DEPTH_TEST, GL_ENABLE_BIT, GL_LIGHTING, GL_LINE_STRIP, GL_LINES, GL_TEXTURE_2D,
+    glBegin, glColor3f, glDisable, glEnd, glFinish, glPopAttrib, glPushAttrib, glVertex2f,
+)
+
+from tug_hud import hud
+
+# Frames kept for the graph and the live percentiles
+HISTORY = 240
+
+# Overlay text is rebuilt at most this often (seconds) so it stays readable
+# and does not recompile HUD lines every frame
+OVERLAY_REFRESH = 0.5
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted sequence (q in 0..100)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(q / 100.0 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+class FrameProfiler:
+    """Lap timer for showScreen()/idle() sections.
+
+        profiler.begin_frame()
+        setupCamera();  profiler.lap("camera")
+        ...
+        glutSwapBuffers();  profiler.lap("swap")
+        profiler.end_frame()
+
+    Work outside the frame (idle()) is timed through timed(), and is added
+    to the next recorded frame.
+    """
+
+    def __init__(self, history=HISTORY, sync=False, clock=time.perf_counter):
+        self.clock = clock
+        self.sync = sync
+        self.show = False
+        self.frames = 0
+        self.work = deque(maxlen=history)        # ms spent in each frame
+        self.interval = deque(maxlen=history)    # ms between frame starts
+        self._sections = {}
+        self.last_sections = {}                  # seconds per section, last full frame
+        self._outside = {}
+        self._start = self._last = None
+        self._prev_start = None
+        self._log = None
+        self.log_path = None
+        self._atexit = False
+        self._overlay_lines = []
+        self._overlay_at = 0.0
+
+    # -------------------
+    # Recording
+    # -------------------
+    def begin_frame(self):
+        now = self.clock()
+        if self._prev_start is not None:
+            self.interval.append((now - self._prev_start) * 1000.0)
+        self._prev_start = self._start = self._last = now
+        self._sections = {}
+
+    def lap(self, name):
+        """Charge the time since the previous lap (or begin_frame) to name."""
+        if self._start is None:
+            return
+        if self.sync:
+            glFinish()
+        now = self.clock()
+        self._sections[name] = self._sections.get(name, 0.0) + (now - self._last)
+        self._last = now
+
+    def end_frame(self):
+        if self._start is None:
+            return
+        now = self.clock()
+        total = now - self._start
+        self.work.append(total * 1000.0)
+        self.frames += 1
+        if self._log is not None:
+            record = {"frame": self.frames, "t": self._start, "total_ms": round(total * 1000.0, 4),
+                      "sections": {k: round(v * 1000.0, 4) for k, v in self._sections.items()}}
+            if self._outside:
+                record["outside"] = {k: round(v * 1000.0, 4) for k, v in self._outside.items()}
+            self._log.write(json.dumps(record) + "\n")
+        self.last_sections = self._sections
+        self._outside = {}
+        self._start = None
+
+    def timed(self, name, func):
+        """Wrap func (e.g. idle) so its time is charged to name outside the frame."""
+        def wrapper(*args):
+            start = self.clock()
+            try:
+                return func(*args)
+            finally:
+                self._outside[name] = self._outside.get(name, 0.0) + (self.clock() - start)
+        return wrapper
+
+    # -------------------
+    # Export
+    # -------------------
+    def start_log(self, path=None):
+        """Stream one JSON line per frame to path (default: timestamped)."""
+        self.stop_log()
+        if path is None:
+            path = time.strftime("tug_profile-%Y%m%d-%H%M%S.jsonl")
+        self._log = open(path, "w", encoding="utf-8", buffering=1 << 16)
+        self.log_path = path
+        if not self._atexit:
+            atexit.register(self.stop_log)
+            self._atexit = True
+        return path
+
+    def stop_log(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    @property
+    def logging(self):
+        return self._log is not None
+
+    # -------------------
+    # Overlay
+    # -------------------
+    def percentiles(self):
+        values = sorted(self.work)
+        return {q: percentile(values, q) for q in (50, 95, 99)}
+
+    def draw_overlay(self, x=620, y=20, width=360, height=120, budget_ms=1000.0 / 60):
+        """Frame-time graph with p50/p95/p99 in window coordinates.
+
+        The dashed line marks budget_ms (one frame at the target rate); the
+        graph scale is twice the budget.
+        """
+        if not self.show:
+            return
+        now = self.clock()
+        if now - self._overlay_at >= OVERLAY_REFRESH or not self._overlay_lines:
+            self._overlay_at = now
+            self._overlay_lines = self._overlay_text()
+
+        glPushAttrib(GL_ENABLE_BIT)
+        glDisable(GL_LIGHTING)
+        glDisable(GL_DEPTH_TEST)
+        glDisable(GL_TEXTURE_2D)
+        hud.begin()
+        scale = height / (2.0 * budget_ms)
+        glColor3f(0.4, 0.4, 0.4)
+        glBegin(GL_LINES)
+        glVertex2f(x, y)
+        glVertex2f(x + width, y)
+        step = width / 24.0
+        for i in range(0, 24, 2):
+            glVertex2f(x + i * step, y + budget_ms * scale)
+            glVertex2f(x + (i + 1) * step, y + budget_ms * scale)
+        glEnd()
+        if self.work:
+            glColor3f(0.2, 1.0, 0.3)
+            glBegin(GL_LINE_STRIP)
+            dx = width / max(1, self.work.maxlen - 1)
+            for i, ms in enumerate(self.work):
+                glVertex2f(x + i * dx, y + min(ms * scale, height))
+            glEnd()
+        for i, line in enumerate(self._overlay_lines):
+            hud.text(x, y + height + 8 + 18 * (len(self._overlay_lines) - 1 - i), line)
+        hud.end()
+        glPopAttrib()
+
+    def _overlay_text(self):
+        p = self.percentiles()
+        fps = 1000.0 / (sum(self.interval) / len(self.interval)) if self.interval else 0.0
+        lines = [f"frame ms p50 {p[50]:.2f}  p95 {p[95]:.2f}  p99 {p[99]:.2f}  ({fps:.0f} fps)"]
+        worst = sorted(self.last_sections.items(), key=lambda kv: -kv[1])[:3]
+        if worst:
+            lines.append("  ".join(f"{k} {v * 1000.0:.2f}" for k, v in worst))
+        if self._log is not None:
+            lines.append(f"recording {self.log_path}")
+        return lines
+
+
+# -------------------
+# Offline comparison
+# -------------------
+def load_log(path):
+    """Per-section lists of ms from a JSONL log; 'total' is the whole frame."""
+    series = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            series.setdefault("total", []).append(record["total_ms"])
+            for group in ("sections", "outside"):
+                for name, ms in record.get(group, {}).items():
+                    series.setdefault(name, []).append(ms)
+    return series
+
+
+def summarize(series):
+    out = {}
+    for name, values in series.items():
+        values = sorted(values)
+        out[name] = {"n": len(values), "p50": percentile(values, 50),
+                     "p95": percentile(values, 95), "p99": percentile(values, 99)}
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize or compare frame-timing logs.")
+    parser.add_argument("logs", nargs="+", help="one log to summarize, or a baseline and a candidate")
+    parser.add_argument("--json", action="store_true", help="print the summaries as JSON")
+    args = parser.parse_args(argv)
+
+    summaries = [summarize(load_log(p)) for p in args.logs[:2]]
+    if args.json:
+        print(json.dumps(dict(zip(args.logs, summaries)), indent=2))
+        return
+
+    base = summaries[0]
+    cand = summaries[1] if len(summaries) > 1 else None
+    names = sorted(set(base) | set(cand or {}), key=lambda n: (n != "total", n))
+    print(f"{'section':<12}" + "".join(f"{q:>10}" for q in ("p50", "p95", "p99")) +
+          ("" if cand is None else "   p95 change"))
+    for name in names:
+        row = base.get(name) or cand.get(name)
+        line = f"{name:<12}" + "".join(f"{row[q]:10.3f}" for q in ("p50", "p95", "p99"))
+        if cand is not None:
+            b, c = base.get(name), cand.get(name)
+            if b and c:
+                line = f"{name:<12}" + "".join(f"{c[q]:10.3f}" for q in ("p50", "p95", "p99"))
+                change = (c["p95"] - b["p95"]) / b["p95"] * 100.0 if b["p95"] else 0.0
+                line += f"   {change:+7.1f}%"
+            else:
+                line += "   (only in " + ("baseline" if b else "candidate") + ")"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,573 @@
+"""Shared rendering helpers for the GLUT game scripts.
+
+QuadricPool replaces the gluNewQuadric() calls that the scripts used to
+make inline for every cylinder and sphere: a GLUquadric only holds draw
+settings, so one object per settings combination is created lazily and
+reused for the life of the GL context.
+
+StaticScene bakes geometry that does not change from frame to frame into
+one vertex buffer, so the arena is a single draw call instead of hundreds
+of matrix and glutSolidCube calls. Crowd does the same for the spectator
+stands with instancing, and CompiledModel keeps the player and referee
+bodies in display lists.
+"""
+import math
+
+from OpenGL.GL import (
+    GL_COLOR_ARRAY, GL_COMPILE, GL_DYNAMIC_DRAW, GL_FLOAT, GL_FRAGMENT_SHADER, GL_NORMAL_ARRAY, GL_TRIANGLES,
+    GL_VERTEX_ARRAY, GL_VERTEX_SHADER,
+    glCallList, glColor3f, glColorPointer, glDeleteLists, glDisableClientState,
+    glDisableVertexAttribArray, glDrawArrays, glEnableClientState, glEnableVertexAttribArray,
+    glEndList, glGenLists, glGetAttribLocation, glGetUniformLocation, glNewList, glNormalPointer,
+    glPopMatrix, glPushMatrix, glRotatef, glScalef, glTranslatef, glUniform1f, glUniform2f,
+    glUseProgram, glVertexAttribPointer, glVertexPointer,
+)
+from OpenGL.GL.ARB.draw_instanced import glDrawArraysInstancedARB, glInitDrawInstancedARB
+from OpenGL.GL.ARB.instanced_arrays import glInitInstancedArraysARB, glVertexAttribDivisorARB
+from OpenGL.GL.shaders import compileProgram, compileShader
+from OpenGL.GLUT import glutSolidCube, glutSolidSphere
+from OpenGL.GLU import (
+    GLU_FILL, GLU_OUTSIDE, GLU_SMOOTH,
+    gluCylinder, gluDeleteQuadric, gluDisk, gluNewQuadric,
+    gluQuadricDrawStyle, gluQuadricNormals, gluQuadricOrientation, gluQuadricTexture,
+    gluSphere,
+)
+
+
+class QuadricPool:
+    """Reusable GLU quadrics keyed by draw style / normals / orientation.
+
+    cylinder(), sphere() and disk() draw with the shared quadric for the
+    requested style. acquire()/release() hand out a private quadric for
+    code that changes its settings; ones not released are reported by
+    leaked. begin_frame() resets the per-frame counters shown by
+    debug_line().
+    """
+
+    def __init__(self):
+        self._shared = {}
+        self._free = []
+        self._borrowed = {}      # id(quad) -> quad; ctypes pointers are unhashable
+        self.created = 0         # gluNewQuadric() calls so far
+        self.draws = 0           # quadric draws since begin_frame()
+
+    @property
+    def alive(self):
+        return len(self._shared) + len(self._free) + len(self._borrowed)
+
+    @property
+    def leaked(self):
+        return len(self._borrowed)
+
+    def get(self, draw_style=GLU_FILL, normals=GLU_SMOOTH, orientation=GLU_OUTSIDE, texture=False):
+        """The shared quadric for these settings; do not modify it."""
+        key = (draw_style, normals, orientation, texture)
+        quad = self._shared.get(key)
+        if quad is None:
+            quad = self._shared[key] = self._new(*key)
+        return quad
+
+    def acquire(self, draw_style=GLU_FILL, normals=GLU_SMOOTH, orientation=GLU_OUTSIDE, texture=False):
+        """A private quadric; give it back with release()."""
+        quad = self._free.pop() if self._free else self._new(draw_style, normals, orientation, texture)
+        self._apply(quad, draw_style, normals, orientation, texture)
+        self._borrowed[id(quad)] = quad
+        return quad
+
+    def release(self, quad):
+        if self._borrowed.pop(id(quad), None) is not None:
+            self._free.append(quad)
+
+    def cylinder(self, base, top, height, slices, stacks, **style):
+        self.draws += 1
+        gluCylinder(self.get(**style), base, top, height, slices, stacks)
+
+    def sphere(self, radius, slices, stacks, **style):
+        self.draws += 1
+        gluSphere(self.get(**style), radius, slices, stacks)
+
+    def disk(self, inner, outer, slices, loops, **style):
+        self.draws += 1
+        gluDisk(self.get(**style), inner, outer, slices, loops)
+
+    def begin_frame(self):
+        self.draws = 0
+
+    def debug_line(self):
+        return f"quadrics alive:{self.alive} created:{self.created} leaked:{self.leaked} draws:{self.draws}"
+
+    def delete_all(self):
+        """Free every quadric (call before the GL context goes away)."""
+        for quad in list(self._shared.values()) + self._free + list(self._borrowed.values()):
+            gluDeleteQuadric(quad)
+        self._shared.clear()
+        self._free.clear()
+        self._borrowed.clear()
+
+    def _new(self, draw_style, normals, orientation, texture):
+        quad = gluNewQuadric()
+        self.created += 1
+        self._apply(quad, draw_style, normals, orientation, texture)
+        return quad
+
+    @staticmethod
+    def _apply(quad, draw_style, normals, orientation, texture):
+        gluQuadricDrawStyle(quad, draw_style)
+        gluQuadricNormals(quad, normals)
+        gluQuadricOrientation(quad, orientation)
+        gluQuadricTexture(quad, texture)
+
+
+# One pool per process; the scripts only ever have one GL context.
+quadrics = QuadricPool()
+
+
+# -------------------
+# Baked static geometry
+# -------------------
+# Interleaved vertex layout: position, normal, color (float32 each)
+VERTEX_FLOATS = 9
+VERTEX_STRIDE = VERTEX_FLOATS * 4
+
+# Unit cube faces as (normal, four corners counter-clockwise from outside)
+_CUBE_FACES = (
+    ((1, 0, 0), ((.5, -.5, -.5), (.5, .5, -.5), (.5, .5, .5), (.5, -.5, .5))),
+    ((-1, 0, 0), ((-.5, -.5, -.5), (-.5, -.5, .5), (-.5, .5, .5), (-.5, .5, -.5))),
+    ((0, 1, 0), ((-.5, .5, -.5), (-.5, .5, .5), (.5, .5, .5), (.5, .5, -.5))),
+    ((0, -1, 0), ((-.5, -.5, -.5), (.5, -.5, -.5), (.5, -.5, .5), (-.5, -.5, .5))),
+    ((0, 0, 1), ((-.5, -.5, .5), (.5, -.5, .5), (.5, .5, .5), (-.5, .5, .5))),
+    ((0, 0, -1), ((-.5, -.5, -.5), (-.5, .5, -.5), (.5, .5, -.5), (.5, -.5, -.5))),
+)
+
+
+def _rotation(angle, axis):
+    """3x3 matrix for glRotatef(angle, *axis)."""
+    import numpy as np
+    x, y, z = np.asarray(axis, float) / np.linalg.norm(axis)
+    c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    return np.array([
+        [x * x * (1 - c) + c, x * y * (1 - c) - z * s, x * z * (1 - c) + y * s],
+        [y * x * (1 - c) + z * s, y * y * (1 - c) + c, y * z * (1 - c) - x * s],
+        [z * x * (1 - c) - y * s, z * y * (1 - c) + x * s, z * z * (1 - c) + c],
+    ])
+
+
+def box_vertices(center, size, color, rotate=None):
+    """Triangles of a scaled, rotated unit cube as (x, y, z, nx, ny, nz, r, g, b)."""
+    import numpy as np
+    rot = _rotation(*rotate) if rotate else np.eye(3)
+    scale = np.asarray(size, float)
+    verts = []
+    for normal, corners in _CUBE_FACES:
+        n = rot @ (np.asarray(normal, float) / scale)
+        n /= np.linalg.norm(n)
+        pts = [rot @ (np.asarray(c) * scale) + center for c in corners]
+        for i in (0, 1, 2, 0, 2, 3):
+            verts.append((*pts[i], *n, *color))
+    return verts
+
+
+def sphere_vertices(center, radius, slices, stacks, color):
+    """Triangles of a z-axis sphere, tessellated like glutSolidSphere."""
+    import numpy as np
+    verts = []
+
+    def point(i, j):
+        theta = math.pi * i / stacks
+        phi = 2 * math.pi * j / slices
+        n = np.array([math.sin(theta) * math.cos(phi), math.sin(theta) * math.sin(phi), math.cos(theta)])
+        return (*(n * radius + center), *n, *color)
+    for i in range(stacks):
+        for j in range(slices):
+            a, b = point(i, j), point(i + 1, j)
+            c, d = point(i + 1, j + 1), point(i, j + 1)
+            verts += (a, b, c, a, c, d)
+    return verts
+
+
+class StaticScene:
+    """Geometry that rarely changes, baked into one interleaved VBO.
+
+    Parts are added once in world space with the transforms the immediate
+    mode code used (translate, then rotate, then scale) and a group name.
+    draw() issues a single glDrawArrays for the whole scene; when a group's
+    offset changes (a platform falling) only that group's vertex range is
+    rewritten and re-uploaded. Requires NumPy, like OpenGL.arrays.vbo.
+    """
+
+    def __init__(self):
+        self._parts = {}         # group -> list of (n, 9) float32 arrays
+        self._data = None
+        self._base = None        # untranslated positions, for offsets
+        self._ranges = {}        # group -> (start, stop) vertex rows
+        self._offsets = {}
+        self._vbo = None
+        self.uploads = 0         # range re-uploads, for the debug line
+
+    def box(self, center, size, color, rotate=None, group=None):
+        """glTranslatef(center); glRotatef(*rotate); glScalef(size); glutSolidCube(1)."""
+        self._add(group, box_vertices(center, size, color, rotate))
+
+    def sphere(self, center, radius, slices, stacks, color, group=None):
+        """glTranslatef(center); glutSolidSphere(radius, slices, stacks)."""
+        self._add(group, sphere_vertices(center, radius, slices, stacks, color))
+
+    def quad(self, corners, normal, color, group=None):
+        verts = [(*corners[i], *normal, *color) for i in (0, 1, 2, 0, 2, 3)]
+        self._add(group, verts)
+
+    def _add(self, group, verts):
+        import numpy as np
+        self._parts.setdefault(group, []).append(np.asarray(verts, np.float32))
+        self._data = None
+
+    def _build(self):
+        import numpy as np
+        from OpenGL.arrays import vbo
+        chunks, start = [], 0
+        for group, parts in self._parts.items():
+            block = np.concatenate(parts)
+            self._ranges[group] = (start, start + len(block))
+            start += len(block)
+            chunks.append(block)
+        self._data = np.ascontiguousarray(np.concatenate(chunks))
+        self._base = self._data[:, :3].copy()
+        self._offsets = {group: (0.0, 0.0, 0.0) for group in self._parts}
+        if self._vbo is not None:
+            self._vbo.delete()
+        self._vbo = vbo.VBO(self._data, usage=GL_DYNAMIC_DRAW)
+
+    def set_offset(self, group, offset):
+        """Move every vertex of group by offset (re-uploads only that range)."""
+        if self._data is None:
+            self._build()
+        offset = tuple(float(v) for v in offset)
+        if self._offsets.get(group) == offset:
+            return
+        self._offsets[group] = offset
+        a, b = self._ranges[group]
+        self._data[a:b, :3] = self._base[a:b] + offset
+        self._vbo[a:b] = self._data[a:b]
+        self.uploads += 1
+
+    def draw(self, offsets=None):
+        """Draw the whole scene; offsets maps group -> (dx, dy, dz)."""
+        if self._data is None:
+            self._build()
+        if offsets:
+            for group, offset in offsets.items():
+                self.set_offset(group, offset)
+        self._vbo.bind()
+        try:
+            glEnableClientState(GL_VERTEX_ARRAY)
+            glEnableClientState(GL_NORMAL_ARRAY)
+            glEnableClientState(GL_COLOR_ARRAY)
+            glVertexPointer(3, GL_FLOAT, VERTEX_STRIDE, self._vbo)
+            glNormalPointer(GL_FLOAT, VERTEX_STRIDE, self._vbo + 12)
+            glColorPointer(3, GL_FLOAT, VERTEX_STRIDE, self._vbo + 24)
+            glDrawArrays(GL_TRIANGLES, 0, len(self._data))
+        finally:
+            glDisableClientState(GL_COLOR_ARRAY)
+            glDisableClientState(GL_NORMAL_ARRAY)
+            glDisableClientState(GL_VERTEX_ARRAY)
+            self._vbo.unbind()
+
+    def delete(self):
+        if self._vbo is not None:
+            self._vbo.delete()
+            self._vbo = None
+        self._data = None
+
+
+def build_arena(grid_length):
+    """Static part of the Sarika / Sec22 arena.
+
+    Groups: 'left' and 'right' platforms (with legs and light poles) drop
+    when that side loses, 'center' drops at any win, None never moves.
+    """
+    scene = StaticScene()
+    scene.quad(((-grid_length, -grid_length, -1), (grid_length, -grid_length, -1),
+                (grid_length, grid_length, -1), (-grid_length, grid_length, -1)),
+               (0, 0, 1), (0.12, 0.12, 0.12))
+    for side, xp in (("left", -300), ("right", 300)):
+        scene.box((xp, 0, 0), (220, 60, 10), (0.7, 0.5, 0.2), group=side)
+        scene.box((xp, -35, 0), (40, 40, 70), (0.4, 0.3, 0.25), group=side)
+    scene.box((0, 0, 0), (80, 80, 12), (0.2, 0.2, 0.25), group="center")
+
+    # Scoreboard at (100, 0, -80): frame, post, bar track and indicators
+    sx, sz = 100, -80
+    scene.box((sx, 0, sz + 120), (140, 8, 80), (0.15, 0.15, 0.2))
+    scene.box((sx, 0, sz + 60), (6, 6, 110), (0.3, 0.3, 0.35))
+    scene.box((sx, 3, sz + 95), (100, 4, 6), (0.2, 0.2, 0.2))
+    scene.box((sx - 45, 3, sz + 145), (6, 4, 6), (0.9, 0.2, 0.2))
+    scene.box((sx + 45, 3, sz + 145), (6, 4, 6), (0.2, 0.3, 0.9))
+    scene.box((sx, 3, sz + 160), (20, 4, 6), (0.9, 0.9, 0.2))
+
+    # Light poles keep the scoreboard timer's color, as they always did
+    for side, xp in (("left", -260), ("right", 260)):
+        scene.box((xp, 60, 20), (3, 3, 100), (0.9, 0.9, 0.2), rotate=(-90, (1, 0, 0)), group=side)
+        scene.sphere((xp, 115, 20), 8, 10, 10, (0.9, 0.9, 0.2), group=side)
+    return scene
+
+
+# -------------------
+# Instanced crowd
+# -------------------
+CROWD_COLORS = ((0.9, 0.2, 0.65), (0.1, 0.6, 1), (0.1, 0.9, 0.5), (1, 0.85, 0.1), (0.7, 0.5, 0.95))
+
+# Per instance: offset xyz, color rgb, phase, side (0 left, 1 right)
+_INSTANCE_FLOATS = 8
+
+_CROWD_VERTEX = """
+#version 120
+attribute vec3 a_offset;
+attribute vec3 a_color;
+attribute vec2 a_phase_side;
+uniform float u_time;
+uniform vec2 u_jump;
+varying vec3 v_color;
+void main() {
+    float jump = mix(u_jump.x, u_jump.y, a_phase_side.y);
+    vec4 p = gl_Vertex;
+    p.xyz += a_offset;
+    p.z += jump * sin(u_time + a_phase_side.x);
+    gl_Position = gl_ModelViewProjectionMatrix * p;
+    v_color = a_color;
+}
+"""
+
+_CROWD_FRAGMENT = """
+#version 120
+varying vec3 v_color;
+void main() {
+    gl_FragColor = vec4(v_color, 1.0);
+}
+"""
+
+
+class Crowd:
+    """Spectator stands drawn as one instanced batch.
+
+    Same layout as the old cheering() loops: rows x cols spectators on each
+    side, rows stepping up and spreading out. Offsets, colors and jump
+    phases live in an instance buffer and the vertex shader does the bob,
+    so draw() costs the same for 60 or 6000 spectators. Without
+    ARB_draw_instanced / ARB_instanced_arrays it falls back to one
+    glDrawArrays per spectator from the same mesh.
+    """
+
+    def __init__(self, rows=3, cols=10, left_x=-320.0, right_x=320.0, y=-100.0, base_z=120.0,
+                 row_step=22.0, spacing=24.0, spacing_per_row=8.0, body=(10, 10, 16), head=12.0,
+                 colors=CROWD_COLORS):
+        import numpy as np
+        self.rows, self.cols = rows, cols
+        mesh = box_vertices((0, 0, 0), body, (1, 1, 1)) + sphere_vertices((0, 0, 12), head, 10, 10, (1, 1, 1))
+        self._mesh = np.asarray(mesh, np.float32)
+
+        inst = []
+        for side, center_x in ((0, left_x), (1, right_x)):
+            for r in range(rows):
+                side_x = spacing + r * spacing_per_row
+                start_x = center_x - ((cols - 1) * side_x) / 2
+                for c in range(cols):
+                    inst.append((start_x + c * side_x, y, base_z + r * row_step,
+                                 *colors[(r * cols + c) % len(colors)], 0.28 * r + 0.20 * c, side))
+        self._instances = np.asarray(inst, np.float32)
+        self._mesh_vbo = None
+        self._inst_vbo = None
+        self._program = None
+        self.instanced = None    # decided on the first draw, needs a context
+
+    def __len__(self):
+        return len(self._instances)
+
+    def draw(self, time_value, left_jump, right_jump):
+        """time_value is the sine argument (up_down * timer / 423 in the scripts)."""
+        if self._mesh_vbo is None:
+            self._setup()
+        if self.instanced:
+            self._draw_instanced(time_value, left_jump, right_jump)
+        else:
+            self._draw_fallback(time_value, left_jump, right_jump)
+
+    def _setup(self):
+        from OpenGL.arrays import vbo
+        self._mesh_vbo = vbo.VBO(self._mesh)
+        self._inst_vbo = vbo.VBO(self._instances)
+        self.instanced = False
+        try:
+            if not (glInitDrawInstancedARB() and glInitInstancedArraysARB()):
+                return
+            self._program = compileProgram(compileShader(_CROWD_VERTEX, GL_VERTEX_SHADER),
+                                           compileShader(_CROWD_FRAGMENT, GL_FRAGMENT_SHADER))
+        except Exception as e:  # no GLSL / extension: keep the fallback
+            print("Crowd: instancing unavailable, using per-spectator draws:", e)
+            return
+        self._attribs = [(glGetAttribLocation(self._program, name), size, offset)
+                         for name, size, offset in (("a_offset", 3, 0), ("a_color", 3, 12),
+                                                    ("a_phase_side", 2, 24))]
+        self._u_time = glGetUniformLocation(self._program, "u_time")
+        self._u_jump = glGetUniformLocation(self._program, "u_jump")
+        self.instanced = True
+
+    def _draw_instanced(self, time_value, left_jump, right_jump):
+        glUseProgram(self._program)
+        glUniform1f(self._u_time, time_value)
+        glUniform2f(self._u_jump, left_jump, right_jump)
+        self._mesh_vbo.bind()
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(3, GL_FLOAT, VERTEX_STRIDE, self._mesh_vbo)
+        self._inst_vbo.bind()
+        stride = _INSTANCE_FLOATS * 4
+        for loc, size, offset in self._attribs:
+            glEnableVertexAttribArray(loc)
+            glVertexAttribPointer(loc, size, GL_FLOAT, False, stride, self._inst_vbo + offset)
+            glVertexAttribDivisorARB(loc, 1)
+        try:
+            glDrawArraysInstancedARB(GL_TRIANGLES, 0, len(self._mesh), len(self._instances))
+        finally:
+            for loc, _, _ in self._attribs:
+                glVertexAttribDivisorARB(loc, 0)
+                glDisableVertexAttribArray(loc)
+            self._inst_vbo.unbind()
+            glDisableClientState(GL_VERTEX_ARRAY)
+            self._mesh_vbo.unbind()
+            glUseProgram(0)
+
+    def _draw_fallback(self, time_value, left_jump, right_jump):
+        self._mesh_vbo.bind()
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(3, GL_FLOAT, VERTEX_STRIDE, self._mesh_vbo)
+        try:
+            count = len(self._mesh)
+            for x, y, z, r, g, b, phase, side in self._instances.tolist():
+                jump = right_jump if side else left_jump
+                glColor3f(r, g, b)
+                glPushMatrix()
+                glTranslatef(x, y, z + jump * math.sin(time_value + phase))
+                glDrawArrays(GL_TRIANGLES, 0, count)
+                glPopMatrix()
+        finally:
+            glDisableClientState(GL_VERTEX_ARRAY)
+            self._mesh_vbo.unbind()
+
+
+# -------------------
+# Compiled character models
+# -------------------
+class CompiledModel:
+    """Rigid model parts compiled once into display lists.
+
+    Each part is a function issuing immediate-mode calls; it runs inside
+    glNewList the first time the part is drawn (a context must be current)
+    and glCallList replays it afterwards. Callers only set up the joint
+    transforms between parts.
+    """
+
+    def __init__(self, **parts):
+        self._builders = parts
+        self._lists = {}
+
+    def draw(self, part):
+        lst = self._lists.get(part)
+        if lst is None:
+            lst = glGenLists(1)
+            glNewList(lst, GL_COMPILE)
+            try:
+                self._builders[part]()
+            finally:
+                glEndList()
+            self._lists[part] = lst
+        glCallList(lst)
+
+    def delete(self):
+        for lst in self._lists.values():
+            glDeleteLists(lst, 1)
+        self._lists.clear()
+
+
+def _player_body():
+    # Legs
+    for leg_x in (-8, 8):
+        glPushMatrix()
+        glTranslatef(leg_x, 0, 15)
+        glRotatef(90, 1, 0, 0)
+        quadrics.cylinder(4, 4, 30, 10, 10)
+        glPopMatrix()
+    # Feet
+    for foot_x in (-8, 8):
+        glPushMatrix()
+        glTranslatef(foot_x, 8, 0)
+        glScalef(8, 16, 6)
+        glutSolidCube(1)
+        glPopMatrix()
+    # Torso
+    glPushMatrix()
+    glTranslatef(0, 0, 55)
+    glScalef(20, 12, 30)
+    glutSolidCube(1)
+    glPopMatrix()
+    # Arms, angled slightly outward
+    for arm_x, angle in ((-10, 20), (10, -20)):
+        glPushMatrix()
+        glTranslatef(arm_x, 0, 65)
+        glRotatef(angle, 0, 0, 1)
+        glRotatef(90, 0, 1, 0)
+        quadrics.cylinder(3, 3, 25, 8, 8)
+        glPopMatrix()
+    # Hands gripping the rope
+    for hand_x in (-28, 28):
+        glPushMatrix()
+        glTranslatef(hand_x, 0, 65)
+        glutSolidSphere(5, 10, 10)
+        glPopMatrix()
+    # Head
+    glPushMatrix()
+    glTranslatef(0, 0, 85)
+    glutSolidSphere(10, 12, 12)
+    glPopMatrix()
+
+
+def _referee_body():
+    # Legs keep the caller's current color
+    for lx in (-8, 8):
+        glPushMatrix()
+        glTranslatef(lx, 0, 0)
+        glRotatef(90, 1, 0, 0)
+        quadrics.cylinder(4, 4, 40, 12, 12)
+        glPopMatrix()
+    glColor3f(0.2, 0.2, 0.2)
+    for fx in (-8, 8):
+        glPushMatrix()
+        glTranslatef(fx, 8, -3)
+        glScalef(8, 16, 6)
+        glutSolidCube(1)
+        glPopMatrix()
+    # Torso, yellow shirt
+    glPushMatrix()
+    glTranslatef(0, 0, 40)
+    glScalef(22, 14, 50)
+    glColor3f(1.0, 1.0, 0.0)
+    glutSolidCube(1)
+    glPopMatrix()
+    # Head
+    glPushMatrix()
+    glTranslatef(0, 0, 95)
+    glColor3f(1.0, 1.0, 1.0)
+    glutSolidSphere(10, 16, 16)
+    glPopMatrix()
+
+
+def _referee_arm():
+    # Drawn after the shoulder rotation; hand at the end of the sleeve
+    glColor3f(1.0, 1.0, 0.0)
+    quadrics.cylinder(3, 3, 35, 10, 10)
+    glTranslatef(35, 0, 0)
+    glColor3f(1.0, 1.0, 1.0)
+    glutSolidSphere(5, 12, 12)
+
+
+# Humanoid models shared by Sarika and the Sec22 script. The player body is
+# drawn in the current color; the referee sets its own colors.
+player_model = CompiledModel(body=_player_body)
+referee_model = CompiledModel(body=_referee_body, arm=_referee_arm)
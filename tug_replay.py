@@ -0,0 +1,533 @@
+"""Replay storage for the tug-of-rope scripts.
+
+ReplayRing keeps the last N frames in preallocated array-module columns, so
+recording a frame is a handful of slot writes: no dict, no list shift, and
+the cost does not depend on how long the replay window is.
+
+InputReplay stores a whole round as its seed, config and the (tick, key)
+input log of TugSimulation. Running that log back through the simulation
+rebuilds every frame exactly, at a few bytes per press.
+
+ReplayWriter / ReplayFile store frames on disk as periodic keyframes plus
+small delta records with a time index, so a memory-mapped file can be
+sought in O(log n). ReplayPlayer plays a ReplayRing or ReplayFile at any
+speed, interpolating between stored frames.
+"""
+import bisect
+import dataclasses
+import json
+import mmap
+import struct
+from array import array
+from collections import namedtuple
+
+from tug_sim import FIXED_DT, TugConfig, TugSimulation
+
+ReplayFrame = namedtuple(
+    "ReplayFrame",
+    "t tug left_p right_p left_stam right_stam left_lean right_lean",
+)
+
+# array typecode per ReplayFrame field
+_COLUMNS = (
+    ("t", "d"),
+    ("tug", "i"),
+    ("left_p", "i"),
+    ("right_p", "i"),
+    ("left_stam", "f"),
+    ("right_stam", "f"),
+    ("left_lean", "f"),
+    ("right_lean", "f"),
+)
+
+
+class ReplayRing:
+    """Fixed-capacity ring buffer of ReplayFrame records.
+
+    Index 0 is the oldest frame still stored, len(ring) - 1 the newest.
+    Once full, each append overwrites the oldest frame.
+    """
+
+    def __init__(self, capacity):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = int(capacity)
+        self._cols = [array(code, bytes(array(code).itemsize * self.capacity))
+                      for _, code in _COLUMNS]
+        self._head = 0     # slot the next frame is written to
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+
+    def append(self, t, tug, left_p, right_p, left_stam, right_stam, left_lean, right_lean):
+        i = self._head
+        c = self._cols
+        c[0][i] = t
+        c[1][i] = tug
+        c[2][i] = left_p
+        c[3][i] = right_p
+        c[4][i] = left_stam
+        c[5][i] = right_stam
+        c[6][i] = left_lean
+        c[7][i] = right_lean
+        self._head = i + 1 if i + 1 < self.capacity else 0
+        if self._size < self.capacity:
+            self._size += 1
+
+    def slot(self, index):
+        """Storage slot of the index-th oldest frame (negative counts from the end)."""
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("replay index out of range")
+        start = self._head - self._size
+        return (start + index) % self.capacity
+
+    def get(self, index, field):
+        """One field of a frame without building a ReplayFrame."""
+        return self._cols[ReplayFrame._fields.index(field)][self.slot(index)]
+
+    def __getitem__(self, index):
+        s = self.slot(index)
+        return ReplayFrame(*(col[s] for col in self._cols))
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self[i]
+
+    def locate(self, t):
+        """(frame_a, frame_b, alpha) bracketing time t, clamped to the ends."""
+        tcol, n = self._cols[0], self._size
+        start = self._head - n
+        # bisect over logical indices; the ring is sorted by t
+        lo, hi = 0, n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if tcol[(start + mid) % self.capacity] <= t:
+                lo = mid + 1
+            else:
+                hi = mid
+        i = max(0, min(n - 1, lo - 1))
+        j = min(n - 1, i + 1)
+        return _bracket(self[i], self[j], t)
+
+
+# -------------------
+# Input-event replays
+# -------------------
+INPUT_MAGIC = b"TUGI"
+INPUT_VERSION = 1
+_INPUT_PREFIX = struct.Struct("<4sHI")   # magic, version, header length
+
+# one byte per logged key; 'bot' presses are re-derived on playback and kept
+# only to check that a replay reproduced the original round
+EVENT_CODES = {'a': 0, 'l': 1, 'b': 2, 'bot': 3}
+EVENT_KEYS = {code: key for key, code in EVENT_CODES.items()}
+
+
+class InputReplay:
+    """One round as seed + config + timestamped input events.
+
+    events is a list of (tick, key) pairs as logged by TugSimulation: key is
+    'a' or 'l' for presses, 'b' for a bot toggle and 'bot' for a bot press.
+    A tick is one step of dt seconds.
+    """
+
+    def __init__(self, seed, config, events, end_tick, bot_enabled=False, dt=FIXED_DT):
+        self.seed = seed
+        self.config = config
+        self.events = events
+        self.end_tick = end_tick
+        self.bot_enabled = bot_enabled
+        self.dt = dt
+
+    @classmethod
+    def from_sim(cls, sim, dt=FIXED_DT):
+        """Capture the current round of sim (stepped with a constant dt)."""
+        return cls(sim.seed, dataclasses.replace(sim.config), list(sim.input_log),
+                   sim.tick, sim.bot_at_start, dt)
+
+    # -------------------
+    # Playback
+    # -------------------
+    def frames(self):
+        """Rebuild the round, yielding the simulation after every tick.
+
+        The same TugSimulation object is yielded each time; copy what you
+        need before advancing the generator.
+        """
+        sim = TugSimulation(dataclasses.replace(self.config))
+        sim.bot_enabled = self.bot_enabled
+        sim.reset(seed=self.seed)
+        events = self.events
+        i, n = 0, len(events)
+        for tick in range(self.end_tick):
+            keys = []
+            while i < n and events[i][0] == tick:
+                key = events[i][1]
+                if key == 'b':
+                    sim.set_bot(not sim.bot_enabled)
+                elif key != 'bot':
+                    keys.append(key)
+                i += 1
+            sim.step(self.dt, keys)
+            yield sim
+        # inputs logged after the last full step (e.g. a zero-dt advance)
+        keys = [key for tick, key in events[i:] if key in ('a', 'l')]
+        if keys:
+            sim.step(0.0, keys)
+            yield sim
+
+    def replay_frames(self):
+        """ReplayFrame per tick, e.g. for write_replay_file()."""
+        for sim in self.frames():
+            yield ReplayFrame(sim.t, sim.tug, sim.left_presses, sim.right_presses,
+                              sim.left_stamina, sim.right_stamina,
+                              sim.left_lean, sim.right_lean)
+
+    def drive(self, sim):
+        """Make a game's live sim play this round back.
+
+        sim is reset to the replay's seed, config and bot setting, and its
+        run() is replaced so the logged events are applied at their ticks
+        and live inputs are ignored. Lets a script render a saved round
+        through its own idle()/showScreen().
+        """
+        if self.dt != FIXED_DT:
+            raise ValueError("replay was recorded with dt=%g, games step at %g" % (self.dt, FIXED_DT))
+        sim.config = dataclasses.replace(self.config)
+        sim.bot_enabled = self.bot_enabled
+        sim.reset(seed=self.seed)
+        events = self.events
+        run = sim.run
+        cursor = [0]
+
+        def replay_run(steps, inputs=()):
+            out = []
+            i, n = cursor[0], len(events)
+            for _ in range(steps):
+                keys = []
+                while i < n and events[i][0] == sim.tick:
+                    key = events[i][1]
+                    if key == 'b':
+                        sim.set_bot(not sim.bot_enabled)
+                    elif key != 'bot':
+                        keys.append(key)
+                    i += 1
+                out.extend(run(1, keys))
+            cursor[0] = i
+            return out
+
+        sim.run = replay_run
+        return sim
+
+    def final_state(self):
+        """Simulation state at the end of the replay."""
+        sim = None
+        for sim in self.frames():
+            pass
+        return sim
+
+    # -------------------
+    # Serialization
+    # -------------------
+    def to_bytes(self):
+        header = json.dumps({
+            "seed": self.seed,
+            "dt": self.dt,
+            "end_tick": self.end_tick,
+            "bot_enabled": self.bot_enabled,
+            "events": len(self.events),
+            "config": dataclasses.asdict(self.config),
+        }, separators=(",", ":")).encode("utf-8")
+        ticks = array("I", [tick for tick, _ in self.events])
+        codes = array("B", [EVENT_CODES[key] for _, key in self.events])
+        return (_INPUT_PREFIX.pack(INPUT_MAGIC, INPUT_VERSION, len(header))
+                + header + ticks.tobytes() + codes.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, header_len = _INPUT_PREFIX.unpack_from(data)
+        if magic != INPUT_MAGIC:
+            raise ValueError("not an input replay")
+        if version != INPUT_VERSION:
+            raise ValueError("unsupported input replay version %d" % version)
+        pos = _INPUT_PREFIX.size
+        header = json.loads(bytes(data[pos:pos + header_len]).decode("utf-8"))
+        pos += header_len
+        count = header["events"]
+        ticks = array("I", bytes(data[pos:pos + 4 * count]))
+        pos += 4 * count
+        codes = array("B", bytes(data[pos:pos + count]))
+        events = [(tick, EVENT_KEYS[code]) for tick, code in zip(ticks, codes)]
+        return cls(header["seed"], TugConfig(**header["config"]), events,
+                   header["end_tick"], header["bot_enabled"], header["dt"])
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+# -------------------
+# Seekable replay files
+# -------------------
+FILE_MAGIC = b"TUGK"
+FILE_VERSION = 1
+_FILE_HEADER = struct.Struct("<4sHH")      # magic, version, keyframe interval
+_FILE_FOOTER = struct.Struct("<QII4s")     # index offset, keyframes, frames, magic
+_INDEX_ENTRY = struct.Struct("<dQI")       # keyframe t, byte offset, frame number
+_KEYFRAME = struct.Struct("<diiiffff")     # full ReplayFrame
+_DELTA = struct.Struct("<fbBBffff")        # dt, dtug, dleft_p, dright_p, absolute stam/lean
+
+
+def _f32(x):
+    return struct.unpack("<f", struct.pack("<f", x))[0]
+
+
+def _bracket(a, b, t):
+    span = b.t - a.t
+    alpha = 0.0 if span <= 0 else max(0.0, min(1.0, (t - a.t) / span))
+    return a, b, alpha
+
+
+def interpolate(a, b, alpha):
+    """Blend two frames; counters snap to a, continuous values are lerped.
+
+    tug comes back as a float so the rope can slide between integer steps.
+    """
+    def lerp(x, y):
+        return x + (y - x) * alpha
+    return ReplayFrame(lerp(a.t, b.t), lerp(a.tug, b.tug), a.left_p, a.right_p,
+                       lerp(a.left_stam, b.left_stam), lerp(a.right_stam, b.right_stam),
+                       lerp(a.left_lean, b.left_lean), lerp(a.right_lean, b.right_lean))
+
+
+class ReplayWriter:
+    """Append frames to a seekable replay file.
+
+    A keyframe is written every keyframe_interval frames, and whenever a
+    frame does not fit a delta record; the others are 23-byte deltas.
+    """
+
+    def __init__(self, path, keyframe_interval=30):
+        self._f = open(path, "wb")
+        self.keyframe_interval = keyframe_interval
+        self._f.write(_FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, keyframe_interval))
+        self._index = []
+        self._prev = None
+        self._since_key = 0
+        self.frames = 0
+
+    def append(self, frame):
+        prev = self._prev
+        if prev is not None and self._since_key < self.keyframe_interval:
+            dtug = frame.tug - prev.tug
+            dl = frame.left_p - prev.left_p
+            dr = frame.right_p - prev.right_p
+            if -128 <= dtug <= 127 and 0 <= dl <= 255 and 0 <= dr <= 255 and frame.t >= prev.t:
+                self._f.write(_DELTA.pack(frame.t - prev.t, dtug, dl, dr,
+                                          frame.left_stam, frame.right_stam,
+                                          frame.left_lean, frame.right_lean))
+                # track time the way the reader rebuilds it (float32 steps)
+                self._prev = frame._replace(t=prev.t + _f32(frame.t - prev.t))
+                self._since_key += 1
+                self.frames += 1
+                return
+        self._index.append((frame.t, self._f.tell(), self.frames))
+        self._f.write(_KEYFRAME.pack(frame.t, int(frame.tug), frame.left_p, frame.right_p,
+                                     frame.left_stam, frame.right_stam,
+                                     frame.left_lean, frame.right_lean))
+        self._prev = frame
+        self._since_key = 1
+        self.frames += 1
+
+    def close(self):
+        index_offset = self._f.tell()
+        for entry in self._index:
+            self._f.write(_INDEX_ENTRY.pack(*entry))
+        self._f.write(_FILE_FOOTER.pack(index_offset, len(self._index), self.frames, FILE_MAGIC))
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_replay_file(path, frames, keyframe_interval=30):
+    """Write any iterable of ReplayFrame (e.g. a ReplayRing) to path."""
+    with ReplayWriter(path, keyframe_interval) as writer:
+        for frame in frames:
+            writer.append(frame)
+
+
+class _IndexColumn:
+    """Read-only sequence over one field of the on-disk keyframe index."""
+
+    def __init__(self, buf, offset, count, field):
+        self._buf, self._offset, self._count, self._field = buf, offset, count, field
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, k):
+        return _INDEX_ENTRY.unpack_from(self._buf, self._offset + k * _INDEX_ENTRY.size)[self._field]
+
+
+class ReplayFile:
+    """Memory-mapped reader for files written by ReplayWriter.
+
+    Only the keyframe index is touched to seek; a block (one keyframe and
+    its deltas) is decoded on demand and the last one is cached, so forward
+    playback decodes each block about once.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.keyframe_interval = _FILE_HEADER.unpack_from(self._buf)
+        if magic != FILE_MAGIC:
+            raise ValueError("not a replay file")
+        if version != FILE_VERSION:
+            raise ValueError("unsupported replay file version %d" % version)
+        index_offset, keyframes, self._frames, magic = _FILE_FOOTER.unpack_from(
+            self._buf, len(self._buf) - _FILE_FOOTER.size)
+        if magic != FILE_MAGIC:
+            raise ValueError("replay file is truncated")
+        self._index_offset = index_offset
+        self._key_times = _IndexColumn(self._buf, index_offset, keyframes, 0)
+        self._key_frames = _IndexColumn(self._buf, index_offset, keyframes, 2)
+        self._blocks = {}     # the two most recently decoded blocks
+
+    def close(self):
+        self._blocks = {}
+        self._buf.close()
+        self._file.close()
+
+    def __len__(self):
+        return self._frames
+
+    def _load_block(self, k):
+        block = self._blocks.get(k)
+        if block is not None:
+            return block
+        t, offset, first = _INDEX_ENTRY.unpack_from(self._buf, self._index_offset + k * _INDEX_ENTRY.size)
+        if k + 1 < len(self._key_frames):
+            count = self._key_frames[k + 1] - first
+        else:
+            count = self._frames - first
+        t, tug, lp, rp, ls, rs, ll, rl = _KEYFRAME.unpack_from(self._buf, offset)
+        block = [ReplayFrame(t, tug, lp, rp, ls, rs, ll, rl)]
+        offset += _KEYFRAME.size
+        for _ in range(count - 1):
+            dt, dtug, dl, dr, ls, rs, ll, rl = _DELTA.unpack_from(self._buf, offset)
+            offset += _DELTA.size
+            t += dt
+            tug += dtug
+            lp += dl
+            rp += dr
+            block.append(ReplayFrame(t, tug, lp, rp, ls, rs, ll, rl))
+        if len(self._blocks) >= 2:
+            self._blocks.pop(next(iter(self._blocks)))
+        self._blocks[k] = block
+        return block
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._frames
+        if not 0 <= index < self._frames:
+            raise IndexError("replay index out of range")
+        k = bisect.bisect_right(self._key_frames, index) - 1
+        return self._load_block(k)[index - self._key_frames[k]]
+
+    def __iter__(self):
+        for k in range(len(self._key_frames)):
+            yield from self._load_block(k)
+
+    def locate(self, t):
+        """(frame_a, frame_b, alpha) bracketing time t, clamped to the ends."""
+        k = max(0, bisect.bisect_right(self._key_times, t) - 1)
+        block = self._load_block(k)
+        i = max(0, bisect.bisect_right([f.t for f in block], t) - 1)
+        a = block[i]
+        if i + 1 < len(block):
+            b = block[i + 1]
+        elif k + 1 < len(self._key_frames):
+            b = self._load_block(k + 1)[0]
+        else:
+            b = a
+        return _bracket(a, b, t)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ReplayPlayer:
+    """Time-based cursor over a ReplayRing or ReplayFile.
+
+    advance(dt) moves the cursor by dt * speed seconds, so fractional speeds
+    (0.25x) play smoothly; seek() and jumps are O(log n).
+    """
+
+    def __init__(self, source, speed=1.0):
+        self.source = source
+        self.speed = speed
+        self.start = source[0].t
+        self.end = source[-1].t
+        self.position = self.start
+
+    def seek(self, t):
+        self.position = max(self.start, min(self.end, t))
+
+    def skip(self, seconds):
+        self.seek(self.position + seconds)
+
+    def advance(self, dt):
+        """Move forward; returns False once the end has been reached."""
+        self.position += dt * self.speed
+        if self.position >= self.end:
+            self.position = self.end
+            return False
+        if self.position < self.start:
+            self.position = self.start
+        return True
+
+    def frame(self):
+        """Interpolated ReplayFrame at the current position."""
+        return interpolate(*self.source.locate(self.position))
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Rebuild and check input-event replays.")
+    parser.add_argument("paths", nargs="+", help=".tugi files")
+    parser.add_argument("--export", action="store_true",
+                        help="also write a seekable .tugk frame file next to each input")
+    args = parser.parse_args(argv)
+    for path in args.paths:
+        rep = InputReplay.load(path)
+        if args.export:
+            write_replay_file(path.rsplit(".", 1)[0] + ".tugk", rep.replay_frames())
+        sim = rep.final_state()
+        ok = sim is not None and sim.input_log == rep.events
+        print(f"{path}: {len(rep.events)} events, {rep.end_tick} ticks, "
+              f"winner={sim.winner if sim else None} tug={sim.tug if sim else 0} "
+              f"{'ok' if ok else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
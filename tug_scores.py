@@ -0,0 +1,548 @@
+"""High-score storage for tug_highscores.jsonl.
+
+HighScoreStore loads the last few entries once and then follows the file
+like `tail -f`: it remembers the byte offset it has read up to and only
+parses bytes appended after it. The HUD reads store.recent every frame
+without touching the disk; refresh() is called from idle() and only stats
+the file every poll_interval seconds.
+
+ScoreWriter moves the appends off the render thread: entries go into a
+bounded queue and a background thread writes them in batches.
+
+compact() folds the JSONL into a columnar file (tug_highscores.col) with
+one fixed-width array per field, after which the JSONL only holds the
+rounds played since. ScoreColumns maps that file and exposes the columns
+as memoryviews (or NumPy arrays) without copying.
+
+    python tug_scores.py compact
+"""
+import argparse
+import atexit
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from array import array
+from collections import deque
+
+HIGHSCORE_FILE = "tug_highscores.jsonl"
+
+# Column file: header, column table, then each column 8-byte aligned
+COLUMN_MAGIC = b"TUGC"
+COLUMN_VERSION = 1
+_COL_HEADER = struct.Struct("<4sHHQ")      # magic, version, column count, rows
+_COL_ENTRY = struct.Struct("<16sc7xQ")     # name, array typecode, byte offset
+
+# (field, array typecode) in file order
+SCORE_COLUMNS = (
+    ("time", "d"),
+    ("winner", "b"),             # WINNER_CODES
+    ("tug_at_end", "h"),
+    ("left_presses", "i"),
+    ("right_presses", "i"),
+    ("round_duration", "f"),
+)
+WINNER_CODES = {"A": 1, "L": -1, None: 0}
+_WINNER_NAMES = {1: "A", -1: "L", 0: None}
+
+# bytes read per step when looking for the last lines of a large file
+_TAIL_CHUNK = 64 * 1024
+
+
+def parse_lines(data):
+    """Score entries in complete lines of bytes, through decode_line();
+    blank lines and lines that do not decode are skipped."""
+    entries = []
+    for line in data.split(b"\n"):
+        try:
+            entries.extend(decode_line(line))
+        except ValueError:
+            continue
+    return entries
+
+
+def decode_line(line):
+    """Score entries on one line of a score file.
+
+    Older builds wrote the separator as a literal backslash-n, so a single
+    line can hold several objects; they are split here. Raises ValueError
+    if any part of the line is not JSON.
+    """
+    text = line.decode("utf-8") if isinstance(line, bytes) else line
+    decoder = json.JSONDecoder()
+    entries = []
+    pos, end = 0, len(text)
+    while True:
+        while pos < end and (text[pos].isspace() or text.startswith("\\n", pos)):
+            pos += 2 if text[pos] == "\\" else 1
+        if pos >= end:
+            return entries
+        entry, pos = decoder.raw_decode(text, pos)
+        entries.append(entry)
+
+
+def score_row(entry):
+    """(time, winner, tug_at_end, left_presses, right_presses, round_duration).
+
+    Raises ValueError for anything that is not a usable score entry: not
+    an object, or a field that is null or not a number.
+    """
+    if not isinstance(entry, dict):
+        raise ValueError(f"score entry is not an object: {entry!r}")
+    winner = entry.get("winner")
+    try:
+        return (
+            float(entry.get("time", 0.0)),
+            winner if winner in WINNER_CODES else None,
+            int(entry.get("tug_at_end", 0)),
+            int(entry.get("left_presses", 0)),
+            int(entry.get("right_presses", 0)),
+            float(entry.get("round_duration", 0.0)),
+        )
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"bad score entry {entry!r}: {e}") from None
+
+
+def column_path(path):
+    """Column file that compact() writes for a JSONL score file."""
+    return os.path.splitext(path)[0] + ".col"
+
+
+class HighScoreStore:
+    """In-memory view of the newest `keep` entries of a JSONL score file.
+
+    When the JSONL holds fewer than keep rounds (e.g. right after a
+    compaction) the rest come from the end of its column file.
+    version increases every time recent changes, so callers can cache
+    anything they derive from it.
+    """
+
+    def __init__(self, path=HIGHSCORE_FILE, keep=5, poll_interval=1.0, columns=None):
+        self.path = path
+        self.columns = columns if columns is not None else column_path(path)
+        self.keep = keep
+        self.poll_interval = poll_interval
+        self.recent = deque(maxlen=keep)
+        self.version = 0
+        self._offset = 0
+        self._inode = None
+        self._columns_sig = None
+        self._partial = b""
+        self._last_check = None
+        self.refresh(force=True)
+
+    def refresh(self, force=False, now=None):
+        """Pick up appended lines; returns True if recent changed.
+
+        Without force this is a no-op until poll_interval has passed since
+        the last check. A truncated or replaced file is reloaded.
+        """
+        now = time.monotonic() if now is None else now
+        if not force and self._last_check is not None and now - self._last_check < self.poll_interval:
+            return False
+        self._last_check = now
+        try:
+            cst = os.stat(self.columns)
+            columns_sig = (cst.st_ino, cst.st_mtime_ns, cst.st_size)
+        except OSError:
+            columns_sig = None
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            st = None
+
+        if st is None or st.st_ino != self._inode or st.st_size < self._offset \
+                or columns_sig != self._columns_sig:
+            if st is None and self._inode is None and columns_sig == self._columns_sig:
+                return False
+            self._reset(st.st_ino if st is not None else None)
+            if st is not None:
+                self._load_tail(st.st_size)
+            self._columns_sig = columns_sig
+            self._fill_from_columns()
+            self._changed()
+            return True
+        if st.st_size == self._offset:
+            return False
+
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read(st.st_size - self._offset)
+        self._offset += len(data)
+        if not self._consume(data):
+            return False
+        self._changed()
+        return True
+
+    def _reset(self, inode):
+        self.recent.clear()
+        self._inode = inode
+        self._offset = 0
+        self._partial = b""
+
+    def _changed(self):
+        self.version += 1
+
+    def _fill_from_columns(self):
+        need = self.keep - len(self.recent)
+        if need <= 0 or self._columns_sig is None:
+            return
+        try:
+            with ScoreColumns(self.columns) as cols:
+                older = cols.tail(need)
+        except (OSError, ValueError):
+            return
+        self.recent.extendleft(reversed(older))
+
+    def _consume(self, data):
+        data = self._partial + data
+        end = data.rfind(b"\n")
+        if end < 0:
+            self._partial = data
+            return False
+        self._partial = data[end + 1:]
+        entries = parse_lines(data[:end])
+        self.recent.extend(entries)
+        return bool(entries)
+
+    def _load_tail(self, size):
+        # Read backwards in chunks until we have `keep` complete lines
+        with open(self.path, "rb") as f:
+            start = size
+            data = b""
+            while start > 0 and data.count(b"\n") <= self.keep:
+                start = max(0, start - _TAIL_CHUNK)
+                f.seek(start)
+                data = f.read(size - start)
+        if start > 0:
+            data = data[data.index(b"\n") + 1:]
+        self._offset = size
+        self._consume(data)
+
+
+# Queue markers for the writer thread
+_STOP = object()
+
+
+class ScoreWriter:
+    """Appends score entries to a JSONL file from a background thread.
+
+    submit() never blocks: entries are queued and written in one append
+    once batch_size have piled up or flush_interval seconds after the first
+    one. Failed writes are kept for errors() so the game loop can report
+    them. Pending entries are written on close(), which also runs at exit.
+    generation counts successful writes; compare it to spot new data.
+    """
+
+    def __init__(self, path=HIGHSCORE_FILE, max_queue=1024, batch_size=32, flush_interval=0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.generation = 0
+        self.dropped = 0
+        self._queue = queue.Queue(max_queue)
+        self._errors = deque()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="ScoreWriter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, entry):
+        """Queue one entry. Returns False if the queue is full or closed."""
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+            self._errors.append("score queue full, entry dropped")
+            return False
+        return True
+
+    def flush(self, timeout=None):
+        """Block until everything submitted so far is written."""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """Write what is left and stop the thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+    def errors(self):
+        """Return and clear the write errors collected so far."""
+        errs = []
+        while self._errors:
+            errs.append(self._errors.popleft())
+        return errs
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if not batch else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._write(batch)
+                continue
+            if item is _STOP:
+                self._write(batch)
+                return
+            if isinstance(item, threading.Event):
+                self._write(batch)
+                item.set()
+                continue
+            batch.append(item)
+            if len(batch) == 1:
+                deadline = time.monotonic() + self.flush_interval
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+
+    def _write(self, batch):
+        if not batch:
+            return
+        lines = []
+        for entry in batch:
+            try:
+                lines.append(json.dumps(entry) + "\n")
+            except (TypeError, ValueError) as e:
+                self._errors.append(f"score not saved: {e}")
+        batch.clear()
+        if not lines:
+            return
+        try:
+            with open(self.path, "a") as f:
+                f.write("".join(lines))
+            self.generation += 1
+        except OSError as e:
+            self._errors.append(f"{len(lines)} score(s) not saved: {e}")
+
+
+# -------------------
+# Columnar compaction
+# -------------------
+class ScoreColumns:
+    """Read-only, memory-mapped view of a column file.
+
+    column(name) returns a typed memoryview straight into the mapping and
+    numpy(name) an ndarray over the same bytes; neither copies. Close the
+    object (or use it as a context manager) only after dropping those
+    views.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, ncols, rows = _COL_HEADER.unpack_from(self._mm, 0)
+        if magic != COLUMN_MAGIC or version != COLUMN_VERSION:
+            self._mm.close()
+            raise ValueError(f"{path}: not a score column file")
+        self.rows = rows
+        self._buf = memoryview(self._mm)
+        self._layout = {}
+        self._views = {}
+        for i in range(ncols):
+            name, code, offset = _COL_ENTRY.unpack_from(self._mm, _COL_HEADER.size + i * _COL_ENTRY.size)
+            name, code = name.rstrip(b"\0").decode(), code.decode()
+            size = array(code).itemsize
+            self._layout[name] = (code, offset)
+            self._views[name] = self._buf[offset:offset + rows * size].cast(code)
+
+    def __len__(self):
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._mm is None:
+            return
+        for view in self._views.values():
+            view.release()
+        self._views = {}
+        self._buf.release()
+        self._mm.close()
+        self._mm = None
+
+    def column(self, name):
+        return self._views[name]
+
+    def numpy(self, name, start=0, stop=None):
+        """Zero-copy ndarray over rows [start, stop) of one column."""
+        import numpy as np
+        code, offset = self._layout[name]
+        dtype = np.dtype(code).newbyteorder("<")
+        stop = self.rows if stop is None else min(stop, self.rows)
+        return np.frombuffer(self._mm, dtype, max(0, stop - start), offset + start * dtype.itemsize)
+
+    def entry(self, i):
+        """Round i as a high-score dict (same keys as the JSONL)."""
+        e = {name: self._views[name][i] for name, _ in SCORE_COLUMNS}
+        e["winner"] = _WINNER_NAMES.get(e["winner"])
+        return e
+
+    def tail(self, n):
+        """The last n rounds, oldest first."""
+        return [self.entry(i) for i in range(max(0, self.rows - n), self.rows)]
+
+    def __iter__(self):
+        return (self.entry(i) for i in range(self.rows))
+
+
+def write_columns(path, columns, rows):
+    """Write arrays (name -> array in SCORE_COLUMNS order) as a column file."""
+    table_end = _COL_HEADER.size + len(SCORE_COLUMNS) * _COL_ENTRY.size
+    offsets = []
+    pos = table_end
+    for name, code in SCORE_COLUMNS:
+        pos = (pos + 7) & ~7
+        offsets.append(pos)
+        pos += rows * array(code).itemsize
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_COL_HEADER.pack(COLUMN_MAGIC, COLUMN_VERSION, len(SCORE_COLUMNS), rows))
+        for (name, code), offset in zip(SCORE_COLUMNS, offsets):
+            f.write(_COL_ENTRY.pack(name.encode(), code.encode(), offset))
+        for (name, _), offset in zip(SCORE_COLUMNS, offsets):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(columns[name].tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def compact(path=HIGHSCORE_FILE, columns=None):
+    """Move every round in the JSONL into its column file.
+
+    The JSONL is renamed first, so a running game simply starts a fresh
+    file with its next score. Lines that do not parse as score entries are
+    not dropped: they are appended to path + ".rejected". Returns
+    (rounds moved, lines rejected).
+
+    Before the rename, the column file's row count is recorded in
+    path + ".compacting.rows". An interrupted compaction leaves the
+    renamed file (path + ".compacting") and that marker behind; the next
+    run keeps only the recorded rows of the column file and folds the
+    renamed file in again, so no round is added twice.
+    """
+    columns = columns if columns is not None else column_path(path)
+    pending = path + ".compacting"
+    marker = pending + ".rows"
+    state = _read_marker(marker)
+    if not os.path.exists(pending):
+        if not os.path.exists(path):
+            if state is not None:
+                os.remove(marker)
+            return 0, 0
+        if state is None:
+            state = {"rows": _column_rows(columns)}
+            _write_marker(marker, state)
+        os.replace(path, pending)
+    elif state is None:
+        # left by a build without the marker: take its rows as not yet in
+        # the column file
+        state = {"rows": _column_rows(columns)}
+        _write_marker(marker, state)
+
+    arrays = {name: array(code) for name, code in SCORE_COLUMNS}
+    rows = state["rows"]
+    if rows:
+        with ScoreColumns(columns) as old:
+            if old.rows < rows:
+                raise ValueError(f"{columns}: {old.rows} rows, {marker} expects at least {rows}")
+            for name, code in SCORE_COLUMNS:
+                size = array(code).itemsize
+                with old.column(name).cast("B") as raw, raw[:rows * size] as kept:
+                    arrays[name].frombytes(kept)
+
+    added = 0
+    rejected = []
+    with open(pending, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entries = [score_row(e) for e in decode_line(line)]
+            except ValueError:
+                rejected.append(line if line.endswith(b"\n") else line + b"\n")
+                continue
+            for t, winner, tug, lp, rp, dur in entries:
+                row = (t, WINNER_CODES[winner], tug, lp, rp, dur)
+                for (name, _), value in zip(SCORE_COLUMNS, row):
+                    arrays[name].append(value)
+                added += 1
+
+    write_columns(columns, arrays, rows + added)
+    if rejected and not state.get("rejected"):
+        with open(path + ".rejected", "ab") as f:
+            f.writelines(rejected)
+            f.flush()
+            os.fsync(f.fileno())
+        state["rejected"] = True
+        _write_marker(marker, state)
+    os.remove(pending)
+    os.remove(marker)
+    return added, len(rejected)
+
+
+def _column_rows(columns):
+    if not os.path.exists(columns):
+        return 0
+    with ScoreColumns(columns) as cols:
+        return cols.rows
+
+
+def _read_marker(marker):
+    try:
+        with open(marker, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_marker(marker, state):
+    tmp = marker + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, marker)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="High-score log tools")
+    parser.add_argument("command", choices=("compact", "tail"))
+    parser.add_argument("--path", default=HIGHSCORE_FILE)
+    parser.add_argument("-n", type=int, default=5, help="rounds shown by tail")
+    args = parser.parse_args(argv)
+
+    if args.command == "compact":
+        start = time.perf_counter()
+        added, rejected = compact(args.path)
+        total = _column_rows(column_path(args.path))
+        print(f"compacted {added} rounds in {time.perf_counter() - start:.2f}s, "
+              f"{total} rounds in {column_path(args.path)}")
+        if rejected:
+            print(f"{rejected} unreadable lines kept in {args.path}.rejected")
+    else:
+        for e in HighScoreStore(args.path, keep=args.n).recent:
+            print(json.dumps(e))
+
+
+if __name__ == "__main__":
+    main()
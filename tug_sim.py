@@ -0,0 +1,322 @@
+"""Headless tug-of-rope rules engine.
+
+Nothing in here touches OpenGL. The GLUT scripts queue key presses, call
+TugSimulation.run() from idle() with the step count from their
+tug_clock.GameClock, and only read the state back when they draw. The
+same object runs thousands of rounds per second without a window for
+balancing, tests and bot evaluation.
+"""
+import math
+import random
+import time
+from dataclasses import dataclass
+
+# Simulation tick used by run() and tug_clock.GameClock; step() accepts any dt.
+FIXED_DT = 1.0 / 120.0
+
+# Continuous state that lerp() can blend between the last two steps
+INTERPOLATED = (
+    "left_stamina", "right_stamina", "left_lean", "right_lean",
+    "platform_fall_progress", "loser_fall_progress", "winner_jump_progress",
+    "referee_left_arm_angle", "referee_right_arm_angle",
+)
+
+
+# -------------------
+# Configuration
+# -------------------
+@dataclass
+class TugConfig:
+    """Rule constants shared by every game variant."""
+    tug_limit: int = 10              # winning threshold (crossing >+limit or <-limit)
+    round_enabled: bool = True
+    round_duration: float = 5.0      # seconds per round
+    left_max_stam: float = 100.0
+    right_max_stam: float = 100.0
+    stam_cost_per_press: float = 12.0
+    stam_recover_rate: float = 18.0  # per second
+    anim_duration: float = 3.0       # seconds of win animation
+    animation_duration: float = 2.0  # loser fall / winner jump
+    lean_max_angle: float = 12.0
+    lean_recovery_rate: float = 40.0  # degrees per second
+    lean_duration: float = 0.25
+    referee_anim_duration: float = 2.0
+    bot_difficulty: float = 0.6      # 0.0..1.0 aggressiveness
+
+
+# -------------------
+# Simulation
+# -------------------
+class TugSimulation:
+    """Game state plus the rules that advance it.
+
+    inputs passed to step() are key names: 'a' pulls for the left player (A),
+    'l' pulls for the right player (L). step() returns a list of events:
+    ('round_over', winner) when a round ends, ('score', entry) once the win
+    animation has finished and the result should be saved, then
+    ('round_done', winner) for every outcome including ties.
+
+    Every round is seeded (self.seed) and every input, bot toggle and bot
+    press is logged in input_log as (tick, key), so a round can be rebuilt
+    exactly from seed + config + log (see tug_replay.InputReplay).
+    """
+
+    def __init__(self, config=None, seed=None):
+        self.config = config if config is not None else TugConfig()
+        self._seeds = random.Random(seed)
+        self.bot_enabled = False
+        self.reset()
+
+    def reset(self, seed=None):
+        """Start a new round with its own bot rng seed. Bot toggle is kept."""
+        cfg = self.config
+        self.seed = seed if seed is not None else self._seeds.getrandbits(32)
+        self.rng = random.Random(self.seed)
+        self.bot_at_start = self.bot_enabled
+        self.input_log = []          # (tick, key) in the order applied
+        self.tick = 0                # steps with dt > 0 since reset
+        self.t = 0.0                 # simulated seconds since reset
+        self.tug = 0
+        self.winner = None           # 'A', 'L' or None
+        self.game_paused = False     # round ended, inputs ignored
+        self.round_running = True
+        self.round_time_left = cfg.round_duration
+        self.left_stamina = cfg.left_max_stam
+        self.right_stamina = cfg.right_max_stam
+        self.left_presses = 0
+        self.right_presses = 0
+        self.left_lean = 0.0
+        self.right_lean = 0.0
+        self.left_lean_time = 0.0
+        self.right_lean_time = 0.0
+        self.last_bot_action = 0.0
+        self.animation_start = None
+        self.platform_fall_progress = 0.0
+        self.loser_fall_progress = 0.0
+        self.winner_jump_progress = 0.0
+        self.referee_animation_type = None   # 'left_win', 'right_win', 'tie'
+        self.referee_animation_start = None
+        self.referee_left_arm_angle = 0.0
+        self.referee_right_arm_angle = 0.0
+        self.referee_wave_progress = 0.0
+        self._prev = None            # INTERPOLATED values before the last step
+
+    # -------------------
+    # Stepping
+    # -------------------
+    def run(self, steps, inputs=()):
+        """Run exactly steps FIXED_DT steps; the count comes from tug_clock.GameClock.
+
+        inputs are applied on the first step (or on their own with no steps).
+        Returns the collected events.
+        """
+        events = []
+        for i in range(steps):
+            if i == steps - 1:
+                self._prev = {name: getattr(self, name) for name in INTERPOLATED}
+            events.extend(self.step(FIXED_DT, inputs))
+            inputs = ()
+        if inputs:
+            events.extend(self.step(0.0, inputs))
+        return events
+
+    def lerp(self, name, alpha):
+        """An INTERPOLATED value alpha of the way from the previous step to now.
+
+        Renderers use this with the clock's alpha so motion is smooth when
+        frames fall between simulation steps.
+        """
+        value = getattr(self, name)
+        if self._prev is None:
+            return value
+        prev = self._prev[name]
+        return prev + (value - prev) * alpha
+
+    def step(self, dt, inputs=()):
+        """Apply inputs, then advance the simulation by dt seconds."""
+        cfg = self.config
+        events = []
+        for key in inputs:
+            self.input_log.append((self.tick, key))
+            self.press(key, events)
+
+        if dt <= 0:
+            return events
+        self.t += dt
+
+        # Recover stamina
+        if not self.game_paused:
+            self.left_stamina = min(cfg.left_max_stam, self.left_stamina + cfg.stam_recover_rate * dt)
+            self.right_stamina = min(cfg.right_max_stam, self.right_stamina + cfg.stam_recover_rate * dt)
+
+        # Lean recovery - players return upright after LEAN_DURATION
+        if self.left_lean > 0 and self.t - self.left_lean_time > cfg.lean_duration:
+            self.left_lean = max(0.0, self.left_lean - cfg.lean_recovery_rate * dt)
+        if self.right_lean > 0 and self.t - self.right_lean_time > cfg.lean_duration:
+            self.right_lean = max(0.0, self.right_lean - cfg.lean_recovery_rate * dt)
+
+        # Round timer
+        if cfg.round_enabled and self.round_running and not self.game_paused:
+            self.round_time_left -= dt
+            if self.round_time_left <= 0:
+                self.round_running = False
+                if self.tug > 0:
+                    self._end_round('A', events)
+                elif self.tug < 0:
+                    self._end_round('L', events)
+                else:
+                    self._end_round(None, events)
+
+        # Bot plays the right side
+        if self.bot_enabled and not self.game_paused:
+            time_since = self.t - self.last_bot_action
+            if time_since >= self.bot_interval():
+                if self.press('l', events):
+                    self.input_log.append((self.tick, 'bot'))
+                self.last_bot_action = self.t
+
+        if self.animation_start is not None:
+            self._update_animation(events)
+        self.tick += 1
+        return events
+
+    def set_bot(self, enabled):
+        """Turn the bot on or off, effective from the next step."""
+        if enabled != self.bot_enabled:
+            self.input_log.append((self.tick, 'b'))
+        self.bot_enabled = enabled
+
+    def press(self, key, events=None):
+        """Apply one key press. Returns True if it moved the rope."""
+        cfg = self.config
+        if self.game_paused:
+            return False
+        key = key.lower()
+        if key == 'a':
+            if self.left_stamina < cfg.stam_cost_per_press:
+                return False
+            self.tug += 1
+            self.left_stamina -= cfg.stam_cost_per_press
+            self.left_presses += 1
+            self.left_lean = cfg.lean_max_angle
+            self.left_lean_time = self.t
+        elif key == 'l':
+            if self.right_stamina < cfg.stam_cost_per_press:
+                return False
+            self.tug -= 1
+            self.right_stamina -= cfg.stam_cost_per_press
+            self.right_presses += 1
+            self.right_lean = cfg.lean_max_angle
+            self.right_lean_time = self.t
+        else:
+            return False
+
+        # Clamp tug
+        self.tug = max(-cfg.tug_limit * 3, min(cfg.tug_limit * 3, self.tug))
+
+        # Check win condition
+        if self.tug > cfg.tug_limit:
+            self._end_round('A', events)
+        elif self.tug < -cfg.tug_limit:
+            self._end_round('L', events)
+        return True
+
+    def bot_interval(self):
+        """Seconds the bot waits before its next press (includes jitter)."""
+        cfg = self.config
+        base_interval = 0.18 + (1.0 - cfg.bot_difficulty) * 0.8
+        adapt = 1.0 - max(0.0, min(1.0, self.tug / float(cfg.tug_limit)))
+        interval = base_interval * (0.7 + 0.6 * (1.0 - adapt))
+        return interval * (0.75 + 0.5 * self.rng.random())
+
+    # -------------------
+    # Round end / animation
+    # -------------------
+    def _end_round(self, winner, events):
+        self.winner = winner
+        self.game_paused = True
+        self.animation_start = self.t
+        if events is not None:
+            events.append(('round_over', winner))
+
+    def round_entry(self):
+        """High-score record for the round that just finished."""
+        return {
+            "time": time.time(),
+            "winner": self.winner,
+            "tug_at_end": self.tug,
+            "left_presses": self.left_presses,
+            "right_presses": self.right_presses,
+            "round_duration": self.config.round_duration - max(0.0, self.round_time_left),
+        }
+
+    def _update_animation(self, events):
+        cfg = self.config
+        anim_elapsed = self.t - self.animation_start
+        self.platform_fall_progress = min(1.0, anim_elapsed / cfg.anim_duration)
+        if self.winner is not None:
+            self.winner_jump_progress = anim_elapsed
+        if self.referee_animation_start is None:
+            if self.winner == 'A':
+                self._start_referee_animation('left_win')
+            elif self.winner == 'L':
+                self._start_referee_animation('right_win')
+            else:
+                self._start_referee_animation('tie')
+        self.loser_fall_progress = min(1.0, anim_elapsed / cfg.animation_duration)
+        self._update_referee_animation()
+
+        if anim_elapsed >= cfg.anim_duration:
+            if self.winner is not None:
+                events.append(('score', self.round_entry()))
+            events.append(('round_done', self.winner))
+            self.animation_start = None
+            self.loser_fall_progress = 0.0
+            self.winner_jump_progress = 0.0
+
+    def _start_referee_animation(self, kind):
+        self.referee_animation_type = kind
+        self.referee_animation_start = self.t
+        self.referee_left_arm_angle = 0.0
+        self.referee_right_arm_angle = 0.0
+        self.referee_wave_progress = 0.0
+
+    def _update_referee_animation(self):
+        elapsed = self.t - self.referee_animation_start
+        progress = min(1.0, elapsed / self.config.referee_anim_duration)
+        kind = self.referee_animation_type
+        if kind == 'left_win':
+            self.referee_left_arm_angle = 90.0 * progress
+            self.referee_right_arm_angle = 0.0
+        elif kind == 'right_win':
+            self.referee_right_arm_angle = 90.0 * progress
+            self.referee_left_arm_angle = 0.0
+        elif kind == 'tie':
+            self.referee_wave_progress = progress
+            wave_cycle = progress * 8 * 2 * math.pi
+            self.referee_left_arm_angle = 45.0 + 20.0 * math.sin(wave_cycle)
+            self.referee_right_arm_angle = 45.0 + 20.0 * math.sin(wave_cycle + math.pi)
+        # Ties return to neutral, win poses keep the arm raised
+        if progress >= 1.0 and kind == 'tie':
+            self.referee_left_arm_angle = 0.0
+            self.referee_right_arm_angle = 0.0
+            self.referee_wave_progress = 0.0
+
+
+def run_round(sim, policy=None, dt=FIXED_DT, max_time=None):
+    """Play one round headless until the win animation finishes.
+
+    policy(sim) returns the keys to press this tick (the bot can drive the
+    right side via sim.bot_enabled). Returns the score entry, or None for a
+    tie.
+    """
+    limit = max_time if max_time is not None else (
+        sim.config.round_duration + sim.config.anim_duration + 1.0)
+    while sim.t < limit:
+        keys = policy(sim) if policy is not None else ()
+        for kind, payload in sim.step(dt, keys):
+            if kind == 'score':
+                return payload
+        if sim.game_paused and sim.animation_start is None:
+            break
+    return None